@@ -5,15 +5,21 @@ General Public License as published by the Free Software Foundation, either vers
 or (at your option) any later version.
 """
 # -*- coding: utf-8 -*-
+import codecs
+import csv
+import hashlib
+import io
 import json
 import os
 import random
 import re
 import sys
 import mmap
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 from sip import isdeleted
-from time import sleep
+from time import sleep, perf_counter
 
 from qgis.PyQt.QtCore import QSettings, Qt, QDate
 from qgis.PyQt.QtGui import QPixmap
@@ -67,6 +73,10 @@ class GwAdminButton:
         self.current_sql_file = 0   # Current number of SQL file
         self.progress_value = 0     # (current_sql_file / total_sql_files) * 100
         self.progress_ratio = 0.8   # Ratio to apply to 'progress_value'
+        self.inp_chunk_size = 10000  # Number of INP rows loaded into temp_csv with each COPY
+        self.inp_sample_size = 1048576  # Bytes of INP file read to guess its codec
+        self.sql_ledger = None      # Checksums of SQL files applied to schema 'sql_ledger_schema' {file: checksum}
+        self.sql_ledger_schema = None
 
 
     def init_sql(self, set_database_connection=False, username=None, show_dialog=True):
@@ -215,6 +225,7 @@ class GwAdminButton:
 
         status = (self.error_count == 0)
         self._manage_result_message(status, parameter="Create project")
+        tools_db.reset_functions_cache()
         if status:
             global_vars.dao.commit()
             if is_utils is False:
@@ -356,6 +367,7 @@ class GwAdminButton:
             self.dlg_readsql_show_info.btn_update.hide()
         else:
             global_vars.dao.rollback()
+        tools_db.reset_functions_cache()
 
         # Reset count error variable to 0
         self.error_count = 0
@@ -391,6 +403,7 @@ class GwAdminButton:
                 global_vars.dao.commit()
             else:
                 global_vars.dao.rollback()
+            tools_db.reset_functions_cache()
 
             # Reset count error variable to 0
             self.error_count = 0
@@ -535,6 +548,19 @@ class GwAdminButton:
             self.error_count = self.error_count + 1
             return
 
+        # Files of existing schemas already applied (same checksum) are skipped
+        ledger_opened = False
+        if not new_project:
+            ledger_opened = self._open_sql_ledger(self._get_target_schema_name())
+        try:
+            return self._update_31to39(new_project, project_type, no_ct)
+        finally:
+            if ledger_opened:
+                self._close_sql_ledger()
+
+
+    def _update_31to39(self, new_project=False, project_type=False, no_ct=False):
+
         folders = sorted(os.listdir(self.folder_updates + ''))
         for folder in folders:
             sub_folders = sorted(os.listdir(os.path.join(self.folder_updates, folder)))
@@ -746,6 +772,10 @@ class GwAdminButton:
         # Check if user have commit permissions
         self.dev_commit = tools_gw.get_config_parser('system', 'dev_commit', "project", "dev", False, force_reload=True)
         self.dev_commit = tools_os.set_boolean(self.dev_commit)
+        sql_ledger = tools_gw.get_config_parser('system', 'sql_checksum_ledger', "user", "init", False)
+        self.sql_ledger_enabled = tools_os.set_boolean(sql_ledger, False)
+        sql_load_workers = tools_gw.get_config_parser('system', 'sql_load_workers', "user", "init", False)
+        self.sql_load_workers = int(sql_load_workers) if sql_load_workers not in (None, 'None', '') else 0
 
         # Create dialog object
         self.dlg_readsql = GwAdminUi()
@@ -1301,8 +1331,10 @@ class GwAdminButton:
 
 
     def _reload_fct_ftrg(self):
-        """"""
+        """ Reload all function files, even the ones not changed: they may have been modified or dropped in database """
+
         self._load_fct_ftrg()
+        tools_db.reset_functions_cache()
 
 
     def _load_fct_ftrg(self):
@@ -1799,11 +1831,8 @@ class GwAdminButton:
         status = True
         if utils_schema_name:
             schema_name = utils_schema_name
-        elif self.schema is None:
-            schema_name = tools_qt.get_text(self.dlg_readsql, self.dlg_readsql.project_schema_name)
-            schema_name = schema_name.replace('"', '')
         else:
-            schema_name = self.schema.replace('"', '')
+            schema_name = self._get_target_schema_name()
         self.project_epsg = str(self.project_epsg).replace('"', '')
 
         # Manage folders 'i18n'
@@ -1817,25 +1846,213 @@ class GwAdminButton:
             for file in filelist:
                 status = True
                 if file in files_to_execute:
-                    tools_log.log_info(os.path.join(filedir, file))
                     self.current_sql_file += 1
                     status = self._read_execute_file(filedir, file, schema_name, self.project_epsg, set_progress_bar)
                 if not status and self.dev_commit is False:
                     return False
 
         else:
+            filelist = [file for file in filelist if ".sql" in file and (no_ct is False or "tablect.sql" not in file)]
+            if self._is_parallel_folder(filedir, filelist):
+                return self._execute_files_parallel(filedir, filelist, schema_name, set_progress_bar)
+
             for file in filelist:
-                if ".sql" in file:
-                    if (no_ct is True and "tablect.sql" not in file) or no_ct is False:
-                        tools_log.log_info(os.path.join(filedir, file))
-                        self.current_sql_file += 1
-                        status = self._read_execute_file(filedir, file, schema_name, self.project_epsg, set_progress_bar)
-                        if not status and self.dev_commit is False:
-                            return False
+                self.current_sql_file += 1
+                status = self._read_execute_file(filedir, file, schema_name, self.project_epsg, set_progress_bar)
+                if not status and self.dev_commit is False:
+                    return False
 
         return status
 
 
+    def _is_parallel_folder(self, filedir, filelist):
+        """ Check if files of @filedir can be executed concurrently """
+
+        # Each file must be committed on its own connection, so it's only possible with 'dev_commit'
+        if self.dev_commit is not True or self.sql_load_workers < 2 or len(filelist) < 2:
+            return False
+
+        # Function and trigger function definitions don't depend on the order they are created
+        folder = os.path.basename(os.path.normpath(filedir))
+        return folder in (self.file_pattern_fct, self.file_pattern_ftrg)
+
+
+    def _execute_files_parallel(self, filedir, filelist, schema_name, set_progress_bar=False):
+        """ Execute files of @filedir concurrently using @sql_load_workers auxiliary connections """
+
+        tools_log.log_info(f"Processing folder with {self.sql_load_workers} connections: {filedir}")
+        tools_log.log_info("Bodies of sql functions of this folder are not validated when they are created "
+                           "(check_function_bodies = false), errors in them will raise when they are executed")
+        lock = threading.Lock()
+        workers = min(self.sql_load_workers, len(filelist))
+        groups = [filelist[i::workers] for i in range(workers)]
+        start = perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(partial(self._execute_files_worker, filedir, schema_name, lock,
+                                                set_progress_bar), groups))
+        tools_log.log_info(f"Folder executed in {perf_counter() - start:.3f} s: {filedir}")
+
+        return all(results)
+
+
+    def _execute_files_worker(self, filedir, schema_name, lock, set_progress_bar, filelist):
+        """ Execute files of @filelist one by one using its own auxiliary connection """
+
+        aux_conn = global_vars.dao.get_aux_conn()
+        if isinstance(aux_conn, dict):
+            tools_log.log_warning(f"Unable to get auxiliary connection: {aux_conn['last_error']}")
+            with lock:
+                self.error_count = self.error_count + 1
+            return False
+
+        status = True
+        try:
+            # Bodies of sql functions can reference functions created by other connections. Commit the setting on
+            # its own, so a rollback of a failed file doesn't undo it for the rest of files of the worker
+            cursor = global_vars.dao.get_cursor(aux_conn)
+            cursor.execute("SET check_function_bodies = false;")
+            global_vars.dao.commit(aux_conn)
+            for file in filelist:
+                if self._is_task_canceled():
+                    return False
+                with lock:
+                    self.current_sql_file += 1
+                    self._set_progress_create_schema(set_progress_bar)
+                if not self._execute_file_aux_conn(aux_conn, filedir, file, schema_name, lock):
+                    status = False
+        except Exception as e:
+            tools_log.log_warning(str(e))
+            with lock:
+                self.error_count = self.error_count + 1
+            status = False
+        finally:
+            # Files can change settings of the session (search_path...), don't reuse the connection
+            global_vars.dao.delete_aux_con(aux_conn, discard=True)
+
+        return status
+
+
+    def _execute_file_aux_conn(self, aux_conn, filedir, file, schema_name, lock):
+        """ Execute @file and commit it using @aux_conn """
+
+        filepath = os.path.join(filedir, file)
+        start = perf_counter()
+        with open(filepath, 'r', encoding="utf8") as f:
+            f_to_read = f.read().replace("SCHEMA_NAME", schema_name).replace("SRID_VALUE", self.project_epsg)
+
+        tools_log.log_info(f"Executing {filepath}")
+        try:
+            cursor = global_vars.dao.get_cursor(aux_conn)
+            cursor.execute(f_to_read)
+            global_vars.dao.commit(aux_conn)
+        except Exception as e:
+            global_vars.dao.rollback(aux_conn)
+            with lock:
+                self.error_count = self.error_count + 1
+                tools_log.log_info(f"_read_execute_file error {filepath}")
+                tools_log.log_info(f"Message: {e}")
+                if hasattr(self, 'task_create_schema') and not isdeleted(self.task_create_schema):
+                    self.task_create_schema.db_exception = (e, f_to_read, filepath)
+                    self.task_create_schema.cancel()
+            return False
+
+        tools_log.log_info(f"{filepath} ({perf_counter() - start:.3f} s)")
+        return True
+
+
+    def _is_task_canceled(self):
+
+        return hasattr(self, 'task_create_schema') and not isdeleted(self.task_create_schema) and \
+            self.task_create_schema.isCanceled()
+
+
+    def _set_progress_create_schema(self, set_progress_bar):
+
+        if set_progress_bar and hasattr(self, 'task_create_schema') and not isdeleted(self.task_create_schema):
+            self.progress_value = int(float(self.current_sql_file / self.total_sql_files) * 100)
+            self.progress_value = int(self.progress_value * self.progress_ratio)
+            self.task_create_schema.set_progress(self.progress_value)
+
+
+    def _get_target_schema_name(self):
+        """ Get name of the schema where SQL files are executed """
+
+        if self.schema is None:
+            schema_name = tools_qt.get_text(self.dlg_readsql, self.dlg_readsql.project_schema_name)
+        else:
+            schema_name = self.schema
+        return str(schema_name).replace('"', '')
+
+
+    def _open_sql_ledger(self, schema_name):
+        """ Load checksums of SQL files applied to @schema_name. Returns True if ledger has been opened here """
+
+        if not self.sql_ledger_enabled or self.sql_ledger is not None or schema_name in (None, '', 'null'):
+            return False
+
+        # Ledger is optional: when statements are not committed, open it inside a savepoint, so a failure (missing
+        # privileges...) is undone without rolling back the transaction of the caller
+        use_savepoint = self.dev_commit is False
+        if use_savepoint and not tools_db.execute_sql("SAVEPOINT sql_ledger;", commit=False, is_thread=True):
+            tools_log.log_warning(f"Unable to open ledger of SQL files: {global_vars.session_vars['last_error']}")
+            return False
+
+        rows = None
+        sql = (f"CREATE TABLE IF NOT EXISTS {schema_name}.sys_sqlfile_ledger (filepath text PRIMARY KEY, "
+               f"checksum text NOT NULL, tstamp timestamp DEFAULT now(), cur_user text DEFAULT current_user);")
+        status = tools_db.execute_sql(sql, commit=self.dev_commit, is_thread=True)
+        if status:
+            sql = f"SELECT filepath, checksum FROM {schema_name}.sys_sqlfile_ledger"
+            rows = tools_db.get_rows(sql, log_info=False, commit=self.dev_commit, is_thread=True)
+            status = global_vars.session_vars['last_error'] is None
+
+        if not status:
+            tools_log.log_warning(f"Unable to open ledger of SQL files: {global_vars.session_vars['last_error']}")
+            if use_savepoint:
+                tools_db.execute_sql("ROLLBACK TO SAVEPOINT sql_ledger;", commit=False, is_thread=True)
+            return False
+
+        if use_savepoint:
+            tools_db.execute_sql("RELEASE SAVEPOINT sql_ledger;", commit=False, is_thread=True)
+        self.sql_ledger = {row[0]: row[1] for row in rows} if rows else {}
+        self.sql_ledger_schema = schema_name
+        return True
+
+
+    def _close_sql_ledger(self):
+
+        self.sql_ledger = None
+        self.sql_ledger_schema = None
+
+
+    def _get_sql_ledger_checksum(self, filepath, schema_name, sql):
+        """ Return tuple (ledger key, checksum) of file @filepath with content @sql. None if ledger is not used """
+
+        if self.sql_ledger is None or schema_name != self.sql_ledger_schema:
+            return None
+
+        key = os.path.relpath(filepath, self.sql_dir).replace(os.sep, '/')
+        return key, hashlib.sha256(sql.encode('utf-8')).hexdigest()
+
+
+    def _get_sql_ledger_upsert(self, key, checksum):
+
+        return (f"INSERT INTO {self.sql_ledger_schema}.sys_sqlfile_ledger (filepath, checksum) "
+                f"VALUES ($${key}$$, '{checksum}') ON CONFLICT (filepath) DO UPDATE "
+                f"SET checksum = EXCLUDED.checksum, tstamp = now(), cur_user = current_user;")
+
+
+    def _set_sql_ledger_checksum(self, key, checksum):
+        """ Store @checksum of applied file @key in the same transaction """
+
+        sql = self._get_sql_ledger_upsert(key, checksum)
+        if not tools_db.execute_sql(sql, commit=self.dev_commit, is_thread=True):
+            return False
+
+        self.sql_ledger[key] = checksum
+        return True
+
+
     def _read_execute_file(self, filedir, file, schema_name, project_epsg, set_progress_bar=False):
         """"""
 
@@ -1844,20 +2061,28 @@ class GwAdminButton:
         try:
 
             # Manage progress bar
-            if set_progress_bar:
-                if hasattr(self, 'task_create_schema') and not isdeleted(self.task_create_schema):
-                    self.progress_value = int(float(self.current_sql_file / self.total_sql_files) * 100)
-                    self.progress_value = int(self.progress_value * self.progress_ratio)
-                    self.task_create_schema.set_progress(self.progress_value)
+            self._set_progress_create_schema(set_progress_bar)
 
-            if hasattr(self, 'task_create_schema') and not isdeleted(self.task_create_schema) and self.task_create_schema.isCanceled():
+            if self._is_task_canceled():
                 return False
 
             filepath = os.path.join(filedir, file)
+            start = perf_counter()
             f = open(filepath, 'r', encoding="utf8")
             if f:
                 f_to_read = str(f.read().replace("SCHEMA_NAME", schema_name).replace("SRID_VALUE", project_epsg))
+                checksum = self._get_sql_ledger_checksum(filepath, schema_name, f_to_read)
+                if checksum and self.sql_ledger.get(checksum[0]) == checksum[1]:
+                    tools_log.log_info(f"{filepath} (skipped, already applied)")
+                    status = True
+                    return status
+
+                # Log file before executing it, so a file that hangs or crashes the session can be identified
+                tools_log.log_info(f"Executing {filepath}")
                 status = tools_db.execute_sql(str(f_to_read), filepath=filepath, commit=self.dev_commit, is_thread=True)
+                if status and checksum:
+                    status = self._set_sql_ledger_checksum(*checksum)
+                tools_log.log_info(f"{filepath} ({perf_counter() - start:.3f} s)")
 
                 if status is False:
                     self.error_count = self.error_count + 1
@@ -2012,7 +2237,14 @@ class GwAdminButton:
             self.task1.setProgress(0)
 
             # Insert inp values into database
-            self._insert_inp_into_db(self.file_inp)
+            if not self._insert_inp_into_db(self.file_inp):
+                msg = "Error loading inp file into the database. A rollback on schema will be done."
+                tools_qt.show_info_box(msg, "Info")
+                global_vars.dao.rollback()
+                self.error_count = 0
+                self.task1.setProgress(100)
+                tools_gw.close_dialog(self.dlg_import_inp)
+                return
 
             # Get the debugMode. If it's None it will be False
             debug_mode = tools_gw.get_config_parser('system', 'import_inp_debug_mode', "user", "init", force_reload=True) or False
@@ -2192,9 +2424,8 @@ class GwAdminButton:
 
             # Replace the words
             try:
-                # Read the contents of the file
-                with open(self.file_inp, 'r', encoding='utf-8') as file:
-                    contents = file.read()
+                # Read the contents of the file with its own encoding (it's not converted when it's imported)
+                contents = self._read_inp_file(self.file_inp)
                 # Save a backup of the file
                 with open(f"{self.file_inp}.old", 'w', encoding='utf-8') as file:
                     file.write(contents)
@@ -2825,89 +3056,136 @@ class GwAdminButton:
 
 
     def _insert_inp_into_db(self, folder_path=None):
-        """"""
-
-        # Convert any file codec to utf-8
-        BLOCKSIZE = 1048576  # This is the number of bytes that will be read at a time (for handling big files)
-        srcfile = folder_path
-        trgfile = f"{folder_path}_utf8"
-        from_codec = tools_os.get_encoding_type(folder_path)  # Get file codec
+        """ Load rows of INP file into table temp_csv (fid 239) using COPY in chunks of @inp_chunk_size rows """
 
+        # File is decoded while it's read and rows are sent using the encoding of the connection
+        file_size = max(os.path.getsize(folder_path), 1)
+        chunk = []
         try:
-            with open(srcfile, 'r', encoding=from_codec) as f, open(trgfile, 'w', encoding='utf-8') as e:
-                while True:
-                    text = f.read(BLOCKSIZE)
-                    if not text:
-                        break
-                    e.write(text)
-
-            os.remove(srcfile)  # remove old encoding file
-            os.rename(trgfile, srcfile)  # rename new encoding
+            for target, values, position in self._get_inp_rows(self._read_inp_lines(folder_path)):
+                chunk.append((target, values))
+                if len(chunk) < self.inp_chunk_size:
+                    continue
+
+                if not self._copy_inp_chunk(chunk):
+                    return False
+                chunk = []
+                # Loading the file is the first half of the import
+                self.task1.setProgress((position * 50) / file_size)
         except UnicodeDecodeError:
             tools_qgis.show_warning('Decode error reading inp file')
-        except UnicodeEncodeError:
-            tools_qgis.show_warning('Encode error reading inp file')
-
-        # Read the file
-        _file = open(folder_path, "r+", encoding='utf8')
-        full_file = _file.readlines()
-        sql = ""
-        progress = 0
+            return False
+
+        if chunk and not self._copy_inp_chunk(chunk):
+            return False
+
+        self.task1.setProgress(50)
+        return True
+
+
+    def _get_inp_encoding(self, file_path, offset=0):
+        """ Return codec of INP file guessed from @inp_sample_size bytes read from @offset.
+        Most files are utf-8 (or ascii), check it before running codec detection """
+
+        with open(file_path, 'rb') as inp_file:
+            inp_file.seek(offset)
+            sample = inp_file.read(self.inp_sample_size)
+        try:
+            # Not final: last character of the sample may be cut
+            codecs.getincrementaldecoder('utf-8-sig')().decode(sample)
+        except UnicodeDecodeError:
+            return tools_os.get_encoding_type(file_path, self.inp_sample_size, offset)
+
+        return 'utf-8-sig'
+
+
+    def _read_inp_file(self, file_path):
+        """ Return text of INP file decoded with its own codec """
+
+        try:
+            with open(file_path, 'r', encoding=self._get_inp_encoding(file_path)) as inp_file:
+                return inp_file.read()
+        except UnicodeDecodeError:
+            # Only the start of the file was utf-8: the whole file is read anyway, so use it to guess the codec
+            with open(file_path, 'r', encoding=tools_os.get_encoding_type(file_path)) as inp_file:
+                return inp_file.read()
+
+
+    def _read_inp_lines(self, file_path):
+        """ Read INP file line by line. Its codec is guessed from the start of the file and, if a line isn't utf-8
+        even though the start of the file was, guessed again from that line
+        :return: Generator of tuples (line, bytes read)
+        """
+
+        codec = self._get_inp_encoding(file_path)
+        with open(file_path, 'rb') as inp_file:
+            if codec != 'utf-8-sig':
+                # Line breaks of some codecs (utf-16...) can't be found in raw bytes: let the file decode them
+                for line in io.TextIOWrapper(inp_file, encoding=codec):
+                    yield line, inp_file.tell()
+                return
+
+            position = 0
+            for raw_line in inp_file:
+                try:
+                    line = raw_line.decode(codec)
+                except UnicodeDecodeError:
+                    if codec != 'utf-8-sig':
+                        raise
+                    codec = self._get_inp_encoding(file_path, position)
+                    if codec is None:
+                        raise
+                    tools_log.log_info(f"INP file is not utf-8 from byte {position}, it's read as {codec}")
+                    line = raw_line.decode(codec)
+                position += len(raw_line)
+                yield line, position
+
+
+    def _get_inp_rows(self, lines):
+        """ Yield rows of INP file from its @lines
+        :param lines: Iterable of tuples (line, position in file)
+        :return: Generator of tuples (section, list of values, position in file)
+        """
+
         target = ""
-        for row in full_file:
-            progress += 1
+        for row, position in lines:
             row = row.rstrip()
             if len(row) == 0:
                 continue
-            if str(row[0]) == "[":
-                target = str(row)
+            if row[0] == "[":
+                target = row
             if target in ('[TRANSECTS]', '[CONTROLS]', '[RULES]'):
                 sp_n = [row]
             elif target in ('[EVAPORATION]', '[TEMPERATURE]'):
                 sp_n = re.split(' |\t', row, 1)
             else:
-                if str(row[0]) != ';':
-                    list_aux = row.split("\t")
-                    dirty_list = []
-                    for x in range(0, len(list_aux)):
-                        aux = list_aux[x].split(" ")
-                        for i in range(len(aux)):
-                            dirty_list.append(aux[i])
+                # Comments are loaded as a single value
+                if row[0] != ';':
+                    dirty_list = row.replace("\t", " ").split(" ")
                 else:
                     dirty_list = [row]
-
-                for x in range(len(dirty_list) - 1, -1, -1):
-                    if dirty_list[x] == '' or "**" in dirty_list[x] or "--" in dirty_list[x] or dirty_list[x] == '; '\
-                            or dirty_list[x] == ';' or dirty_list[x] == ';\n':
-                        dirty_list.pop(x)
-                sp_n = dirty_list
+                sp_n = [item for item in dirty_list
+                        if item not in ('', ';') and "**" not in item and "--" not in item]
 
             if len(sp_n) > 0:
-                sql += "INSERT INTO temp_csv (fid, source, "
-                values = "VALUES(239, $$" + target + "$$, "
-                for x in range(0, len(sp_n)):
-                    if "''" not in sp_n[x]:
-                        sql += "csv" + str(x + 1) + ", "
-                        value = "$$" + sp_n[x].strip().replace("\n", "") + "$$, "
-                        values += value.replace("$$$$", "null")
-                    else:
-                        sql += "csv" + str(x + 1) + ", "
-                        values = "VALUES(null, "
-                sql = sql[:-2] + ") "
-                values = values[:-2] + ");\n"
-                sql += values
-
-            if progress % 500 == 0:
-                # TODO:: Use dev_commit or dev_user?
-                tools_db.execute_sql(sql, commit=self.dev_commit)
-                sql = ""
-
-        if sql != "":
-            # TODO:: Use dev_commit or dev_user?
-            tools_db.execute_sql(sql, commit=self.dev_commit)
-
-        _file.close()
-        del _file
+                yield target, [None if "''" in value else value.strip() or None for value in sp_n], position
+
+
+    def _copy_inp_chunk(self, chunk):
+        """ Write @chunk (list of tuples (section, list of values)) into table temp_csv """
+
+        total_cols = max(len(values) for target, values in chunk)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for target, values in chunk:
+            writer.writerow([239, target] + values + [None] * (total_cols - len(values)))
+        buffer.seek(0)
+
+        cols = ", ".join([f"csv{x + 1}" for x in range(0, total_cols)])
+        sql = f"COPY temp_csv (fid, source, {cols}) FROM STDIN WITH (FORMAT csv)"
+        # Like the rest of schema operations, commit only in dev mode: otherwise rows are committed (or rolled back)
+        # together with the import function
+        return tools_db.copy_expert(sql, buffer, commit=self.dev_commit)
 
 
     def _select_file_inp(self):
@@ -88,6 +88,11 @@ class GwLoadProject(QObject):
         # Set PostgreSQL parameter 'search_path'
         tools_db.set_search_path(layer_source['schema'])
 
+        # Load names of database functions of this schema, used to check if they exist
+        tools_db.reset_functions_cache()
+        tools_db.load_functions_cache(global_vars.schema_name)
+        tools_gw.reset_typeahead_cache()
+
         # Check if schema exists
         schema_exists = tools_db.check_schema(global_vars.schema_name)
         if not schema_exists:
@@ -161,7 +166,7 @@ class GwLoadProject(QObject):
         self._check_version_compatibility()
 
         # Call gw_fct_setcheckproject and create GwProjectLayersConfig thread
-        self._config_layers()
+        self._config_layers(project_version)
 
     # region private functions
 
@@ -448,7 +453,7 @@ class GwLoadProject(QObject):
             self._enable_button("02", False)
 
 
-    def _config_layers(self):
+    def _config_layers(self, project_version=None):
         """ Call gw_fct_setcheckproject and create GwProjectLayersConfig thread """
 
         status, result = self._manage_layers()
@@ -479,8 +484,10 @@ class GwLoadProject(QObject):
                f"     WHERE table_schema = '{schema_name}')")
         rows = tools_db.get_rows(sql)
         description = f"ConfigLayerFields"
+        use_cache = tools_gw.get_config_parser('system', 'cache_layers_config', 'user', 'init', False)
         params = {"project_type": global_vars.project_type, "schema_name": global_vars.schema_name, "db_layers": rows,
-                  "qgis_project_infotype": global_vars.project_vars['info_type']}
+                  "qgis_project_infotype": global_vars.project_vars['info_type'], "project_version": project_version,
+                  "use_cache": tools_os.set_boolean(use_cache, True)}
         self.task_get_layers = GwProjectLayersConfig(description, params)
         QgsApplication.taskManager().addTask(self.task_get_layers)
         QgsApplication.taskManager().triggerTask(self.task_get_layers)
@@ -237,13 +237,12 @@ class GwDimensioning:
 
         self.snapper_manager.remove_marker(self.vertex_marker)
         self.previous_snapping = self.snapper_manager.get_snapping_options()
-        self.snapper_manager.set_snapping_status()
-        self.snapper_manager.set_snapping_layers()
-
-        self.snapper_manager.config_snap_to_node()
-        self.snapper_manager.config_snap_to_connec()
-        self.snapper_manager.config_snap_to_gully()
-        self.snapper_manager.set_snap_mode()
+        with self.snapper_manager.snapping_changes():
+            self.snapper_manager.set_snapping_status()
+            self.snapper_manager.config_snap_to_node()
+            self.snapper_manager.config_snap_to_connec()
+            self.snapper_manager.config_snap_to_gully()
+            self.snapper_manager.set_snap_mode()
 
         self.dlg_dim.actionOrientation.setChecked(False)
         self.iface.setActiveLayer(self.layer_node)
@@ -347,13 +346,12 @@ class GwDimensioning:
 
         self.snapper_manager.remove_marker(self.vertex_marker)
         self.previous_snapping = self.snapper_manager.get_snapping_options()
-        self.snapper_manager.set_snapping_status()
-        self.snapper_manager.set_snapping_layers()
-
-        self.snapper_manager.config_snap_to_node()
-        self.snapper_manager.config_snap_to_connec()
-        self.snapper_manager.config_snap_to_gully()
-        self.snapper_manager.set_snap_mode()
+        with self.snapper_manager.snapping_changes():
+            self.snapper_manager.set_snapping_status()
+            self.snapper_manager.config_snap_to_node()
+            self.snapper_manager.config_snap_to_connec()
+            self.snapper_manager.config_snap_to_gully()
+            self.snapper_manager.set_snap_mode()
 
         self.dlg_dim.actionSnapping.setChecked(False)
         tools_gw.connect_signal(self.canvas.xyCoordinates, self._canvas_move_event,
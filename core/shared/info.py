@@ -266,15 +266,13 @@ class GwInfo(QObject):
             tools_qgis.show_message(msg)
             return
 
-        # Store user snapping configuration
-        self.snapper_manager.store_snapping_options()
-
-        # Set snapping to 'node', 'connec' and 'gully'
-        self.snapper_manager.config_snap_to_arc()
-        self.snapper_manager.config_snap_to_node()
-        self.snapper_manager.config_snap_to_connec()
-        self.snapper_manager.config_snap_to_gully()
-        self.snapper_manager.set_snap_mode()
+        # Store user snapping configuration and set snapping to 'node', 'connec' and 'gully'
+        with self.snapper_manager.snapping_changes():
+            self.snapper_manager.config_snap_to_arc()
+            self.snapper_manager.config_snap_to_node()
+            self.snapper_manager.config_snap_to_connec()
+            self.snapper_manager.config_snap_to_gully()
+            self.snapper_manager.set_snap_mode()
         tools_gw.connect_signal(self.iface.actionAddFeature().toggled, self._action_is_checked,
                                 'info', 'add_feature_actionAddFeature_toggled_action_is_checked')
 
@@ -324,17 +322,15 @@ class GwInfo(QObject):
 
         self.vertex_marker = self.snapper_manager.vertex_marker
 
-        # Store user snapping configuration
-        self.snapper_manager.store_snapping_options()
+        # Store user snapping configuration and disable snapping
+        with self.snapper_manager.snapping_changes():
+            self.snapper_manager.set_snapping_status()
 
-        # Disable snapping
-        self.snapper_manager.set_snapping_status()
-
-        # if we are doing info over connec or over node
-        if option in ('arc', 'set_to_arc'):
-            self.snapper_manager.config_snap_to_arc()
-        elif option == 'node':
-            self.snapper_manager.config_snap_to_node()
+            # if we are doing info over connec or over node
+            if option in ('arc', 'set_to_arc'):
+                self.snapper_manager.config_snap_to_arc()
+            elif option == 'node':
+                self.snapper_manager.config_snap_to_node()
         # Set signals
         tools_gw.disconnect_signal('info_snapping', 'get_snapped_feature_id_xyCoordinates_mouse_moved')
         tools_gw.connect_signal(self.canvas.xyCoordinates, partial(self._mouse_moved, layer),
@@ -930,7 +926,7 @@ class GwInfo(QObject):
             layer = self.snapper_manager.get_snapped_layer(result)
             # Check feature
             if layer == self.layer_node:
-                snapped_feat = self.snapper_manager.get_snapped_feature(result)
+                snapped_feat = self.snapper_manager.get_snapped_feature(result, attributes=['node_id'])
                 element_id = snapped_feat.attribute('node_id')
                 message = "Selected node"
                 rb = tools_gw.create_rubberband(global_vars.canvas, 0)
@@ -1171,8 +1167,8 @@ class GwInfo(QObject):
         layer = global_vars.iface.activeLayer()
         layername = layer.name()
 
-        # Get the point. Leave selection
-        snapped_feature = self.snapper_manager.get_snapped_feature(result, True)
+        # Get the point. Leave selection. Attributes to copy must be the current ones
+        snapped_feature = self.snapper_manager.get_snapped_feature(result, True, use_cache=False)
         snapped_feature_attr = snapped_feature.attributes()
 
         aux = f'"{self.feature_type}_id" = '
@@ -1869,6 +1865,8 @@ class GwInfo(QObject):
         self._reset_my_json()
 
         if "Accepted" in json_result['status']:
+            # Saved values may be offered by typeahead widgets
+            tools_gw.reset_typeahead_cache()
             msg_text = json_result['message']['text']
             if msg_text is None:
                 msg_text = 'Feature upserted'
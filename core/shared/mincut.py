@@ -1129,6 +1129,7 @@ class GwMincut:
         """ Snap to connec layers to add its hydrometers """
 
         self.list_ids['connec'] = []
+        connec_ids = set()
 
         for layer in self.layers_connec:
             if layer.selectedFeatureCount() > 0:
@@ -1138,24 +1139,18 @@ class GwMincut:
                 for feature in features:
                     connec_id = feature.attribute("connec_id")
                     # Add element
-                    if connec_id in self.list_ids['connec']:
+                    if connec_id in connec_ids:
                         message = "Feature already in the list"
                         tools_qt.show_info_box(message, parameter=connec_id)
                         return
                     else:
+                        connec_ids.add(connec_id)
                         self.list_ids['connec'].append(connec_id)
 
         # Set 'expr_filter' with features that are in the list
-        expr_filter = "\"connec_id\" IN ("
-        for i in range(len(self.list_ids['connec'])):
-            expr_filter += f"'{self.list_ids['connec'][i]}', "
-        expr_filter = expr_filter[:-2] + ")"
-        if len(self.list_ids['connec']) == 0:
+        expr_filter = tools_gw.get_ids_filter("connec_id", self.list_ids['connec'])
+        if expr_filter is None:
             expr_filter = "\"connec_id\" =''"
-        # Check expression
-        (is_valid, expr) = tools_qt.check_expression_filter(expr_filter)  # @UnusedVariable
-        if not is_valid:
-            return
 
         self._reload_table_hydro(expr_filter)
 
@@ -1163,32 +1158,19 @@ class GwMincut:
     def _snapping_selection_connec(self):
         """ Snap to connec layers """
 
-        self.list_ids['connec'] = []
-
+        # Ordered set of selected ids: dict keys keep insertion order and give O(1) membership
+        connec_ids = {}
         for layer in self.layers_connec:
             if layer.selectedFeatureCount() > 0:
                 # Get selected features of the layer
                 features = layer.selectedFeatures()
                 # Get id from all selected features
                 for feature in features:
-                    connec_id = feature.attribute("connec_id")
-                    # Add element
-                    if connec_id not in self.list_ids['connec']:
-                        self.list_ids['connec'].append(connec_id)
+                    connec_ids[feature.attribute("connec_id")] = None
+        self.list_ids['connec'] = list(connec_ids)
 
-        expr_filter = None
-        if len(self.list_ids['connec']) > 0:
-            # Set 'expr_filter' with features that are in the list
-            expr_filter = "\"connec_id\" IN ("
-            for i in range(len(self.list_ids['connec'])):
-                expr_filter += f"'{self.list_ids['connec'][i]}', "
-            expr_filter = expr_filter[:-2] + ")"
-            if len(self.list_ids['connec']) == 0:
-                expr_filter = "\"connec_id\" =''"
-            # Check expression
-            (is_valid, expr) = tools_qt.check_expression_filter(expr_filter)  # @UnusedVariable
-            if not is_valid:
-                return
+        # Set 'expr_filter' with features that are in the list
+        expr_filter = tools_gw.get_ids_filter("connec_id", self.list_ids['connec'])
 
         self._reload_table_connec(expr_filter)
 
@@ -1320,24 +1302,25 @@ class GwMincut:
         self._reload_table_hydro(expr_filter)
 
 
-    def _select_features_group_layers(self, expr):
-        """ Select features of the layers filtering by @expr """
+    def _select_features_group_layers(self, list_ids):
+        """ Select features of the layers whose 'connec_id' is in @list_ids """
 
         # Iterate over all layers of type 'connec'
-        # Select features and them to 'connec_list'
+        # Select features and add them to 'connec_list'
+        connec_ids = set(self.list_ids['connec'])
         for layer in self.layers_connec:
-            it = layer.getFeatures(QgsFeatureRequest(expr))
-            # Build a list of feature id's from the previous result
-            id_list = [i.id() for i in it]
-            # Select features with these id's
+            # Build a list of feature id's and select them
+            id_list = tools_qgis.get_feature_ids(layer, "connec_id", list_ids)
             layer.selectByIds(id_list)
             if layer.selectedFeatureCount() > 0:
-                # Get selected features of the layer
-                features = layer.selectedFeatures()
-                for feature in features:
+                # Get 'connec_id' of selected features of the layer, without geometry
+                request = QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry)
+                request.setSubsetOfAttributes(["connec_id"], layer.fields())
+                for feature in layer.getSelectedFeatures(request):
                     connec_id = feature.attribute("connec_id")
                     # Check if 'connec_id' is already in 'connec_list'
-                    if connec_id not in self.list_ids['connec']:
+                    if connec_id not in connec_ids:
+                        connec_ids.add(connec_id)
                         self.list_ids['connec'].append(connec_id)
 
 
@@ -1350,25 +1333,18 @@ class GwMincut:
                f" WHERE result_id = {result_mincut_id}")
         rows = tools_db.get_rows(sql)
 
-        expr_filter = "\"connec_id\" IN ("
         if rows:
+            excluded_ids = set(self.list_ids['connec']) | set(self.deleted_list)
             for row in rows:
-                if row[0] not in self.list_ids['connec'] and row[0] not in self.deleted_list:
+                if row[0] not in excluded_ids:
+                    excluded_ids.add(row[0])
                     self.list_ids['connec'].append(row[0])
 
         if self.list_ids['connec']:
-            for connec_id in self.list_ids['connec']:
-                expr_filter += f"'{connec_id}', "
-            expr_filter = expr_filter[:-2] + ")"
-            if len(self.list_ids['connec']) == 0:
-                expr_filter = "\"connec_id\" =''"
-            # Check expression
-            (is_valid, expr) = tools_qt.check_expression_filter(expr_filter)
-            if not is_valid:
-                return
+            expr_filter = tools_gw.get_ids_filter("connec_id", self.list_ids['connec'])
 
-            # Select features of the layers filtering by @expr
-            self._select_features_group_layers(expr)
+            # Select features of the layers which are in the list
+            self._select_features_group_layers(self.list_ids['connec'])
 
             # Reload table
             self._reload_table_connec(expr_filter)
@@ -1386,19 +1362,8 @@ class GwMincut:
                f" WHERE result_id = {result_mincut_id}")
         rows = tools_db.get_rows(sql)
         if rows:
-            expr_filter = "\"connec_id\" IN ("
-            for row in rows:
-                expr_filter += f"'{row[0]}', "
-            expr_filter = expr_filter[:-2] + ")"
-            if len(self.list_ids['connec']) == 0:
-                expr_filter = "\"connec_id\" =''"
-            # Check expression
-            (is_valid, expr) = tools_qt.check_expression_filter(expr_filter)
-            if not is_valid:
-                return
-
-            # Select features of the layers filtering by @expr
-            self._select_features_group_layers(expr)
+            # Select features of the layers which are in the list of connecs
+            self._select_features_group_layers([row[0] for row in rows])
 
         # Get list of 'hydrometer_id' belonging to current result_mincut
         result_mincut_id = tools_qt.get_text(self.dlg_hydro, self.result_mincut_id)
@@ -1444,6 +1409,7 @@ class GwMincut:
             return
 
         # Iterate over all layers
+        connec_ids = set(self.list_ids['connec'])
         for layer in self.layers_connec:
             if layer.selectedFeatureCount() > 0:
                 # Get selected features of the layer
@@ -1451,11 +1417,12 @@ class GwMincut:
                 for feature in features:
                     # Append 'connec_id' into 'connec_list'
                     selected_id = feature.attribute("connec_id")
-                    if selected_id not in self.list_ids['connec']:
+                    if selected_id not in connec_ids:
+                        connec_ids.add(selected_id)
                         self.list_ids['connec'].append(selected_id)
 
         # Show message if element is already in the list
-        if connec_id in self.list_ids['connec']:
+        if connec_id in connec_ids:
             message = "Selected element already in the list"
             tools_qt.show_info_box(message, parameter=connec_id)
             return
@@ -1463,27 +1430,14 @@ class GwMincut:
         # If feature id doesn't exist in list -> add
         self.list_ids['connec'].append(connec_id)
 
-        expr_filter = None
-        if len(self.list_ids['connec']) > 0:
-
-            # Set expression filter with 'connec_list'
-            expr_filter = "\"connec_id\" IN ("
-            for i in range(len(self.list_ids['connec'])):
-                expr_filter += f"'{self.list_ids['connec'][i]}', "
-            expr_filter = expr_filter[:-2] + ")"
-            if len(self.list_ids['connec']) == 0:
-                expr_filter = "\"connec_id\" =''"
-            # Check expression
-            (is_valid, expr) = tools_qt.check_expression_filter(expr_filter)
-            if not is_valid:
-                return
+        # Set expression filter with 'connec_list'
+        expr_filter = tools_gw.get_ids_filter("connec_id", self.list_ids['connec'])
 
-            # Select features with previous filter
-            for layer in self.layers_connec:
-                # Build a list of feature id's and select them
-                it = layer.getFeatures(QgsFeatureRequest(expr))
-                id_list = [i.id() for i in it]
-                layer.selectByIds(id_list)
+        # Select features which are in the list
+        for layer in self.layers_connec:
+            # Build a list of feature id's and select them
+            id_list = tools_qgis.get_feature_ids(layer, "connec_id", self.list_ids['connec'])
+            layer.selectByIds(id_list)
 
         # Reload contents of table 'connec'
         self._reload_table_connec(expr_filter)
@@ -1565,13 +1519,12 @@ class GwMincut:
             expr_filter = "connec_id=''"
 
         # Update model of the widget with selected expr_filter
-        expr = self._reload_table_connec(expr_filter)
+        self._reload_table_connec(expr_filter)
 
         # Reload selection
         for layer in self.layers_connec:
             # Build a list of feature id's and select them
-            it = layer.getFeatures(QgsFeatureRequest(expr))
-            id_list = [i.id() for i in it]
+            id_list = tools_qgis.get_feature_ids(layer, "connec_id", self.list_ids['connec'])
             layer.selectByIds(id_list)
 
         self.connect_signal_selection_changed("mincut_connec")
@@ -2063,7 +2016,7 @@ class GwMincut:
         result = self.snapper_manager.snap_to_current_layer(event_point)
         if result.isValid():
             # Get the point. Leave selection
-            snapped_feat = self.snapper_manager.get_snapped_feature(result, True)
+            snapped_feat = self.snapper_manager.get_snapped_feature(result, True, ['node_id'])
             element_id = snapped_feat.attribute('node_id')
             if action.objectName() == "actionCustomMincut":
                 self._custom_mincut_execute(element_id)
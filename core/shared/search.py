@@ -9,6 +9,7 @@ import csv
 import os
 import re
 import sys
+from collections import OrderedDict
 from functools import partial
 
 from qgis.PyQt.QtCore import QStringListModel, Qt, QTimer
@@ -22,6 +23,7 @@ from .document import GwDocument
 from .info import GwInfo
 from .psector import GwPsector
 from .visit import GwVisit
+from ..threads.search_execute import GwSearchWorker
 from ..ui.ui_manager import GwInfoGenericUi, GwSearchWorkcatUi
 from ..utils import tools_gw
 from ... import global_vars
@@ -30,6 +32,9 @@ from ...lib import tools_db, tools_qgis, tools_qt
 
 class GwSearch:
 
+    search_delay = 300                      # Milliseconds without typing before querying the database
+    search_cache_size = 50                  # Number of search results kept to be reused while typing
+
     def __init__(self):
 
         self.manage_new_psector = GwPsector()
@@ -44,6 +49,15 @@ class GwSearch:
         self.is_mincut = False
         self.rubber_band = tools_gw.create_rubberband(self.canvas)
         self.aux_rubber_band = tools_gw.create_rubberband(self.canvas)
+        self.tab_widgets = {}
+        self.search_args = None
+        self.search_context = None
+        self.search_cache = OrderedDict()
+        self.search_timer = QTimer()
+        self.search_timer.setSingleShot(True)
+        self.search_timer.timeout.connect(self._execute_search)
+        self.search_worker = GwSearchWorker()
+        self.search_worker.search_finished.connect(self._search_finished)
 
 
     def open_search(self, dlg_search, dlg_mincut=None):
@@ -202,6 +216,12 @@ class GwSearch:
 
     def _close_search(self):
 
+        self.search_timer.stop()
+        self.search_worker.stop()
+        self.search_args = None
+        self.search_context = None
+        self.search_cache.clear()
+        self.tab_widgets = {}
         self.dlg_search = None
 
 
@@ -360,21 +380,30 @@ class GwSearch:
 
 
     def _make_list(self, completer, model, widget):
-        """ Create a list of ids and populate widget (QLineEdit) """
+        """ Schedule the search of current tab. Database is only queried when the user stops typing """
+
+        if self.dlg_search is None:
+            return
+
+        self.search_args = (completer, model, widget)
+        self.search_timer.start(self.search_delay)
+
+
+    def _execute_search(self):
+        """ Create a list of ids and populate widget (QLineEdit). Database function is executed in background """
+
+        if self.dlg_search is None or self.search_args is None:
+            return
+
+        completer, model, widget = self.search_args
 
         # Create 2 json, one for first QLineEdit and other for second QLineEdit
-        form_search = ''
         extras_search = ''
-        form_search_add = ''
         extras_search_add = ''
-        result = None
-        line_edit = None
         index = self.dlg_search.main_tab.currentIndex()
-        combo_list = self.dlg_search.main_tab.widget(index).findChildren(QComboBox)
-        line_list = self.dlg_search.main_tab.widget(index).findChildren(QLineEdit)
-        chk_list = self.dlg_search.main_tab.widget(index).findChildren(QCheckBox)
-        form_search += f'"tabName":"{self.dlg_search.main_tab.widget(index).objectName()}"'
-        form_search_add += f'"tabName":"{self.dlg_search.main_tab.widget(index).objectName()}"'
+        combo_list, line_list, chk_list = self._get_tab_widgets(index)
+        form_search = f'"tabName":"{self.dlg_search.main_tab.widget(index).objectName()}"'
+        form_search_add = form_search
 
         if combo_list:
             combo = combo_list[0]
@@ -388,71 +417,159 @@ class GwSearch:
             extras_search += f'"{combo.property("columnname")}":{{"id":"{id}", "name":"{name}"}}, '
             extras_search_add += f'"{combo.property("columnname")}":{{"id":"{id}", "name":"{name}"}}, '
 
-        if line_list:
-            line_edit = line_list[0]
+        if not line_list:
+            return
+
+        line_edit = line_list[0]
+        value = tools_qt.get_text(self.dlg_search, line_edit, return_string_null=False)
+        if str(value) == '':
+            self.search_worker.cancel()
+            return
+
+        qgis_project_add_schema = global_vars.project_vars['add_schema']
+        text_search = f'"{line_edit.property("columnname")}":{{"text":"{value}"}}'
+        extras_search += f'{text_search}, '
+        extras_search += f'"addSchema":"{qgis_project_add_schema}"'
+        if chk_list:
+            chk = chk_list[0]
+            extras_search += f', "{chk.property("columnname")}":"{chk.isChecked()}"'
+        extras_search_add += text_search
+        body = tools_gw.create_body(form=form_search, extras=extras_search)
+
+        # Results only depend on the text and the filters of the tab (without the text)
+        search_filter = f"{form_search}|{extras_search.replace(text_search, '')}"
+        context = {'completer': completer, 'model': model, 'widget': widget, 'line_list': line_list,
+                   'line_edit': line_edit, 'form_search_add': form_search_add,
+                   'extras_search_add': extras_search_add, 'filter': search_filter, 'value': value}
+        self._submit_search('gw_fct_setsearch', body, context)
+
+
+    def _get_tab_widgets(self, index):
+        """ Get (and store) QComboBox, QLineEdit and QCheckBox widgets of tab @index """
+
+        tab = self.dlg_search.main_tab.widget(index)
+        tab_name = tab.objectName()
+        if tab_name not in self.tab_widgets:
+            combo_list = tab.findChildren(QComboBox)
+            line_list = tab.findChildren(QLineEdit)
+            chk_list = tab.findChildren(QCheckBox)
             # If current tab have more than one QLineEdit, clear second QLineEdit
             if len(line_list) == 2:
-                line_edit.textChanged.connect(partial(self._clear_line_edit_add, line_list))
+                line_list[0].textChanged.connect(partial(self._clear_line_edit_add, line_list))
+            self.tab_widgets[tab_name] = (combo_list, line_list, chk_list)
 
-            value = tools_qt.get_text(self.dlg_search, line_edit, return_string_null=False)
-            if str(value) == '':
-                return
+        return self.tab_widgets[tab_name]
+
+
+    def _submit_search(self, function_name, body, context):
+        """ Execute @function_name in background, reusing previous results while waiting for the database """
+
+        key = (function_name, context['filter'], context['value'])
+        if key in self.search_cache:
+            self.search_cache.move_to_end(key)
+            self.search_worker.cancel()
+            self.search_context = None
+            self._show_search_result(function_name, context, self.search_cache[key])
+            return
+
+        # Narrowing a previous search: show its results filtered by the new text until the database answers
+        prefix_result = self._get_prefix_result(function_name, context['filter'], context['value'])
+        if prefix_result is not None:
+            self._show_search_result(function_name, context, prefix_result, preview=True)
+
+        context['function_name'] = function_name
+        context['request_id'] = self.search_worker.submit(function_name, body)
+        self.search_context = context
+
+
+    def _get_prefix_result(self, function_name, search_filter, value):
+        """ Get result of the longest cached text that is a prefix of @value, filtered by @value """
+
+        value = str(value).lower()
+        best = None
+        for (cached_function, cached_filter, cached_value), result in self.search_cache.items():
+            if cached_function != function_name or cached_filter != search_filter:
+                continue
+            cached_value = str(cached_value).lower()
+            if value.startswith(cached_value) and (best is None or len(cached_value) > len(best[0])):
+                best = (cached_value, result)
+
+        if best is None:
+            return None
+
+        result = dict(best[1])
+        result['data'] = [data for data in best[1]['data'] if value in str(data['display_name']).lower()] or {}
+        return result
 
-            qgis_project_add_schema = global_vars.project_vars['add_schema']
-            extras_search += f'"{line_edit.property("columnname")}":{{"text":"{value}"}}, '
-            extras_search += f'"addSchema":"{qgis_project_add_schema}"'
-            if chk_list:
-                chk_list = chk_list[0]
-                extras_search += f', "{chk_list.property("columnname")}":"{chk_list.isChecked()}"'
-            extras_search_add += f'"{line_edit.property("columnname")}":{{"text":"{value}"}}'
-            body = tools_gw.create_body(form=form_search, extras=extras_search)
-            result = tools_gw.execute_procedure('gw_fct_setsearch', body, rubber_band=self.rubber_band)
-            if not result or result['status'] == 'Failed':
-                return False
-
-            if result:
-                self.result_data = result
+
+    def _search_finished(self, request_id, function_name, sql, result):
+        """ Manage result of a search executed in background (executed in Qt main thread) """
+
+        context = self.search_context
+        if self.dlg_search is None or context is None or context['request_id'] != request_id:
+            return
+
+        self.search_context = None
+        if not result:
+            return
+
+        # All functions called from python should return 'status', if not, something has probably failed in postrgres
+        if 'status' not in result or result['status'] == 'Failed':
+            tools_gw.manage_json_exception(result, sql)
+            return
+
+        tools_gw.manage_json_response(result, sql, self.rubber_band)
+
+        self.search_cache[(function_name, context['filter'], context['value'])] = result
+        while len(self.search_cache) > self.search_cache_size:
+            self.search_cache.popitem(last=False)
+
+        self._show_search_result(function_name, context, result)
+
+
+    def _show_search_result(self, function_name, context, result, preview=False):
+        """ Populate completers with @result. If it is the result of gw_fct_setsearch, search second QLineEdit """
+
+        self.result_data = result
+        completer = context['completer']
+        model = context['model']
+        line_list = context['line_list']
+        display_list = [data['display_name'] for data in self.result_data['data']]
+
+        if function_name == 'gw_fct_setsearchadd':
+            tools_qt.set_completer_object(completer, model, line_list[1], sorted(display_list))
+            return
 
         # Set label visible
-        display_list = []
-        if result:
-            if self.result_data['data'] == {} and self.lbl_visible:
-                self.dlg_search.lbl_msg.setVisible(True)
-                if len(line_list) == 2:
-                    widget_add = line_list[1]
-                    widget_add.setReadOnly(True)
-                    widget_add.setStyleSheet("QLineEdit { background: rgb(242, 242, 242); color: rgb(100, 100, 100)}")
-            else:
-                self.lbl_visible = True
-                self.dlg_search.lbl_msg.setVisible(False)
-
-            # Get list of items from returned json from database and make a list for completer
-            for data in self.result_data['data']:
-                display_list.append(data['display_name'])
-            tools_qt.set_completer_object(completer, model, widget, sorted(display_list))
-
-        if len(line_list) == 2:
-            line_edit_add = line_list[1]
-            value = tools_qt.get_text(self.dlg_search, line_edit_add)
-            if str(value) in display_list:
-                if line_edit:
-                    line_edit.setText(value)
-                return
-            if str(value) == 'null':
-                return
+        if self.result_data['data'] == {} and self.lbl_visible:
+            self.dlg_search.lbl_msg.setVisible(True)
+            if len(line_list) == 2:
+                widget_add = line_list[1]
+                widget_add.setReadOnly(True)
+                widget_add.setStyleSheet("QLineEdit { background: rgb(242, 242, 242); color: rgb(100, 100, 100)}")
+        else:
+            self.lbl_visible = True
+            self.dlg_search.lbl_msg.setVisible(False)
+
+        # Get list of items from returned json from database and make a list for completer
+        tools_qt.set_completer_object(completer, model, context['widget'], sorted(display_list))
+
+        if preview or len(line_list) != 2:
+            return
+
+        line_edit_add = line_list[1]
+        value = tools_qt.get_text(self.dlg_search, line_edit_add)
+        if str(value) in display_list:
+            context['line_edit'].setText(value)
+            return
+        if str(value) == 'null':
+            return
 
-            extras_search_add += f', "{line_edit_add.property("columnname")}":{{"text":"{value}"}}'
-            body = tools_gw.create_body(form=form_search_add, extras=extras_search_add)
-            result = tools_gw.execute_procedure('gw_fct_setsearchadd', body, rubber_band=self.rubber_band)
-            if not result or result['status'] == 'Failed':
-                return False
-
-            self.result_data = result
-            if result is not None:
-                display_list = []
-                for data in self.result_data['data']:
-                    display_list.append(data['display_name'])
-                tools_qt.set_completer_object(completer, model, line_edit_add, sorted(display_list))
+        extras_search_add = f'{context["extras_search_add"]}, ' \
+                            f'"{line_edit_add.property("columnname")}":{{"text":"{value}"}}'
+        body = tools_gw.create_body(form=context['form_search_add'], extras=extras_search_add)
+        context_add = dict(context, filter=f"{context['filter']}|{context['value']}", value=value)
+        self._submit_search('gw_fct_setsearchadd', body, context_add)
 
 
     def _clear_line_edit_add(self, line_list):
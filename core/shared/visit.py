@@ -535,11 +535,6 @@ class GwVisit(QObject):
         # Load feature if in @table_name. Select list of related features
         # Set 'expr_filter' with features that are in the list
         if self.locked_feature_id:
-            expr_filter = f'"{self.feature_type}_id" IN (\'{self.locked_feature_id}\')'
-            (is_valid, expr) = tools_qt.check_expression_filter(expr_filter)
-            if not is_valid:
-                return
-
             # do selection allowing @table_name to be linked to canvas selectionChanged
             widget_name = f'tbl_visit_x_{self.feature_type}'
             widget_table = tools_qt.get_widget(self.dlg_add_visit, widget_name)
@@ -548,7 +543,7 @@ class GwVisit(QObject):
             tools_gw.connect_signal(global_vars.canvas.selectionChanged,
                                     partial(tools_gw.selection_changed, self, self.dlg_add_visit, widget_table, False),
                                     'visit', 'set_locked_relation_canvas_selectionChanged')
-            tools_qgis.select_features_by_ids(self.feature_type, expr, self.layers)
+            tools_qgis.select_features_by_list(self.feature_type, [self.locked_feature_id], self.layers)
             tools_qgis.disconnect_signal_selection_changed()
             tools_gw.disconnect_signal('visit')
 
@@ -1043,14 +1038,7 @@ class GwVisit(QObject):
         if not rows or not rows[0]:
             return
 
-        ids = [f"'{x[0]}'" for x in rows]
-
-        # Select list of related features
-        # Set 'expr_filter' with features that are in the list
-        expr_filter = f"{feature_type}_id IN ({','.join(ids)})"
-        (is_valid, expr) = tools_qt.check_expression_filter(expr_filter)  # @UnusedVariable
-        if not is_valid:
-            return
+        ids = [x[0] for x in rows]
 
         if widget_table is None:
             widget_name = f'tbl_visit_x_{feature_type}'
@@ -1062,7 +1050,8 @@ class GwVisit(QObject):
         tools_gw.connect_signal(global_vars.canvas.selectionChanged,
                                 partial(tools_gw.selection_changed, self, self.dlg_add_visit, widget_table, False),
                                 'visit', 'get_features_visit_feature_type_canvas_selectionChanged')
-        tools_qgis.select_features_by_ids(feature_type, expr, self.layers)
+        # Select list of related features
+        tools_qgis.select_features_by_list(feature_type, ids, self.layers)
         tools_qgis.disconnect_signal_selection_changed()
         tools_gw.disconnect_signal('visit')
 
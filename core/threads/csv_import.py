@@ -0,0 +1,248 @@
+"""
+This file is part of Giswater 3
+The program is free software: you can redistribute it and/or modify it under the terms of the GNU
+General Public License as published by the Free Software Foundation, either version 3 of the License,
+or (at your option) any later version.
+"""
+# -*- coding: utf-8 -*-
+import csv
+import io
+import json
+import os
+import re
+
+from .task import GwTask
+from ..utils import tools_gw
+from ... import global_vars
+from ...lib import tools_log, tools_qt, tools_db, tools_os, tools_qgis
+
+
+# Numbers written with decimal comma, optionally with dots as thousands separator (12 / 1,5 / -1.234.567,89)
+# Values with leading zeros (i.e. codes like 001,25) are not numbers
+_csv_decimal_comma = re.compile(r'^[+-]?(0|[1-9]\d{0,2}(\.\d{3})+|[1-9]\d*)(,\d+)?$')
+
+
+class GwCsvImportTask(GwTask):
+    """ Load a csv file into a temporal table and call the import function configured in config_csv """
+
+    def __init__(self, description, dialog, params):
+        """
+        :param params: Dictionary with keys 'path', 'unicode', 'delimiter', 'ignore_header', 'decimal_sep',
+                       'fid', 'label', 'function_name' and 'temp_tablename'
+        """
+
+        super().__init__(description)
+        self.dialog = dialog
+        self.params = params
+        self.fid = params['fid']
+        self.function_name = params['function_name']
+        self.temp_tablename = params['temp_tablename']
+        self.json_result = None
+        self.error_msg = None
+        self.body = None
+        self.csv_chunk_size = 10000
+        csv_import_copy = tools_gw.get_config_parser('system', 'csv_import_copy', 'user', 'init', False)
+        self.csv_import_copy = tools_os.set_boolean(csv_import_copy, True)
+
+
+    def run(self):
+
+        super().run()
+        self.setProgress(0)
+
+        # Rows are committed with the import function, so a cancelled task leaves the table untouched
+        sql = f"DELETE FROM {self.temp_tablename} WHERE fid = '{self.fid}' AND cur_user = current_user;"
+        if not tools_db.execute_sql(sql, commit=False, is_thread=True, aux_conn=self.aux_conn):
+            return False
+
+        try:
+            with open(self.params['path'], 'r', encoding=self.params['unicode']) as csv_file:
+                if self.csv_import_copy:
+                    tools_log.log_info(f"Task 'Import csv' execute function 'def _copy_csv_file'")
+                    status = self._copy_csv_file(csv_file)
+                else:
+                    tools_log.log_info(f"Task 'Import csv' execute function 'def _insert_csv_file'")
+                    status = self._insert_csv_file(csv_file)
+        except (OSError, UnicodeError, csv.Error) as e:
+            self.error_msg = str(e)
+            return False
+
+        if not status or self.isCanceled():
+            return False
+
+        extras = f'"importParam":"{self.params["label"]}"'
+        extras += f', "fid":"{self.fid}"'
+        self.body = tools_gw.create_body(extras=extras)
+        tools_log.log_info(f"Task 'Import csv' execute procedure '{self.function_name}' with parameters: "
+                           f"'{self.body}', 'aux_conn={self.aux_conn}', 'is_thread=True'")
+        self.json_result = tools_gw.execute_procedure(self.function_name, self.body, aux_conn=self.aux_conn,
+                                                      is_thread=True)
+        if self.isCanceled() or not self.json_result:
+            return False
+
+        self.setProgress(100)
+        return True
+
+
+    def finished(self, result):
+
+        super().finished(result)
+
+        try:
+            self.dialog.progressBar.setVisible(False)
+            self.dialog.btn_accept.setEnabled(True)
+        except RuntimeError:
+            # Dialog has been closed
+            return
+
+        if self.isCanceled():
+            return
+
+        if self.error_msg:
+            tools_qgis.show_warning(self.error_msg)
+            return
+
+        if self.json_result:
+            sql = f"SELECT {self.function_name}({self.body});"
+            tools_gw.manage_json_response(self.json_result, sql, None)
+            if self.json_result.get('status') == "Accepted":
+                tools_gw.fill_tab_log(self.dialog, self.json_result['body']['data'], close=False)
+            if 'message' in self.json_result:
+                msg = self.json_result['message']['text']
+                tools_qt.show_info_box(msg)
+        elif result is False and global_vars.session_vars['last_error'] is not None:
+            tools_qt.show_exception_message(msg=str(global_vars.session_vars['last_error']))
+
+
+    # region private functions
+
+    def _get_csv_rows(self, csv_file):
+        """ Read @csv_file and yield its rows
+        :return: Generator of tuples (list of values, characters read)
+        """
+
+        position = 0
+
+        def read_lines():
+            nonlocal position
+            for line in csv_file:
+                position += len(line)
+                yield line
+
+        ignore_header = self.params['ignore_header']
+        reader = csv.reader(read_lines(), delimiter=self.params['delimiter'])
+        for row in reader:
+            if ignore_header:
+                ignore_header = False
+                continue
+            values = [value.strip().replace("\n", "") for value in row]
+            yield [value if value else None for value in values], position
+
+
+    def _copy_csv_file(self, csv_file):
+        """ Load rows of @csv_file into table @temp_tablename using COPY in chunks of @csv_chunk_size rows """
+
+        file_size = max(os.path.getsize(self.params['path']), 1)
+        decimal_comma = self.params['decimal_sep'] == ','
+        comma_cols = set()
+        text_cols = set()
+        chunk = []
+        total_rows = 0
+        for values, position in self._get_csv_rows(csv_file):
+            if decimal_comma:
+                self._check_decimal_comma(values, comma_cols, text_cols)
+            chunk.append(values)
+            if len(chunk) < self.csv_chunk_size:
+                continue
+
+            if self.isCanceled() or not self._copy_csv_chunk(chunk):
+                return False
+            total_rows += len(chunk)
+            chunk = []
+            self.setProgress((position * 90) / file_size)
+
+        if self.isCanceled() or (chunk and not self._copy_csv_chunk(chunk)):
+            return False
+
+        total_rows += len(chunk)
+        if total_rows == 0:
+            self.error_msg = "Csv file has no rows to import"
+            return False
+
+        return self._convert_decimal_comma(sorted(comma_cols - text_cols))
+
+
+    def _check_decimal_comma(self, values, comma_cols, text_cols):
+        """ Add indexes of @values written as numbers with decimal comma to @comma_cols and the rest to @text_cols """
+
+        for x, value in enumerate(values):
+            if value is None or x in text_cols:
+                continue
+            if not _csv_decimal_comma.match(value):
+                text_cols.add(x)
+            elif ',' in value:
+                comma_cols.add(x)
+
+
+    def _convert_decimal_comma(self, columns):
+        """ Convert values of @columns (indexes) loaded into @temp_tablename to decimal point
+        Only columns where every value is a number are converted, so text columns are loaded untouched
+        """
+
+        if not columns:
+            return True
+
+        values = ", ".join([f"csv{x + 1} = replace(replace(csv{x + 1}, '.', ''), ',', '.')" for x in columns])
+        sql = (f"UPDATE {self.temp_tablename} SET {values} "
+               f"WHERE fid = '{self.fid}' AND cur_user = current_user;")
+        return tools_db.execute_sql(sql, commit=False, is_thread=True, aux_conn=self.aux_conn)
+
+
+    def _copy_csv_chunk(self, chunk):
+        """ Write @chunk (list of lists of values) into table @temp_tablename """
+
+        total_cols = max(len(values) for values in chunk)
+        if total_cols == 0:
+            return True
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for values in chunk:
+            writer.writerow([self.fid] + values + [None] * (total_cols - len(values)))
+        buffer.seek(0)
+
+        cols = ", ".join([f"csv{x + 1}" for x in range(0, total_cols)])
+        sql = f"COPY {self.temp_tablename} (fid, {cols}) FROM STDIN WITH (FORMAT csv)"
+        return tools_db.copy_expert(sql, buffer, commit=False, aux_conn=self.aux_conn, is_thread=True)
+
+
+    def _insert_csv_file(self, csv_file):
+        """ Send all rows of @csv_file as json to function gw_fct_setcsv """
+
+        file_size = max(os.path.getsize(self.params['path']), 1)
+        fields = []
+        for values, position in self._get_csv_rows(csv_file):
+            if self.isCanceled():
+                return False
+            field = {'fid': self.fid}
+            for x, value in enumerate(values):
+                field[f"csv{x + 1}"] = value
+            fields.append(field)
+            if len(fields) % 1000 == 0:
+                self.setProgress((position * 90) / file_size)
+
+        if not fields:
+            self.error_msg = "Csv file has no rows to import"
+            return False
+
+        decimal_sep = f'"{self.params["decimal_sep"]}"' if self.params['decimal_sep'] else "null"
+        values = f'"separator": {decimal_sep}, "values":{json.dumps(fields, ensure_ascii=False)}'
+        body = tools_gw.create_body(extras=values)
+        result = tools_gw.execute_procedure('gw_fct_setcsv', body, commit=False, aux_conn=self.aux_conn,
+                                            is_thread=True)
+        if result and 'status' in result and result['status'] == 'Accepted':
+            return True
+
+        return False
+
+    # endregion
@@ -5,6 +5,8 @@ General Public License as published by the Free Software Foundation, either vers
 or (at your option) any later version.
 """
 # -*- coding: utf-8 -*-
+import csv
+import io
 import json
 import os
 import re
@@ -14,9 +16,19 @@ from qgis.PyQt.QtCore import pyqtSignal
 
 from ..utils import tools_gw
 from ... import global_vars
-from ...lib import tools_log, tools_qt, tools_db, tools_qgis
+from ...lib import tools_log, tools_qt, tools_db, tools_qgis, tools_os
 from .task import GwTask
 
+# Compiled regular expressions used to tokenize RPT files and to find sections of INP files
+_rpt_negative_value = re.compile(r'[0-9][-]\d{1,2}[.]]*')
+_rpt_overlapped_value = re.compile(r'(\d\..*\.\d)')
+_rpt_time = re.compile('^([012]?[0-9]|2[0-3]):[0-5][0-9]:[0-5][0-9]$')
+_inp_section = re.compile(r'\[(.*?)\]')
+_inp_buffer_size = 1024 * 1024
+
+# Columns csv1..csv39 of temp_csv hold RPT values. Column csv40 holds the time of the section
+_rpt_max_values = 39
+
 
 class GwEpaFileManager(GwTask):
     """ This shows how to subclass QgsTask """
@@ -30,6 +42,7 @@ class GwEpaFileManager(GwTask):
         self.json_result = None
         self.rpt_result = None
         self.fid = 140
+        self.rpt_chunk_size = 10000
         self.function_name = None
         self.initialize_variables()
         self.set_variables_from_go2epa()
@@ -43,6 +56,7 @@ class GwEpaFileManager(GwTask):
         self.common_msg = ""
         self.function_failed = False
         self.complet_result = None
+        self.inp_in_db = False
 
 
     def set_variables_from_go2epa(self):
@@ -56,6 +70,10 @@ class GwEpaFileManager(GwTask):
         self.go2epa_execute_epa = self.go2epa.exec_epa
         self.go2epa_import_result = self.go2epa.import_result
         self.export_subcatch = self.go2epa.export_subcatch
+        rpt_import_copy = tools_gw.get_config_parser('system', 'rpt_import_copy', 'user', 'init', False)
+        self.rpt_import_copy = tools_os.set_boolean(rpt_import_copy, False)
+        inp_fetch_size = tools_gw.get_config_parser('system', 'inp_export_fetch_size', 'user', 'init', False)
+        self.inp_fetch_size = int(inp_fetch_size) if inp_fetch_size not in (None, 'None', '') else 0
 
 
     def run(self):
@@ -210,40 +228,35 @@ class GwEpaFileManager(GwTask):
             tools_log.log_info(f"Task 'Go2Epa' execute procedure 'gw_fct_pg2epa_main' step 1 with parameters: "
                                f"'gw_fct_pg2epa_main', '{self.body}', 'log_sql=True', 'aux_conn={self.aux_conn}', 'is_thread=True'")
 
-            json_result = tools_gw.execute_procedure('gw_fct_pg2epa_main', self.body, log_sql=True,
-                                                     aux_conn=self.aux_conn, is_thread=True)
+            json_result = self._execute_pg2epa_main()
             if self.isCanceled():
                 return False
             if json_result is not None:
                 self.body = tools_gw.create_body(extras=(extras + f', "step": 2'))
                 tools_log.log_info(f"Task 'Go2Epa' execute procedure 'gw_fct_pg2epa_main' step 2 with parameters: "
                                    f"'gw_fct_pg2epa_main', '{self.body}', 'log_sql=True', 'aux_conn={self.aux_conn}', 'is_thread=True'")
-                json_result = tools_gw.execute_procedure('gw_fct_pg2epa_main', self.body, log_sql=True,
-                                                         aux_conn=self.aux_conn, is_thread=True)
+                json_result = self._execute_pg2epa_main()
                 if self.isCanceled():
                     return False
                 if json_result is not None:
                     self.body = tools_gw.create_body(extras=(extras + f', "step": 3'))
                     tools_log.log_info(f"Task 'Go2Epa' execute procedure 'gw_fct_pg2epa_main' step 3 with parameters: "
                                        f"'gw_fct_pg2epa_main', '{self.body}', 'log_sql=True', 'aux_conn={self.aux_conn}', 'is_thread=True'")
-                    json_result = tools_gw.execute_procedure('gw_fct_pg2epa_main', self.body, log_sql=True,
-                                                             aux_conn=self.aux_conn, is_thread=True)
+                    json_result = self._execute_pg2epa_main()
                     if self.isCanceled():
                         return False
         elif steps == 2:
             self.body = tools_gw.create_body(extras=(extras + f', "step": 1'))
             tools_log.log_info(f"Task 'Go2Epa' execute procedure 'gw_fct_pg2epa_main' step 1 with parameters: "
                                f"'gw_fct_pg2epa_main', '{self.body}', 'log_sql=True', 'aux_conn={self.aux_conn}', 'is_thread=True'")
-            json_result = tools_gw.execute_procedure('gw_fct_pg2epa_main', self.body, log_sql=True,
-                                                     aux_conn=self.aux_conn, is_thread=True)
+            json_result = self._execute_pg2epa_main()
             if self.isCanceled():
                 return False
             if json_result is not None:
                 self.body = tools_gw.create_body(extras=(extras + f', "step": 3'))
                 tools_log.log_info(f"Task 'Go2Epa' execute procedure 'gw_fct_pg2epa_main' step 3 with parameters: "
                                    f"'gw_fct_pg2epa_main', '{self.body}', 'log_sql=True', 'aux_conn={self.aux_conn}', 'is_thread=True'")
-                json_result = tools_gw.execute_procedure('gw_fct_pg2epa_main', self.body, log_sql=True,
-                                                         aux_conn=self.aux_conn, is_thread=True)
+                json_result = self._execute_pg2epa_main()
                 if self.isCanceled():
                     return False
 
@@ -251,8 +264,7 @@ class GwEpaFileManager(GwTask):
             self.body = tools_gw.create_body(extras=(extras + f', "step": 3'))
             tools_log.log_info(f"Task 'Go2Epa' execute procedure 'gw_fct_pg2epa_main' step 3 with parameters: "
                                f"'gw_fct_pg2epa_main', '{self.body}', 'log_sql=True', 'aux_conn={self.aux_conn}', 'is_thread=True'")
-            json_result = tools_gw.execute_procedure('gw_fct_pg2epa_main', self.body, log_sql=True,
-                                                     aux_conn=self.aux_conn, is_thread=True)
+            json_result = self._execute_pg2epa_main()
             if self.isCanceled():
                 return False
         else:  # steps == 0
@@ -260,8 +272,7 @@ class GwEpaFileManager(GwTask):
             self.body = tools_gw.create_body(extras=extras)
             tools_log.log_info(f"Task 'Go2Epa' execute procedure 'gw_fct_pg2epa_main' step 0 with parameters: "
                                f"'gw_fct_pg2epa_main', '{self.body}', 'log_sql=True', 'aux_conn={self.aux_conn}', 'is_thread=True'")
-            json_result = tools_gw.execute_procedure('gw_fct_pg2epa_main', self.body, log_sql=True,
-                                                     aux_conn=self.aux_conn, is_thread=True)
+            json_result = self._execute_pg2epa_main()
             if self.isCanceled():
                 return False
 
@@ -289,16 +300,20 @@ class GwEpaFileManager(GwTask):
 
         tools_log.log_info(f"Export INP file into PostgreSQL")
 
-        # Get values from complet_result['body']['file'] and insert into INP file
-        if 'file' not in self.complet_result['body']:
-            return False
-
         if self.file_inp == "null":
             message = "You have to set this parameter"
             self.error_msg = f"{message}: INP file"
             return False
 
-        tools_log.log_info(f"Task 'Go2Epa' execute function 'def _fill_inp_file' with parameters: '{self.file_inp}', '{self.complet_result['body']['file']}'")
+        if self.inp_in_db:
+            return self._export_inp_from_cursor()
+
+        # Get values from complet_result['body']['file'] and insert into INP file
+        if 'file' not in self.complet_result['body']:
+            return False
+
+        tools_log.log_info(f"Task 'Go2Epa' execute function 'def _fill_inp_file' with parameters: '{self.file_inp}', "
+                           f"'{len(self.complet_result['body']['file'])} rows'")
         self._fill_inp_file(self.file_inp, self.complet_result['body']['file'])
         self.message = self.complet_result['message']['text']
         self.common_msg += "Export INP finished. "
@@ -306,52 +321,119 @@ class GwEpaFileManager(GwTask):
         return True
 
 
+    def _execute_pg2epa_main(self):
+        """ Call gw_fct_pg2epa_main with @body
+        If @inp_fetch_size is greater than 0, the result is kept in temporal table go2epa_result and returned without
+        body.file, so the INP rows are not sent to the client until _export_inp_from_cursor reads them
+        """
+
+        if self.inp_fetch_size <= 0 or not self.go2epa_export_inp:
+            return tools_gw.execute_procedure('gw_fct_pg2epa_main', self.body, log_sql=True, aux_conn=self.aux_conn,
+                                              is_thread=True)
+
+        self.inp_in_db = False
+        row = tools_db.check_function('gw_fct_pg2epa_main', aux_conn=self.aux_conn)
+        if row in (None, ''):
+            tools_log.log_warning("Function not found in database", parameter='gw_fct_pg2epa_main')
+            return None
+
+        sql = (f"DROP TABLE IF EXISTS go2epa_result; "
+               f"CREATE TEMP TABLE go2epa_result AS "
+               f"SELECT {global_vars.schema_name}.gw_fct_pg2epa_main({self.body}) AS result;")
+        if not tools_db.execute_sql(sql, log_sql=True, commit=False, is_thread=True, aux_conn=self.aux_conn):
+            global_vars.dao.rollback(self.aux_conn)
+            return None
+
+        sql = ("SELECT (result::jsonb #- '{body,file}')::json, json_typeof(result->'body'->'file') = 'array' "
+               "FROM go2epa_result;")
+        row = tools_db.get_row(sql, commit=True, aux_conn=self.aux_conn)
+        if not row or not row[0]:
+            tools_log.log_warning(f"Function error: gw_fct_pg2epa_main")
+            return None
+
+        json_result = row[0]
+        self.inp_in_db = bool(row[1])
+        if 'status' not in json_result or json_result['status'] == 'Failed':
+            tools_gw.manage_json_exception(json_result, is_thread=True)
+
+        return json_result
+
+
+    def _export_inp_from_cursor(self):
+        """ Write INP file reading body.file of go2epa_result with a server-side cursor that fetches @inp_fetch_size
+        rows at a time, so client memory doesn't depend on network size
+        """
+
+        sql = ("SELECT f.value->>'text' "
+               "FROM go2epa_result, json_array_elements(result->'body'->'file') WITH ORDINALITY AS f(value, idx) "
+               "ORDER BY f.idx")
+        tools_log.log_info(f"Task 'Go2Epa' execute function 'def _fill_inp_file' with parameters: '{self.file_inp}', "
+                           f"'server-side cursor ({self.inp_fetch_size} rows per fetch)'")
+        rows = tools_db.get_rows_iter(sql, self.inp_fetch_size, aux_conn=self.aux_conn)
+        try:
+            self._fill_inp_file(self.file_inp, ({'text': row[0]} for row in rows))
+        except Exception as e:
+            self.error_msg = f"Error reading INP rows from database: {e}"
+            return False
+        finally:
+            rows.close()
+            tools_db.execute_sql("DROP TABLE IF EXISTS go2epa_result;", is_thread=True, aux_conn=self.aux_conn)
+            self.inp_in_db = False
+
+        self.message = self.complet_result['message']['text']
+        self.common_msg += "Export INP finished. "
+
+        return True
+
+
     def _fill_inp_file(self, folder_path=None, all_rows=None):
+        """ Write INP file (and GUL file in UD network mode 2) in a single pass over @all_rows
+        :param all_rows: Iterable of rows (dict with key 'text'). It can be a list or a generator
+        """
 
         tools_log.log_info(f"Write inp file........: {folder_path}")
 
-        # Generate generic INP file
-        file_inp = open(folder_path, "w")
-        read = True
+        # Sections not written into generic INP file but into aditional GUL file
+        gul_sections = ('GULLY', 'LINK', 'GRATE', 'LXSECTIONS')
+        write_gul = global_vars.project_type == 'ud' and \
+            f"{tools_gw.get_config_value('inp_options_networkmode')[0]}" == "2"
+
+        # Generic INP file (everyone except GULLY) and GUL file (only TITLE and aditional targets)
+        file_inp = open(folder_path, "w", buffering=_inp_buffer_size)
+        aditional_path = folder_path.replace('.inp', f'.gul')
+        aditional_file = open(aditional_path, "w", buffering=_inp_buffer_size) if write_gul else None
+        read_inp = True
+        read_gul = True
+        save_file = False
+        sections = {}
         for row in all_rows:
-            # Use regexp to check which targets to read (everyone except GULLY)
-            if bool(re.match('\[(.*?)\]', row['text'])) and \
-                    ('GULLY' in row['text'] or 'LINK' in row['text'] or
-                     'GRATE' in row['text'] or 'LXSECTIONS' in row['text']):
-                read = False
-            elif bool(re.match('\[(.*?)\]', row['text'])):
-                read = True
-            if 'text' in row and row['text'] is not None and read:
-                line = row['text'].rstrip() + "\n"
-                file_inp.write(line)
-
-        self._close_file(file_inp)
+            text = row['text'] if 'text' in row else None
+            if text is None:
+                continue
 
-        if global_vars.project_type == 'ud' and f"{tools_gw.get_config_value('inp_options_networkmode')[0]}" == "2":
-
-
-            # Replace extension .inp
-            aditional_path = folder_path.replace('.inp', f'.gul')
-            aditional_file = open(aditional_path, "w")
-            read = True
-            save_file = False
-            for row in all_rows:
-                # Use regexp to check which targets to read (only TITLE and aditional target)
-                if bool(re.match('\[(.*?)\]', row['text'])) and \
-                        ('TITLE' in row['text'] or 'GULLY' in row['text'] or 'LINK' in row['text'] or
-                         'GRATE' in row['text'] or 'LXSECTIONS' in row['text']):
-                    read = True
-                    if 'GULLY' in row['text'] or 'LINK' in row['text'] or \
-                       'GRATE' in row['text'] or 'LXSECTIONS' in row['text']:
-                        save_file = True
-                elif bool(re.match('\[(.*?)\]', row['text'])):
-                    read = False
-                if 'text' in row and row['text'] is not None and read:
-                    line = row['text'].rstrip() + "\n"
+            # Use regexp to check which targets to read. Evaluate it only once per section
+            if text.startswith('['):
+                if text not in sections:
+                    is_section = bool(_inp_section.match(text))
+                    is_gul = is_section and any(section in text for section in gul_sections)
+                    sections[text] = (is_section, is_gul, is_section and 'TITLE' in text)
+                is_section, is_gul, is_title = sections[text]
+                if is_section:
+                    read_inp = not is_gul
+                    read_gul = is_gul or is_title
+                    save_file = save_file or is_gul
+
+            if read_inp or (read_gul and aditional_file):
+                line = text.rstrip() + "\n"
+                if read_inp:
+                    file_inp.write(line)
+                if read_gul and aditional_file:
                     aditional_file.write(line)
 
-            self._close_file(aditional_file)
+        self._close_file(file_inp)
 
+        if aditional_file:
+            self._close_file(aditional_file)
             if save_file is False:
                 os.remove(aditional_path)
 
@@ -407,8 +489,12 @@ class GwEpaFileManager(GwTask):
         status = False
         try:
             # Call import function
-            tools_log.log_info(f"Task 'Go2Epa' execute function 'def _read_rpt_file' with parameters: '{self.file_rpt}'")
-            status = self._read_rpt_file(self.file_rpt)
+            if self.rpt_import_copy:
+                tools_log.log_info(f"Task 'Go2Epa' execute function 'def _copy_rpt_file' with parameters: '{self.file_rpt}'")
+                status = self._copy_rpt_file(self.file_rpt)
+            else:
+                tools_log.log_info(f"Task 'Go2Epa' execute function 'def _read_rpt_file' with parameters: '{self.file_rpt}'")
+                status = self._read_rpt_file(self.file_rpt)
             if not status:
                 return False
             tools_log.log_info(f"Task 'Go2Epa' execute function 'def _exec_import_function'")
@@ -420,12 +506,121 @@ class GwEpaFileManager(GwTask):
 
 
     def _read_rpt_file(self, file_path=None):
+        """ Read rows of RPT file into @json_rpt, the json array sent to gw_fct_rpt2pg_main
+        Rows are streamed from the file, but gw_fct_rpt2pg_main receives the whole file as one parameter, so memory
+        grows with the size of the file. Set rpt_import_copy to load big files into temp_csv in chunks instead
+        """
+
+        self.file_rpt = open(file_path, "r")
+        file_size = max(os.path.getsize(file_path), 1)
+        sources = self._get_rpt_sources()
+
+        # Write elements straight into one buffer to avoid keeping a list of them besides the joined string
+        json_rpt = io.StringIO()
+        json_rpt.write('[')
+        total_rows = 0
+        try:
+            for target, col40, values, position in self._get_rpt_rows(self.file_rpt, sources):
+
+                if self.isCanceled():
+                    return False
+
+                json_elem = f'"target": "{target}", "col40": "{col40}"'
+                for x, value in enumerate(values):
+                    if "''" not in value:
+                        json_elem += f', "col{x + 1}":"' + value.strip().replace("\n", "") + '"'
+                    else:
+                        json_elem += f', "col{x + 1}":null'
+                if total_rows > 0:
+                    json_rpt.write(', ')
+                json_rpt.write('{' + json_elem + '}')
+                total_rows += 1
+
+                # Update progress bar
+                if total_rows % 1000 == 0:
+                    self.setProgress((position * 100) / file_size)
+        except ValueError as e:
+            self.error_msg = str(e)
+            return False
+
+        # Manage JSON
+        json_rpt.write(']')
+        self.json_rpt = json_rpt.getvalue()
+        json_rpt.close()
+
+        self._close_file()
+
+        return True
+
 
-        self.file_rpt = open(file_path, "r+")
-        full_file = self.file_rpt.readlines()
-        progress = 0
+    def _copy_rpt_file(self, file_path=None):
+        """ Load rows of RPT file into table temp_csv using COPY in chunks of @rpt_chunk_size rows """
+
+        self.file_rpt = open(file_path, "r")
+        file_size = max(os.path.getsize(file_path), 1)
+        sources = self._get_rpt_sources()
+
+        # Rows are committed with gw_fct_rpt2pg_main, so a cancelled task leaves the table untouched
+        sql = f"DELETE FROM temp_csv WHERE fid = {self.fid} AND cur_user = current_user;"
+        if not tools_db.execute_sql(sql, commit=False, is_thread=True, aux_conn=self.aux_conn):
+            return False
+
+        chunk = []
+        try:
+            for target, col40, values, position in self._get_rpt_rows(self.file_rpt, sources):
+                chunk.append((target, col40, values))
+                if len(chunk) < self.rpt_chunk_size:
+                    continue
+
+                if self.isCanceled() or not self._copy_rpt_chunk(chunk):
+                    return False
+                chunk = []
+                self.setProgress((position * 100) / file_size)
+        except ValueError as e:
+            self.error_msg = str(e)
+            return False
+
+        if self.isCanceled() or (chunk and not self._copy_rpt_chunk(chunk)):
+            return False
+
+        self._close_file()
+
+        return True
+
+
+    def _copy_rpt_chunk(self, chunk):
+        """ Write @chunk (list of tuples (target, col40, list of values)) into table temp_csv """
+
+        total_cols = min(max(len(values) for target, col40, values in chunk), _rpt_max_values)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for target, col40, values in chunk:
+            if len(values) > _rpt_max_values:
+                tools_log.log_warning(f"RPT row with more than {_rpt_max_values} values truncated: {values}")
+                values = values[:_rpt_max_values]
+            # @target and @col40 are SQL literals (quoted strings or null) used by the json import
+            row = [self.fid, self._get_rpt_literal_value(target), self._get_rpt_literal_value(col40)]
+            row.extend([None if "''" in value else value.strip() for value in values])
+            row.extend([None] * (total_cols - len(values)))
+            writer.writerow(row)
+        buffer.seek(0)
+
+        cols = ", ".join([f"csv{x + 1}" for x in range(0, total_cols)])
+        sql = f"COPY temp_csv (fid, source, csv40, {cols}) FROM STDIN WITH (FORMAT csv)"
+        return tools_db.copy_expert(sql, buffer, commit=False, aux_conn=self.aux_conn, is_thread=True)
+
+
+    def _get_rpt_literal_value(self, literal):
+        """ Get value of SQL @literal ("null" or a quoted string) to be written by COPY """
+
+        if literal == "null":
+            return None
+        return literal.strip("'")
+
+
+    def _get_rpt_sources(self):
+        """ Get dictionary with the section titles of RPT file as keys and their target tables as values """
 
-        # Create dict with sources
         sql = f"SELECT tablename, target FROM config_fprocess WHERE fid = {self.fid};"
         rows = tools_db.get_rows(sql)
         sources = {}
@@ -435,110 +630,74 @@ class GwEpaFileManager(GwTask):
             for i in item:
                 sources[i.strip()] = row[0].strip()
 
+        return sources
+
+
+    def _get_rpt_rows(self, file, sources):
+        """ Read RPT @file line by line and yield its rows
+        :param sources: Dictionary with the section titles as keys and the target tables as values
+        :return: Generator of tuples (target, col40, list of values, characters read)
+        """
+
+        # Resolve matches of sections in the same order they were defined in @sources
+        source_order = {k: i for i, k in enumerate(sources)}
+
         # While we don't find a match with the target, target and col40 must be null
         target = "null"
         col40 = "null"
-        json_rpt = ""
-        # noinspection PyUnusedLocal
-        row_count = sum(1 for rows in full_file)
+        position = 0
+        for line_number, row in enumerate(file):
 
-        for line_number, row in enumerate(full_file):
-
-            if self.isCanceled():
-                return False
-
-            progress += 1
+            position += len(row)
             if '**' in row or '--' in row:
                 continue
 
-            row = row.rstrip()
-            dirty_list = row.split(' ')
-
-            # Clean unused items
-            for x in range(len(dirty_list) - 1, -1, -1):
-                if dirty_list[x] == '':
-                    dirty_list.pop(x)
+            dirty_list = [item for item in row.rstrip().split(' ') if item != '']
 
             sp_n = []
-            if len(dirty_list) > 0:
-                for x in range(0, len(dirty_list)):
-                    if bool(re.search('[0-9][-]\d{1,2}[.]]*', str(dirty_list[x]))):
-                        last_index = 0
-                        for i, c in enumerate(dirty_list[x]):
-                            if "-" == c:
-                                json_elem = dirty_list[x][last_index:i]
-                                last_index = i
-                                sp_n.append(json_elem)
-
-                        # noinspection PyUnboundLocalVariable
-                        json_elem = dirty_list[x][last_index:i]
-                        sp_n.append(json_elem)
-
-                    elif bool(re.search('(\d\..*\.\d)', str(dirty_list[x]))):
-                        if 'Version' not in dirty_list and 'VERSION' not in dirty_list:
-                            error_near = f"Error near line {line_number+1} -> {dirty_list}"
-                            tools_log.log_info(error_near)
-                            message = (f"The rpt file is not valid to import. "
-                                       f"Because columns on rpt file are overlaped, it seems you need to improve your simulation. "
-                                       f"Please ckeck and fix it before continue. \n"
-                                       f"{error_near}")
-                            self.error_msg = message
-                            return False
-                    elif bool(re.search('>50', str(dirty_list[x]))):
+            for item in dirty_list:
+                if '-' in item and _rpt_negative_value.search(item):
+                    last_index = 0
+                    for i, c in enumerate(item):
+                        if "-" == c:
+                            sp_n.append(item[last_index:i])
+                            last_index = i
+                    sp_n.append(item[last_index:len(item) - 1])
+
+                elif item.count('.') > 1 and _rpt_overlapped_value.search(item):
+                    if 'Version' not in dirty_list and 'VERSION' not in dirty_list:
                         error_near = f"Error near line {line_number+1} -> {dirty_list}"
                         tools_log.log_info(error_near)
-                        message = (f"The rpt file is not valid to import. "
-                                   f"Because velocity has not numeric value (>50), it seems you need to improve your simulation. "
-                                   f"Please ckeck and fix it before continue. \n"
-                                   f"{error_near}")
-                        self.error_msg = message
-                        return False
-                    else:
-                        sp_n.append(dirty_list[x])
+                        raise ValueError(f"The rpt file is not valid to import. "
+                                         f"Because columns on rpt file are overlaped, it seems you need to improve your simulation. "
+                                         f"Please ckeck and fix it before continue. \n"
+                                         f"{error_near}")
+                elif '>50' in item:
+                    error_near = f"Error near line {line_number+1} -> {dirty_list}"
+                    tools_log.log_info(error_near)
+                    raise ValueError(f"The rpt file is not valid to import. "
+                                     f"Because velocity has not numeric value (>50), it seems you need to improve your simulation. "
+                                     f"Please ckeck and fix it before continue. \n"
+                                     f"{error_near}")
+                else:
+                    sp_n.append(item)
 
             # Find strings into dict and set target column
-            for k, v in sources.items():
-                try:
-                    if k in (f'{sp_n[0]} {sp_n[1]}', f'{sp_n[0]}'):
-                        target = "'" + v + "'"
-                        _time = re.compile('^([012]?[0-9]|2[0-3]):[0-5][0-9]:[0-5][0-9]$')
-                        if _time.search(sp_n[3]):
-                            col40 = "'" + sp_n[3] + "'"
-                except IndexError:
-                    pass
-                except Exception as e:
-                    tools_log.log_info(type(e).__name__)
+            if len(sp_n) > 1:
+                keys = [k for k in (f'{sp_n[0]} {sp_n[1]}', sp_n[0]) if k in source_order]
+                if keys:
+                    target = "'" + sources[max(keys, key=source_order.get)] + "'"
+                    if len(sp_n) > 3 and _rpt_time.search(sp_n[3]):
+                        col40 = "'" + sp_n[3] + "'"
 
             if len(sp_n) > 0:
-                json_elem = f'"target": "{target}", "col40": "{col40}", '
-                for x in range(0, len(sp_n)):
-                    json_elem += f'"col{x + 1}":'
-                    if "''" not in sp_n[x]:
-                        value = '"' + sp_n[x].strip().replace("\n", "") + '", '
-                        value = value.replace("''", "null")
-                    else:
-                        value = 'null, '
-                    json_elem += value
-
-                json_elem = '{' + str(json_elem[:-2]) + '}, '
-                json_rpt += json_elem
-
-            # Update progress bar
-            if progress % 1000 == 0:
-                self.setProgress((line_number * 100) / row_count)
-
-        # Manage JSON
-        json_rpt = '[' + str(json_rpt[:-2]) + ']'
-        self.json_rpt = json_rpt
-
-        self._close_file()
-
-        return True
+                yield target, col40, sp_n, position
 
 
     def _exec_import_function(self):
         """ Call function gw_fct_rpt2pg_main """
 
+        # If rpt file has been loaded into temp_csv (rpt_import_copy) it is not sent as parameter
         extras = f'"resultId":"{self.result_name}"'
         if self.json_rpt:
             extras += f', "file": {self.json_rpt}'
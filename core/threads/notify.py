@@ -6,6 +6,8 @@ or (at your option) any later version.
 """
 # -*- coding: utf-8 -*-
 import json
+import select
+import socket
 import threading
 from collections import OrderedDict
 
@@ -13,26 +15,31 @@ from qgis.PyQt.QtCore import pyqtSignal, QObject
 
 from ..utils import tools_backend_calls
 from ... import global_vars
-from ...lib import tools_log, tools_db, tools_os
+from ...lib import tools_log, tools_os
 from ..utils import tools_gw
 
 
 class GwNotify(QObject):
 
-    # :var conn_failed:
-    # some times, when user click so fast 2 actions, LISTEN channel is stopped, and we need to re-LISTEN all channels
     # Notify cannot use 'iface', directly or indirectly or open dialogs
-    conn_failed = False
+    # Notifications are received in a dedicated connection by a single thread and processed in Qt main thread
+    # The connection belongs to the listener thread: only that thread uses it and closes it
     list_channels = None
     log_sql = None
+    poll_timeout = 5                        # Seconds waiting on the socket before checking if listener must stop
     task_start = pyqtSignal()
     task_finished = pyqtSignal()
+    notifies_received = pyqtSignal(list)
 
 
     def __init__(self):
         """ Class to control notify from PostgresSql """
 
         QObject.__init__(self)
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.wakeup = None                  # Socket written to wake up listener thread when it must stop
+        self.notifies_received.connect(self._process_notifies)
 
 
     def start_listening(self, list_channels=None):
@@ -43,11 +50,23 @@ class GwNotify(QObject):
         tools_log.log_info("Notifiy started")
         if list_channels:
             self.list_channels = list_channels
-        for channel_name in self.list_channels:
-            tools_db.execute_sql(f'LISTEN "{channel_name}";')
 
-        thread = threading.Thread(target=self._wait_notifications)
-        thread.start()
+        # Check parameter 'log_sql' only once
+        log_sql = tools_gw.get_config_parser("log", f"log_sql", "user", "init", False, get_none=True)
+        self.log_sql = tools_os.set_boolean(log_sql, False)
+
+        # Stop previous listener (if any) and start a new one
+        self._stop_thread()
+        list_channels = list(self.list_channels or [])
+        conn = self._connect(list_channels)
+        if conn is None:
+            return
+
+        self.stop_event = threading.Event()
+        self.wakeup, wakeup_read = socket.socketpair()
+        self.thread = threading.Thread(target=self._wait_notifications,
+                                       args=(conn, list_channels, self.stop_event, wakeup_read), daemon=True)
+        self.thread.start()
 
 
     def task_stopped(self, task):
@@ -84,61 +103,121 @@ class GwNotify(QObject):
         tools_log.log_info("Notifiy stopped")
         if list_channels:
             self.list_channels = list_channels
-        for channel_name in self.list_channels:
-            tools_db.execute_sql(f'UNLISTEN "{channel_name}";')
+        # Closing the listener connection ends its LISTEN on every channel
+        self._stop_thread()
 
 
     # region private functions
 
-    def _wait_notifications(self):
+    def _connect(self, list_channels):
+        """ Open a listener connection and LISTEN all @list_channels. Return the connection or None """
+
+        if global_vars.dao is None:
+            return None
+        conn = global_vars.dao.get_listen_conn()
+        if conn is None:
+            tools_log.log_warning("Notify connection error", parameter=global_vars.dao.last_error)
+            return None
 
         try:
-            if self.conn_failed:
-                for channel_name in self.list_channels:
-                    tools_db.execute_sql(f'LISTEN "{channel_name}";')
-
-                self.conn_failed = False
-
-            # Check if any notification to process
-            dao = global_vars.dao
-            status = dao.get_poll()
-
-            # If connection has been restarted then reset notify
-            if not status:
-                self.start_listening()
-                tools_log.log_info(f"PostgreSQL PID: {global_vars.dao.pid}")
-
-            executed_notifies = []
-            while dao.conn.notifies:
-                # We take the poll of notifies, from this we take the last one, if it is not in the list, we put it in
-                # the list and execute it. If there is one like it in the executed list, it means that of all those that
-                # were in the initial poll we have executed the last one and we do not want to execute the previous ones
-                notify = dao.conn.notifies.pop()
-                if notify in executed_notifies:
-                    continue
-                executed_notifies.append(notify)
+            cursor = conn.cursor()
+            for channel_name in list_channels:
+                cursor.execute(f'LISTEN "{channel_name}";')
+            cursor.close()
+        except Exception as e:
+            tools_log.log_warning("Notify LISTEN error", parameter=e)
+            self._close_conn(conn)
+            return None
 
-                # Check parameter 'log_sql'
-                log_sql = tools_gw.get_config_parser("log", f"log_sql", "user", "init", False, get_none=True)
-                self.log_sql = tools_os.set_boolean(log_sql, False)
+        tools_log.log_info(f"PostgreSQL notify PID: {conn.get_backend_pid()}")
+        return conn
 
-                if self.log_sql:
-                    msg = f'<font color="blue"><b>GOT SERVER NOTIFY: </font>'
-                    msg += f'<font color="black"><b>{notify.pid}, {notify.channel}, {notify.payload} </font>'
-                    tools_log.log_info(msg, tab_name="Giswater Notify")
 
+    def _close_conn(self, conn):
+
+        try:
+            if conn:
+                conn.close()
+        except Exception:
+            pass
+
+
+    def _stop_thread(self):
+        """ Ask listener thread to finish and wait for it, so that it never overlaps with a new one """
+
+        self.stop_event.set()
+        if self.wakeup is not None:
+            try:
+                self.wakeup.send(b'\0')
+                self.wakeup.close()
+            except Exception:
+                pass
+            self.wakeup = None
+        if self.thread is not None and self.thread.is_alive():
+            self.thread.join(self.poll_timeout)
+            if self.thread.is_alive():
+                tools_log.log_warning("Notify listener thread didn't stop in time")
+        self.thread = None
+
+
+    def _wait_notifications(self, conn, list_channels, stop_event, wakeup):
+        """ Wait on the socket of listener connection @conn and send received notifies to Qt main thread
+        :param wakeup: Socket that becomes readable when the listener must stop
+        """
+
+        try:
+            while not stop_event.is_set():
                 try:
-                    complet_result = json.loads(notify.payload, object_pairs_hook=OrderedDict)
-                    self._execute_functions(complet_result)
-                except Exception:
-                    pass
+                    if conn is None:
+                        raise ConnectionError("not connected")
+                    readable, writable, errors = select.select([conn, wakeup], [], [], self.poll_timeout)
+                    if stop_event.is_set():
+                        break
+                    if not readable:
+                        continue
+                    conn.poll()
+                except Exception as e:
+                    # Connection lost: reconnect and LISTEN all channels again
+                    if stop_event.is_set():
+                        break
+                    tools_log.log_info(f"Notify connection lost: {e}")
+                    self._close_conn(conn)
+                    conn = None
+                    if stop_event.wait(self.poll_timeout):
+                        break
+                    conn = self._connect(list_channels)
+                    continue
+
+                notifies = conn.notifies[:]
+                del conn.notifies[:]
+                if notifies:
+                    self.notifies_received.emit(notifies)
+        finally:
+            self._close_conn(conn)
+            wakeup.close()
+
+
+    def _process_notifies(self, notifies):
+        """ Execute received @notifies. Duplicated notifies of the same channel are executed only once """
+
+        # Keep only the last one of the identical notifies, in the order they were received
+        pending = OrderedDict()
+        for notify in notifies:
+            key = (notify.channel, notify.payload)
+            pending.pop(key, None)
+            pending[key] = notify
 
-            # Initialize thread
-            thread = threading.Timer(interval=1, function=self._wait_notifications)
-            thread.start()
+        for notify in pending.values():
+            if self.log_sql:
+                msg = f'<font color="blue"><b>GOT SERVER NOTIFY: </font>'
+                msg += f'<font color="black"><b>{notify.pid}, {notify.channel}, {notify.payload} </font>'
+                tools_log.log_info(msg, tab_name="Giswater Notify")
 
-        except AttributeError:
-            self.conn_failed = True
+            try:
+                complet_result = json.loads(notify.payload, object_pairs_hook=OrderedDict)
+                self._execute_functions(complet_result)
+            except Exception:
+                pass
 
 
     def _execute_functions(self, complet_result):
@@ -170,4 +249,4 @@ class GwNotify(QObject):
         global_vars.session_vars['threads'].remove(self)
         self.task_finished.emit()
 
-    # endregion
\ No newline at end of file
+    # endregion
@@ -0,0 +1,109 @@
+"""
+This file is part of Giswater 3
+The program is free software: you can redistribute it and/or modify it under the terms of the GNU
+General Public License as published by the Free Software Foundation, either version 3 of the License,
+or (at your option) any later version.
+"""
+# -*- coding: utf-8 -*-
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from qgis.core import QgsTask
+
+from .task import GwTask
+from ...lib import tools_log
+
+
+class GwProfileImageTask(GwTask):
+    """ Save images of a profile in background. Each image is rendered into its own standalone Agg figure,
+        so pyplot (used by the interactive profile in the UI thread) is never touched by the task.
+        Sheets of long profiles are rendered in parallel by up to @max_workers threads
+    """
+
+    max_workers = min(4, os.cpu_count() or 1)
+
+    def __init__(self, description, render_function, images, fig_size, dpi):
+        """
+        :param render_function: Function (axes, x_range=, y_range=) that draws the profile into @axes
+        :param images: List of tuples (img_path, x_range, y_range). Ranges are None to save the whole profile
+        """
+
+        super().__init__(description)
+        self.render_function = render_function
+        self.images = images
+        self.fig_size = fig_size
+        self.dpi = dpi
+        self.saved_paths = []
+        self.error_msg = None
+
+
+    def run(self):
+
+        super().run()
+        self.setProgress(0)
+        if len(self.images) == 1 or self.max_workers <= 1:
+            for img_path, x_range, y_range in self.images:
+                if not self._save_image(img_path, x_range, y_range):
+                    return False
+                self.saved_paths.append(img_path)
+                self.setProgress(len(self.saved_paths) * 100 / len(self.images))
+            return True
+
+        status = True
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(self.images))) as executor:
+            futures = {executor.submit(self._save_image, *image): image[0] for image in self.images}
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                if not future.result():
+                    status = False
+                    for pending in futures:
+                        pending.cancel()
+                    continue
+                self.saved_paths.append(futures[future])
+                self.setProgress(len(self.saved_paths) * 100 / len(self.images))
+
+        return status
+
+
+    def cancel(self):
+
+        # Task doesn't execute any query, so there is nothing to cancel in the database
+        tools_log.log_info(f"Task '{self.description()}' was cancelled")
+        QgsTask.cancel(self)
+
+
+    def finished(self, result):
+
+        super().finished(result)
+        if self.error_msg:
+            tools_log.log_warning(self.error_msg)
+        for img_path in self.saved_paths:
+            tools_log.log_info(f"Profile image saved: {img_path}")
+
+
+    # region private functions
+
+    def _save_image(self, img_path, x_range=None, y_range=None):
+        """ Render profile into a new figure and save it into @img_path """
+
+        if self.isCanceled():
+            return False
+        try:
+            figure = Figure(figsize=self.fig_size)
+            FigureCanvasAgg(figure)
+            axes = figure.add_subplot(111)
+            self.render_function(axes, x_range=x_range, y_range=y_range)
+            axes.set_axis_off()
+            figure.tight_layout()
+            figure.patch.set_facecolor('white')
+            figure.savefig(img_path, dpi=self.dpi)
+        except Exception as e:
+            self.error_msg = f"Error saving profile image {img_path}: {e}"
+            return False
+
+        return True
+
+    # endregion
@@ -5,14 +5,23 @@ General Public License as published by the Free Software Foundation, either vers
 or (at your option) any later version.
 """
 # -*- coding: utf-8 -*-
-from qgis.PyQt.QtCore import pyqtSignal
+import json
+import os
+import re
+
+from qgis.PyQt.QtCore import pyqtSignal, QSettings, QLocale
 from qgis.core import QgsEditorWidgetSetup, QgsFieldConstraints
 
 from .task import GwTask
 from ..utils import tools_gw
+from ... import global_vars
 from ...lib import tools_log, tools_qgis, tools_qt, tools_db
 
 
+# Relations read by the queries of combos (config_form_fields.dv_querytext)
+_querytext_tables = re.compile(r'\b(?:from|join)\s+((?:"?\w+"?\.)?"?\w+"?)', re.IGNORECASE)
+
+
 class GwProjectLayersConfig(GwTask):
     """ This shows how to subclass QgsTask """
 
@@ -28,6 +37,11 @@ class GwProjectLayersConfig(GwTask):
         self.schema_name = params['schema_name']
         self.qgis_project_infotype = params['qgis_project_infotype']
         self.db_layers = params['db_layers']
+        self.batch_size = params.get('batch_size', 50)
+        self.project_version = params.get('project_version')
+        self.use_cache = params.get('use_cache', False)
+        self.cache_cursor = None
+        self.cache_tokens = {}
         self.body = None
         self.json_result = None
         self.vr_errors = None
@@ -42,6 +56,7 @@ class GwProjectLayersConfig(GwTask):
         self.vr_missing = set()
         self._get_layers_to_config()
         self._set_layer_config(self.available_layers)
+        self._close_cache()
         self.setProgress(100)
 
         return True
@@ -124,138 +139,65 @@ class GwProjectLayersConfig(GwTask):
 
         msg_failed = ""
         msg_key = ""
+
+        # Keep only layers loaded in the project
+        layers = [(layer_name, tools_qgis.get_layer_by_tablename(layer_name)) for layer_name in layers]
+        layers = [(layer_name, layer) for layer_name, layer in layers if layer]
         total_layers = len(layers)
         layer_number = 0
-        for layer_name in layers:
+
+        # Apply configuration stored in cache for layers not modified in database since last time
+        cached_config = self._get_cached_config()
+        pending_layers = []
+        for layer_name, layer in layers:
 
             if self.isCanceled():
                 return False
 
-            layer = tools_qgis.get_layer_by_tablename(layer_name)
-            if not layer:
+            if layer_name not in cached_config:
+                pending_layers.append((layer_name, layer))
                 continue
 
             layer_number = layer_number + 1
             self.setProgress((layer_number * 100) / total_layers)
+            self._set_fields_config(layer, layer_name, cached_config[layer_name])
 
-            feature = f'"tableName":"{layer_name}", "isLayer":true'
-            self.body = tools_gw.create_body(feature=feature)
-            self.json_result = tools_gw.execute_procedure('gw_fct_getinfofromid', self.body, aux_conn=self.aux_conn,
-                                                          is_thread=True, check_function=False)
-            if not self.json_result:
-                continue
-            if 'status' not in self.json_result:
-                continue
-            if self.json_result['status'] == 'Failed':
-                continue
-            if 'body' not in self.json_result:
-                tools_log.log_info("Not 'body'")
-                continue
-            if 'data' not in self.json_result['body']:
-                tools_log.log_info("Not 'data'")
-                continue
+        # Request configuration of @batch_size layers in every database call
+        for batch_start in range(0, len(pending_layers), self.batch_size):
 
-            for field in self.json_result['body']['data']['fields']:
-                valuemap_values = {}
-
-                # Get column index
-                field_index = layer.fields().indexFromName(field['columnname'])
-
-                # Hide selected fields according table config_form_fields.hidden
-                if 'hidden' in field:
-                    self._set_column_visibility(layer, field['columnname'], field['hidden'])
-
-                # Set alias column
-                if field['label']:
-                    layer.setFieldAlias(field_index, field['label'])
-
-                # widgetcontrols
-                if 'widgetcontrols' in field:
-
-                    # Set field constraints
-                    if field['widgetcontrols'] and 'setQgisConstraints' in field['widgetcontrols']:
-                        if field['widgetcontrols']['setQgisConstraints'] is True:
-                            layer.setFieldConstraint(field_index, QgsFieldConstraints.ConstraintNotNull,
-                                                     QgsFieldConstraints.ConstraintStrengthSoft)
-                            layer.setFieldConstraint(field_index, QgsFieldConstraints.ConstraintUnique,
-                                                     QgsFieldConstraints.ConstraintStrengthHard)
-
-                if 'ismandatory' in field and not field['ismandatory']:
-                    layer.setFieldConstraint(field_index, QgsFieldConstraints.ConstraintNotNull,
-                                             QgsFieldConstraints.ConstraintStrengthSoft)
-
-                # Manage editability
-                self._set_read_only(layer, field, field_index)
-
-                # delete old values on ValueMap
-                editor_widget_setup = QgsEditorWidgetSetup('ValueMap', {'map': valuemap_values})
-                layer.setEditorWidgetSetup(field_index, editor_widget_setup)
-
-                # Manage ValueRelation configuration
-                use_vr = 'widgetcontrols' in field and field['widgetcontrols'] \
-                         and 'valueRelation' in field['widgetcontrols'] and field['widgetcontrols']['valueRelation']
-                if use_vr:
-                    value_relation = field['widgetcontrols']['valueRelation']
-                    if 'activated' in value_relation and value_relation['activated']:
-                        try:
-                            vr_layer = value_relation['layer']
-                            vr_layer = tools_qgis.get_layer_by_tablename(vr_layer).id()  # Get layer id
-                            vr_key_column = value_relation['keyColumn']  # Get 'Key'
-                            vr_value_column = value_relation['valueColumn']  # Get 'Value'
-                            vr_allow_nullvalue = value_relation['nullValue']  # Get null values
-                            vr_filter_expression = value_relation['filterExpression']  # Get 'FilterExpression'
-                            if vr_filter_expression is None:
-                                vr_filter_expression = ''
-
-                            # Create and apply ValueRelation config
-                            editor_widget_setup = QgsEditorWidgetSetup('ValueRelation', {'Layer': f'{vr_layer}',
-                                                                                         'Key': f'{vr_key_column}',
-                                                                                         'Value': f'{vr_value_column}',
-                                                                                         'AllowNull': f'{vr_allow_nullvalue}',
-                                                                                         'FilterExpression': f'{vr_filter_expression}'})
-                            layer.setEditorWidgetSetup(field_index, editor_widget_setup)
-							
-                        except Exception as e:
-                            self.exception = e
-                            self.vr_errors.add(layer_name)
-                            if 'layer' in value_relation:
-                                self.vr_missing.add(value_relation['layer'])
-                            self.message = f"ValueRelation for {self.vr_errors} switched to ValueMap because " \
-                                           f"layers {self.vr_missing} are not present on QGIS project"
-                            use_vr = False
-
-                if not use_vr:
-                    # Manage new values in ValueMap
-                    if field['widgettype'] == 'combo':
-                        if 'comboIds' in field:
-                            # Set values
-                            for i in range(0, len(field['comboIds'])):
-                                valuemap_values[field['comboNames'][i]] = field['comboIds'][i]
-                        # Set values into valueMap
-                        editor_widget_setup = QgsEditorWidgetSetup('ValueMap', {'map': valuemap_values})
-                        layer.setEditorWidgetSetup(field_index, editor_widget_setup)
-                    elif field['widgettype'] == 'check':
-                        config = {'CheckedState': 'true', 'UncheckedState': 'false'}
-                        editor_widget_setup = QgsEditorWidgetSetup('CheckBox', config)
-                        layer.setEditorWidgetSetup(field_index, editor_widget_setup)
-                    elif field['widgettype'] == 'datetime':
-                        config = {'allow_null': True,
-                                  'calendar_popup': True,
-                                  'display_format': 'yyyy-MM-dd',
-                                  'field_format': 'yyyy-MM-dd',
-                                  'field_iso_format': False}
-                        editor_widget_setup = QgsEditorWidgetSetup('DateTime', config)
-                        layer.setEditorWidgetSetup(field_index, editor_widget_setup)
-                    elif field['widgettype'] == 'textarea':
-                        editor_widget_setup = QgsEditorWidgetSetup('TextEdit', {'IsMultiline': 'True'})
-                        layer.setEditorWidgetSetup(field_index, editor_widget_setup)
-                    else:
-                        editor_widget_setup = QgsEditorWidgetSetup('TextEdit', {'IsMultiline': 'False'})
-                        layer.setEditorWidgetSetup(field_index, editor_widget_setup)
+            if self.isCanceled():
+                return False
+
+            batch = pending_layers[batch_start:batch_start + self.batch_size]
+            json_results = self._get_info_from_ids([layer_name for layer_name, layer in batch])
+            fields_to_cache = {}
+
+            for layer_name, layer in batch:
+
+                if self.isCanceled():
+                    return False
+
+                layer_number = layer_number + 1
+                self.setProgress((layer_number * 100) / total_layers)
+
+                self.json_result = json_results.get(layer_name)
+                if not self.json_result:
+                    continue
+                if 'status' not in self.json_result:
+                    continue
+                if self.json_result['status'] == 'Failed':
+                    continue
+                if 'body' not in self.json_result:
+                    tools_log.log_info("Not 'body'")
+                    continue
+                if 'data' not in self.json_result['body']:
+                    tools_log.log_info("Not 'data'")
+                    continue
 
-                # multiline: key comes from widgecontrol but it's used here in order to set false when key is missing
-                if field['widgettype'] == 'text':
-                    self._set_column_multiline(layer, field, field_index)
+                self._set_fields_config(layer, layer_name, self.json_result['body']['data']['fields'])
+                fields_to_cache[layer_name] = self.json_result['body']['data']['fields']
+
+            self._set_cached_config(fields_to_cache)
 
         if msg_failed != "":
             tools_qt.show_exception_message("Execute failed.", msg_failed)
@@ -264,6 +206,281 @@ class GwProjectLayersConfig(GwTask):
             tools_qt.show_exception_message("Key on returned json from ddbb is missed.", msg_key)
 
 
+    def _get_info_from_ids(self, layer_names):
+        """ Get result of 'gw_fct_getinfofromid' for every layer of @layer_names in a single database call
+            If the batch fails, call the function once per layer
+        :return: Dictionary with layer names as keys and json results as values
+        """
+
+        json_results = {}
+        bodies = []
+        for layer_name in layer_names:
+            feature = f'"tableName":"{layer_name}", "isLayer":true'
+            bodies.append(tools_gw.create_body(feature=feature))
+        if not bodies:
+            return json_results
+        self.body = bodies[-1]
+
+        values = ", ".join([f"({i}, {body}::json)" for i, body in enumerate(bodies)])
+        sql = (f"SELECT t.idx, {self.schema_name}.gw_fct_getinfofromid(t.body) "
+               f"FROM (VALUES {values}) AS t(idx, body) ORDER BY t.idx;")
+        rows = tools_db.get_rows(sql, log_info=False, aux_conn=self.aux_conn, is_thread=True)
+        if rows is None:
+            tools_log.log_info("Batch call of 'gw_fct_getinfofromid' failed. Calling it once per layer")
+            for layer_name, body in zip(layer_names, bodies):
+                if self.isCanceled():
+                    break
+                json_results[layer_name] = tools_gw.execute_procedure('gw_fct_getinfofromid', body,
+                    aux_conn=self.aux_conn, is_thread=True, check_function=False)
+            return json_results
+
+        for row in rows:
+            layer_name = layer_names[row[0]]
+            json_result = row[1]
+            if json_result and json_result.get('status') == 'Failed':
+                sql = f"SELECT {self.schema_name}.gw_fct_getinfofromid({bodies[row[0]]});"
+                tools_gw.manage_json_exception(json_result, sql, is_thread=True)
+            json_results[layer_name] = json_result
+
+        return json_results
+
+
+    def _get_cache_key(self):
+        """ Get key of cached configuration: database, schema, project version, user, language and info type """
+
+        credentials = global_vars.dao_db_credentials or {}
+        lang = QSettings().value('locale/globalLocale', QLocale().name())
+        values = [credentials.get('service'), credentials.get('host'), credentials.get('port'), credentials.get('db'),
+                  self.schema_name.replace('"', ''), self.project_version, global_vars.current_user, lang,
+                  self.qgis_project_infotype]
+        return "|".join([str(value) for value in values])
+
+
+    def _get_cached_config(self):
+        """ Get fields configuration from cache file (located in user config folder)
+            Only layers whose rows in config_form_fields and whose combo source tables have not changed are returned
+        :return: Dictionary with layer names as keys and list of fields as values
+        """
+
+        if not self.use_cache or global_vars.user_folder_dir is None:
+            return {}
+
+        self.cache_tokens = self._get_cache_tokens()
+        if not self.cache_tokens:
+            return {}
+
+        folder = f"{global_vars.user_folder_dir}{os.sep}config"
+        status, self.cache_cursor = tools_gw.create_sqlite_conn("layers_config", folder)
+        if not status:
+            self.cache_cursor = None
+            return {}
+
+        cached_config = {}
+        try:
+            self.cache_cursor.execute("CREATE TABLE IF NOT EXISTS layers_config (cache_key TEXT, layer_name TEXT, "
+                                      "token TEXT, fields TEXT, PRIMARY KEY (cache_key, layer_name))")
+            self.cache_cursor.connection.commit()
+            sql = "SELECT layer_name, token, fields FROM layers_config WHERE cache_key = ?"
+            for layer_name, token, fields in self.cache_cursor.execute(sql, (self._get_cache_key(),)):
+                if token and token == self.cache_tokens.get(layer_name):
+                    cached_config[layer_name] = json.loads(fields)
+        except Exception as e:
+            tools_log.log_warning(f"Error reading layers config cache: {e}")
+            self._close_cache()
+            return {}
+
+        tools_log.log_info(f"Layers config read from cache: {len(cached_config)}")
+        return cached_config
+
+
+    def _get_cache_tokens(self):
+        """ Get change token of every form: its rows in config_form_fields and the modification counters of the
+            tables its combos are read from (dv_querytext). Forms whose combos read from views or from tables of
+            other schemas have no token, so they are never cached
+        :return: Dictionary with form names as keys and tokens as values
+        """
+
+        schema_name = self.schema_name.replace('"', '')
+        sql = (f"SELECT formname, md5(string_agg(t::text, ',' ORDER BY t::text)), "
+               f"string_agg(coalesce(t.dv_querytext, '') || ' ' || coalesce(t.dv_querytext_filterc, ''), ' ') "
+               f"FROM {schema_name}.config_form_fields t GROUP BY formname")
+        rows = tools_db.get_rows(sql, log_info=False, aux_conn=self.aux_conn, is_thread=True)
+        if rows is None:
+            return {}
+
+        form_tables = {}
+        for formname, md5, querytext in rows:
+            tables = set()
+            for name in _querytext_tables.findall(querytext or ''):
+                name = name.replace('"', '').split('.')
+                if len(name) > 1 and name[0] != schema_name:
+                    tables = None
+                    break
+                tables.add(name[-1])
+            form_tables[formname] = (md5, tables)
+
+        # Catalog tables have no timestamp: use the cumulative counters of inserted, updated and deleted rows
+        all_tables = set()
+        for md5, tables in form_tables.values():
+            all_tables.update(tables or ())
+        table_states = {}
+        if all_tables:
+            table_names = ", ".join([f"'{table}'" for table in sorted(all_tables)])
+            sql = (f"SELECT c.relname, s.n_tup_ins, s.n_tup_upd, s.n_tup_del "
+                   f"FROM pg_class c "
+                   f"JOIN pg_namespace n ON n.oid = c.relnamespace "
+                   f"JOIN pg_stat_user_tables s ON s.relid = c.oid "
+                   f"WHERE n.nspname = '{schema_name}' AND c.relkind = 'r' AND c.relname IN ({table_names})")
+            rows = tools_db.get_rows(sql, log_info=False, aux_conn=self.aux_conn, is_thread=True)
+            if rows is None:
+                return {}
+            table_states = {row[0]: f"{row[0]}:{row[1]}:{row[2]}:{row[3]}" for row in rows}
+
+        cache_tokens = {}
+        for formname, (md5, tables) in form_tables.items():
+            if not md5 or tables is None or not tables.issubset(table_states):
+                continue
+            cache_tokens[formname] = "|".join([md5] + [table_states[table] for table in sorted(tables)])
+
+        return cache_tokens
+
+
+    def _set_cached_config(self, fields_config):
+        """ Store @fields_config (dictionary with layer names as keys and list of fields as values) in cache file """
+
+        if self.cache_cursor is None or not fields_config:
+            return
+
+        # Forms without token can't be validated next time, so they are not cached
+        cache_key = self._get_cache_key()
+        values = [(cache_key, layer_name, self.cache_tokens[layer_name], json.dumps(fields))
+                  for layer_name, fields in fields_config.items() if self.cache_tokens.get(layer_name)]
+        if not values:
+            return
+        try:
+            self.cache_cursor.executemany("INSERT OR REPLACE INTO layers_config VALUES (?, ?, ?, ?)", values)
+            self.cache_cursor.connection.commit()
+        except Exception as e:
+            tools_log.log_warning(f"Error writing layers config cache: {e}")
+
+
+    def _close_cache(self):
+
+        if self.cache_cursor is None:
+            return
+        try:
+            self.cache_cursor.connection.close()
+        except Exception:
+            pass
+        self.cache_cursor = None
+
+
+    def _set_fields_config(self, layer, layer_name, fields):
+        """ Set configuration of @fields returned by 'gw_fct_getinfofromid' into @layer """
+
+        for field in fields:
+            valuemap_values = {}
+
+            # Get column index
+            field_index = layer.fields().indexFromName(field['columnname'])
+
+            # Hide selected fields according table config_form_fields.hidden
+            if 'hidden' in field:
+                self._set_column_visibility(layer, field['columnname'], field['hidden'])
+
+            # Set alias column
+            if field['label']:
+                layer.setFieldAlias(field_index, field['label'])
+
+            # widgetcontrols
+            if 'widgetcontrols' in field:
+
+                # Set field constraints
+                if field['widgetcontrols'] and 'setQgisConstraints' in field['widgetcontrols']:
+                    if field['widgetcontrols']['setQgisConstraints'] is True:
+                        layer.setFieldConstraint(field_index, QgsFieldConstraints.ConstraintNotNull,
+                                                 QgsFieldConstraints.ConstraintStrengthSoft)
+                        layer.setFieldConstraint(field_index, QgsFieldConstraints.ConstraintUnique,
+                                                 QgsFieldConstraints.ConstraintStrengthHard)
+
+            if 'ismandatory' in field and not field['ismandatory']:
+                layer.setFieldConstraint(field_index, QgsFieldConstraints.ConstraintNotNull,
+                                         QgsFieldConstraints.ConstraintStrengthSoft)
+
+            # Manage editability
+            self._set_read_only(layer, field, field_index)
+
+            # delete old values on ValueMap
+            editor_widget_setup = QgsEditorWidgetSetup('ValueMap', {'map': valuemap_values})
+            layer.setEditorWidgetSetup(field_index, editor_widget_setup)
+
+            # Manage ValueRelation configuration
+            use_vr = 'widgetcontrols' in field and field['widgetcontrols'] \
+                     and 'valueRelation' in field['widgetcontrols'] and field['widgetcontrols']['valueRelation']
+            if use_vr:
+                value_relation = field['widgetcontrols']['valueRelation']
+                if 'activated' in value_relation and value_relation['activated']:
+                    try:
+                        vr_layer = value_relation['layer']
+                        vr_layer = tools_qgis.get_layer_by_tablename(vr_layer).id()  # Get layer id
+                        vr_key_column = value_relation['keyColumn']  # Get 'Key'
+                        vr_value_column = value_relation['valueColumn']  # Get 'Value'
+                        vr_allow_nullvalue = value_relation['nullValue']  # Get null values
+                        vr_filter_expression = value_relation['filterExpression']  # Get 'FilterExpression'
+                        if vr_filter_expression is None:
+                            vr_filter_expression = ''
+
+                        # Create and apply ValueRelation config
+                        editor_widget_setup = QgsEditorWidgetSetup('ValueRelation', {'Layer': f'{vr_layer}',
+                                                                                     'Key': f'{vr_key_column}',
+                                                                                     'Value': f'{vr_value_column}',
+                                                                                     'AllowNull': f'{vr_allow_nullvalue}',
+                                                                                     'FilterExpression': f'{vr_filter_expression}'})
+                        layer.setEditorWidgetSetup(field_index, editor_widget_setup)
+
+                    except Exception as e:
+                        self.exception = e
+                        self.vr_errors.add(layer_name)
+                        if 'layer' in value_relation:
+                            self.vr_missing.add(value_relation['layer'])
+                        self.message = f"ValueRelation for {self.vr_errors} switched to ValueMap because " \
+                                       f"layers {self.vr_missing} are not present on QGIS project"
+                        use_vr = False
+
+            if not use_vr:
+                # Manage new values in ValueMap
+                if field['widgettype'] == 'combo':
+                    if 'comboIds' in field:
+                        # Set values
+                        for i in range(0, len(field['comboIds'])):
+                            valuemap_values[field['comboNames'][i]] = field['comboIds'][i]
+                    # Set values into valueMap
+                    editor_widget_setup = QgsEditorWidgetSetup('ValueMap', {'map': valuemap_values})
+                    layer.setEditorWidgetSetup(field_index, editor_widget_setup)
+                elif field['widgettype'] == 'check':
+                    config = {'CheckedState': 'true', 'UncheckedState': 'false'}
+                    editor_widget_setup = QgsEditorWidgetSetup('CheckBox', config)
+                    layer.setEditorWidgetSetup(field_index, editor_widget_setup)
+                elif field['widgettype'] == 'datetime':
+                    config = {'allow_null': True,
+                              'calendar_popup': True,
+                              'display_format': 'yyyy-MM-dd',
+                              'field_format': 'yyyy-MM-dd',
+                              'field_iso_format': False}
+                    editor_widget_setup = QgsEditorWidgetSetup('DateTime', config)
+                    layer.setEditorWidgetSetup(field_index, editor_widget_setup)
+                elif field['widgettype'] == 'textarea':
+                    editor_widget_setup = QgsEditorWidgetSetup('TextEdit', {'IsMultiline': 'True'})
+                    layer.setEditorWidgetSetup(field_index, editor_widget_setup)
+                else:
+                    editor_widget_setup = QgsEditorWidgetSetup('TextEdit', {'IsMultiline': 'False'})
+                    layer.setEditorWidgetSetup(field_index, editor_widget_setup)
+
+            # multiline: key comes from widgecontrol but it's used here in order to set false when key is missing
+            if field['widgettype'] == 'text':
+                self._set_column_multiline(layer, field, field_index)
+
+
     def _set_read_only(self, layer, field, field_index):
         """ Set field readOnly according to client configuration into config_form_fields (field 'iseditable') """
 
@@ -0,0 +1,198 @@
+"""
+This file is part of Giswater 3
+The program is free software: you can redistribute it and/or modify it under the terms of the GNU
+General Public License as published by the Free Software Foundation, either version 3 of the License,
+or (at your option) any later version.
+"""
+# -*- coding: utf-8 -*-
+import threading
+
+from qgis.PyQt.QtCore import pyqtSignal, QObject
+
+from ... import global_vars
+from ...lib import tools_db, tools_log
+
+
+class GwSearchWorker(QObject):
+
+    # Search functions are executed by a single thread using its own auxiliary connection.
+    # Only the last submitted request is executed: a new request cancels the one in flight (if any)
+    # Worker cannot use 'iface', directly or indirectly or open dialogs. Results are processed in Qt main thread
+    idle_timeout = 60                       # Seconds without requests before finishing the thread
+    search_finished = pyqtSignal(int, str, str, object)
+
+
+    def __init__(self):
+
+        QObject.__init__(self)
+        self.aux_conn = None
+        self.thread = None
+        self.lock = threading.Lock()
+        self.cancel_cond = threading.Condition(self.lock)
+        self.cancels_pending = 0
+        self.cancelled_id = None
+        self.wake_event = threading.Event()
+        self.stop_event = threading.Event()
+        self.pending = None
+        self.running_id = None
+        self.last_id = 0
+
+
+    def submit(self, function_name, body, schema_name=None):
+        """ Queue execution of database function @function_name. Returns the id of the request """
+
+        if schema_name is None:
+            schema_name = global_vars.schema_name
+        sql = f"SELECT {schema_name}.{function_name}({body});"
+
+        with self.lock:
+            self.last_id += 1
+            request_id = self.last_id
+            self.pending = (request_id, function_name, sql)
+            if self.running_id is not None:
+                self._cancel_running()
+            if self.thread is None or not self.thread.is_alive():
+                self.stop_event = threading.Event()
+                self.thread = threading.Thread(target=self._run, args=(self.stop_event,), daemon=True)
+                self.thread.start()
+            self.wake_event.set()
+
+        return request_id
+
+
+    def cancel(self):
+        """ Discard pending request and cancel the one in flight """
+
+        with self.lock:
+            self.last_id += 1
+            self.pending = None
+            if self.running_id is not None:
+                self._cancel_running()
+
+
+    def stop(self):
+        """ Cancel current request and finish thread
+        The thread isn't joined: once it's no longer the worker thread it leaves @aux_conn and @running_id untouched
+        """
+
+        self.cancel()
+        with self.lock:
+            self.stop_event.set()
+            self.wake_event.set()
+            self.thread = None
+            self.aux_conn = None
+            self.running_id = None
+
+
+    def is_current(self, request_id):
+        """ Check if @request_id is the last submitted request """
+
+        return request_id == self.last_id
+
+
+    # region private functions
+
+    def _cancel_running(self):
+        """ Cancel query in flight using pg_cancel_backend from another connection. Must be called holding @lock
+            The cancel is sent from its own thread, so the caller (usually the UI thread) is never blocked
+        """
+
+        aux_conn = self.aux_conn
+        if aux_conn is None or self.cancelled_id == self.running_id:
+            return
+        try:
+            pid = aux_conn.get_backend_pid()
+        except Exception:
+            return
+        self.cancelled_id = self.running_id
+        self.cancels_pending += 1
+        threading.Thread(target=self._send_cancel, args=(pid,), daemon=True).start()
+
+
+    def _send_cancel(self, pid):
+        """ Send cancel request of backend @pid and wake up the worker waiting to release its connection """
+
+        try:
+            result = tools_db.cancel_pid(pid)
+            if result['last_error'] is not None:
+                tools_log.log_warning(result['last_error'])
+        finally:
+            with self.lock:
+                self.cancels_pending -= 1
+                self.cancel_cond.notify_all()
+
+
+    def _run(self, stop_event):
+        """ Execute pending requests until worker is stopped or idle for @idle_timeout seconds """
+
+        while not stop_event.is_set():
+            if not self.wake_event.wait(self.idle_timeout):
+                with self.lock:
+                    if self.pending is None:
+                        if self._is_owner():
+                            self.thread = None
+                        return
+            with self.lock:
+                if stop_event.is_set():
+                    return
+                self.wake_event.clear()
+                request = self.pending
+                self.pending = None
+                if request is None:
+                    continue
+                self.running_id = request[0]
+
+            # Connection is taken from the pool only while a request is running
+            result = None
+            aux_conn = self._get_aux_conn()
+            if aux_conn is not None:
+                with self.lock:
+                    # A stopped thread doesn't own the worker state anymore: a new thread may be using it
+                    if self._is_owner():
+                        self.aux_conn = aux_conn
+                if not stop_event.is_set():
+                    result = self._execute(aux_conn, *request)
+                with self.lock:
+                    # Connection can't be reused while a cancel of its backend is on its way
+                    while self.cancels_pending > 0:
+                        self.cancel_cond.wait()
+                    if self._is_owner():
+                        self.aux_conn = None
+                global_vars.dao.delete_aux_con(aux_conn)
+            with self.lock:
+                if self._is_owner():
+                    self.running_id = None
+            if self.is_current(request[0]):
+                self.search_finished.emit(request[0], request[1], request[2], result)
+
+
+    def _is_owner(self):
+        """ Check if current thread is the worker thread. Must be called holding @lock """
+
+        return self.thread is threading.current_thread()
+
+
+    def _get_aux_conn(self):
+        """ Get auxiliary connection used by the worker """
+
+        aux_conn = global_vars.dao.get_aux_conn()
+        if isinstance(aux_conn, dict):
+            tools_log.log_warning(f"Search: unable to get auxiliary connection: {aux_conn['last_error']}")
+            return None
+        return aux_conn
+
+
+    def _execute(self, aux_conn, request_id, function_name, sql):
+        """ Execute @sql in @aux_conn. Returns json result or None """
+
+        row = global_vars.dao.get_row(sql, commit=True, aux_conn=aux_conn)
+        if not row or not row[0]:
+            # Superseded requests are cancelled on purpose, don't log them
+            if self.is_current(request_id):
+                tools_log.log_warning(f"Function error: {function_name}")
+                tools_log.log_warning(sql)
+            return None
+
+        return row[0]
+
+    # endregion
@@ -41,6 +41,7 @@ class GwTask(QgsTask, QObject):
 
         global_vars.session_vars['threads'].remove(self)
         global_vars.dao.delete_aux_con(self.aux_conn)
+        tools_log.log_debug(f"Connection pool stats: {tools_db.get_pool_stats()}")
         iface.actionOpenProject().setEnabled(True)
         iface.actionNewProject().setEnabled(True)
         if result:
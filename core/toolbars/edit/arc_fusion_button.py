@@ -112,7 +112,8 @@ class GwArcFusionButton(GwMaptool):
         snapped_feat = None
         result = self.snapper_manager.snap_to_current_layer(event_point)
         if result.isValid():
-            snapped_feat = self.snapper_manager.get_snapped_feature(result)
+            snapped_feat = self.snapper_manager.get_snapped_feature(result, attributes=['node_id', 'state'],
+                                                                     use_cache=False)
 
         if snapped_feat:
             self.node_id = snapped_feat.attribute('node_id')
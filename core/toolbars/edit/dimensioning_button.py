@@ -47,11 +47,12 @@ class GwDimensioningButton(GwMaptool):
 
             # Implement the Add Feature button
             self.iface.actionAddFeature().trigger()
-            self.snapper_manager.config_snap_to_arc()
-            self.snapper_manager.config_snap_to_connec()
-            self.snapper_manager.config_snap_to_gully()
-            self.snapper_manager.config_snap_to_node()
-            self.snapper_manager.set_snap_mode()
+            with self.snapper_manager.snapping_changes():
+                self.snapper_manager.config_snap_to_arc()
+                self.snapper_manager.config_snap_to_connec()
+                self.snapper_manager.config_snap_to_gully()
+                self.snapper_manager.config_snap_to_node()
+                self.snapper_manager.set_snap_mode()
 
             # Manage new tool
             tools_gw.connect_signal(self.layer.featureAdded, self._open_new_dimensioning,
@@ -35,7 +35,7 @@ class GwFlowExitButton(GwMaptool):
         if result.isValid():
             self.snapper_manager.add_marker(result, self.vertex_marker)
             # Data for function
-            self.snapped_feat = self.snapper_manager.get_snapped_feature(result)
+            self.snapped_feat = self.snapper_manager.get_snapped_feature(result, attributes=['node_id'])
 
 
     def canvasReleaseEvent(self, event):
@@ -58,14 +58,10 @@ class GwFlowExitButton(GwMaptool):
         # Store user snapping configuration
         self.previous_snapping = self.snapper_manager.get_snapping_options()
 
-        # Clear snapping
-        self.snapper_manager.set_snapping_status()
-
-        # Set snapping layers
-        self.snapper_manager.set_snapping_layers()
-
-        # Set snapping to node
-        self.snapper_manager.config_snap_to_node()
+        # Clear snapping and set snapping to node
+        with self.snapper_manager.snapping_changes():
+            self.snapper_manager.set_snapping_status()
+            self.snapper_manager.config_snap_to_node()
 
         # Change cursor
         self.canvas.setCursor(self.cursor)
@@ -8,22 +8,25 @@ or (at your option) any later version.
 import json
 import math
 import matplotlib.pyplot as plt
+import numpy as np
 import os
 from collections import OrderedDict
 from decimal import Decimal
 from functools import partial
+from matplotlib.collections import LineCollection
 
 from qgis.PyQt.QtCore import Qt, QDate
 from qgis.PyQt.QtGui import QDoubleValidator
 from qgis.PyQt.QtWidgets import QListWidgetItem, QLineEdit, QAction
-from qgis.core import QgsFeatureRequest, QgsVectorLayer, QgsExpression
+from qgis.core import QgsApplication, QgsVectorLayer
 from qgis.gui import QgsMapToolEmitPoint
 
 from ..dialog import GwAction
+from ...threads.profile_image import GwProfileImageTask
 from ...ui.ui_manager import GwProfileUi, GwProfilesListUi
 from ...utils import tools_gw
 from ...utils.snap_manager import GwSnapManager
-from ....lib import tools_qt, tools_log, tools_qgis
+from ....lib import tools_qt, tools_log, tools_qgis, tools_os
 from .... import global_vars
 
 
@@ -58,6 +61,8 @@ class GwNodeData:
 class GwProfileButton(GwAction):
     """ Button 43: Profile """
 
+    label_spacing = 0.12                    # Minimum distance (inches) between labels of the same row in exported images
+
     def __init__(self, icon_path, action_name, text, toolbar, action_group):
 
         # Call ParentDialog constructor
@@ -71,6 +76,10 @@ class GwProfileButton(GwAction):
         self.rotation_vd_exist = False
         self.lastnode_datatype = 'REAL'
         self.none_values = []
+        self.profile_lines = {}
+        self.profile_markers = {}
+        self.profile_texts = []
+        self.image_task = None
 
 
     def clicked_event(self):
@@ -290,15 +299,8 @@ class GwProfileButton(GwAction):
                 self.layer_arc = tools_qgis.get_layer_by_tablename("v_edit_arc")
                 self._remove_selection()
 
-                expr_filter = "\"arc_id\" IN ("
-                for arc in list_arcs.strip('][').split(', '):
-                    expr_filter += f"'{arc}', "
-                expr_filter = expr_filter[:-2] + ")"
-                expr = QgsExpression(expr_filter)
-                # Get a featureIterator from this expression:
-                it = self.layer_arc.getFeatures(QgsFeatureRequest(expr))
-
-                self.id_list = [i.id() for i in it]
+                # Get feature ids of the arcs from the index of 'arc_id'
+                self.id_list = tools_qgis.get_feature_ids(self.layer_arc, "arc_id", list_arcs.strip('][').split(', '))
                 self.layer_arc.selectByIds(self.id_list)
 
                 # Center shortest path in canvas - ZOOM SELECTION
@@ -364,7 +366,7 @@ class GwProfileButton(GwAction):
             layer = self.snapper_manager.get_snapped_layer(result)
             if layer == self.layer_node:
                 # Get the point
-                snapped_feat = self.snapper_manager.get_snapped_feature(result)
+                snapped_feat = self.snapper_manager.get_snapped_feature(result, attributes=['node_id'])
                 element_id = snapped_feat.attribute('node_id')
                 self.element_id = str(element_id)
 
@@ -405,15 +407,8 @@ class GwProfileButton(GwAction):
                         self.dlg_draw_profile.tbl_list_arc.addItem(item_arc)
                         list_arcs.append(arc['arc_id'])
 
-                    expr_filter = "\"arc_id\" IN ("
-                    for arc in result['body']['data']['arc']:
-                        expr_filter += f"'{arc['arc_id']}', "
-                    expr_filter = expr_filter[:-2] + ")"
-                    expr = QgsExpression(expr_filter)
-                    # Get a featureIterator from this expression:
-                    it = self.layer_arc.getFeatures(QgsFeatureRequest(expr))
-
-                    self.id_list = [i.id() for i in it]
+                    # Get feature ids of the arcs from the index of 'arc_id'
+                    self.id_list = tools_qgis.get_feature_ids(self.layer_arc, "arc_id", list_arcs)
                     self.layer_arc.selectByIds(self.id_list)
 
                     # Next profile will be done from scratch
@@ -429,8 +424,11 @@ class GwProfileButton(GwAction):
     def _draw_profile(self, arcs, nodes, terrains):
         """ Parent function - Draw profiles """
 
-        # Clear plot
+        # Clear plot and recorded items
         plt.gcf().clear()
+        self.profile_lines = {}
+        self.profile_markers = {}
+        self.profile_texts = []
 
         # Set main parameters
         self._set_profile_variables(arcs, nodes, terrains)
@@ -467,7 +465,8 @@ class GwProfileButton(GwAction):
         self._draw_guitar_horitzontal_lines()
         self._draw_grid()
 
-        # Manage layout and plot
+        # Render all recorded items at once and manage layout and plot
+        self._render_profile(plt.gca())
         self._set_profile_layout()
         self.plot = plt
 
@@ -486,9 +485,203 @@ class GwProfileButton(GwAction):
         fig_size[1] = 4.8
         plt.rcParams["figure.figsize"] = fig_size
 
-        # Save profile with dpi = 300
-        plt.savefig(img_path, dpi=300)
-        
+        # Get level of detail and length of sheets of exported images
+        lod = tools_gw.get_config_parser('system', 'profile_lod', "user", "init", False)
+        lod = tools_os.set_boolean(lod, False)
+        sheet_length = tools_gw.get_config_parser('system', 'profile_sheet_length', "user", "init", False)
+        try:
+            sheet_length = float(sheet_length)
+        except (TypeError, ValueError):
+            sheet_length = 0
+
+        # Save profile with dpi = 300 in background, using its own figure
+        items = (self.profile_lines, self.profile_markers, self.profile_texts)
+        self._save_profile_images(img_path, items, (fig_size[0], fig_size[1]), 300, lod, sheet_length)
+
+
+    def _save_profile_images(self, img_path, items, fig_size, dpi, lod, sheet_length):
+        """ Save whole profile into @img_path and, if it is longer than @sheet_length, save it also by sheets
+            (profile_1.png, profile_2.png...). Images are rendered in background by a single task
+        """
+
+        images = [(img_path, None, None)]
+        if sheet_length and sheet_length > 0:
+            images.extend(self._get_profile_sheets(img_path, items, sheet_length))
+
+        # Images of a previous profile still pending are discarded
+        if self.image_task is not None:
+            try:
+                self.image_task.cancel()
+            except RuntimeError:
+                # Task has already finished and has been deleted
+                pass
+        render_function = partial(self._render_profile, items=items, lod_width=fig_size[0] if lod else None)
+        self.image_task = GwProfileImageTask('Save profile image', render_function, images, fig_size, dpi)
+        QgsApplication.taskManager().addTask(self.image_task)
+
+
+    def _get_profile_sheets(self, img_path, items, sheet_length):
+        """ Get list of tuples (img_path, x_range, y_range) of the sheets of @sheet_length meters of the profile """
+
+        x_min, x_max, y_min, y_max = self._get_profile_limits(items)
+        if x_max is None or x_max - max(x_min, 0) <= sheet_length:
+            return []
+
+        # First sheet also includes the legend of the guitar (negative x)
+        root, ext = os.path.splitext(img_path)
+        sheets = []
+        start = 0
+        while start < x_max:
+            x_range = (x_min if start == 0 else start, min(start + sheet_length, x_max))
+            sheets.append((f"{root}_{len(sheets) + 1}{ext}", x_range, (y_min, y_max)))
+            start += sheet_length
+
+        return sheets
+
+
+    def _plot(self, x, y, linestyle='-', color=None, linewidth=None, zorder=2, marker=None):
+        """ Record a line (or a marker if @marker is set) to be drawn by _render_profile """
+
+        if marker is not None:
+            self.profile_markers.setdefault((marker, color), []).append((self._to_float(x), self._to_float(y)))
+            return
+
+        if linewidth is not None:
+            linewidth = float(linewidth)
+        points = np.column_stack((self._to_array(x), self._to_array(y)))
+        self.profile_lines.setdefault((linestyle, color, linewidth, zorder), []).append(points)
+
+
+    def _text(self, *args, **kwargs):
+        """ Record a text to be drawn by _render_profile """
+
+        self.profile_texts.append(('text', args, kwargs))
+
+
+    def _annotate(self, *args, **kwargs):
+        """ Record an annotation to be drawn by _render_profile """
+
+        self.profile_texts.append(('annotate', args, kwargs))
+
+
+    def _render_profile(self, axes, items=None, x_range=None, y_range=None, lod_width=None):
+        """ Draw recorded items into @axes: one LineCollection for each line style, then markers and texts
+            :param items: (lines, markers, texts) recorded by _plot, _text and _annotate. Current profile if None
+            :param x_range: (x_min, x_max) to draw only a sheet of the profile
+            :param y_range: (y_min, y_max) to use when drawing a sheet, so all sheets have the same vertical scale
+            :param lod_width: width (inches) of the output. If set, remove labels overlapping at this width
+        """
+
+        if items is None:
+            items = (self.profile_lines, self.profile_markers, self.profile_texts)
+        profile_lines = list(items[0].items())
+        profile_markers = list(items[1].items())
+        profile_texts = list(items[2])
+
+        for (linestyle, color, linewidth, zorder), lines in profile_lines:
+            if x_range:
+                lines = [line for line in lines if self._is_in_range(line[:, 0], x_range)]
+            collection = LineCollection(lines, linestyles=linestyle, colors=color, linewidths=linewidth,
+                                        zorder=zorder)
+            axes.add_collection(collection)
+
+        for (marker, color), points in profile_markers:
+            points = np.array(points, dtype=float)
+            if x_range:
+                points = points[(points[:, 0] >= x_range[0]) & (points[:, 0] <= x_range[1])]
+            axes.plot(points[:, 0], points[:, 1], linestyle='None', marker=marker, color=color)
+
+        if x_range:
+            profile_texts = [text for text in profile_texts
+                             if x_range[0] <= self._get_text_position(text)[0] <= x_range[1]]
+        if lod_width:
+            x_min, x_max = x_range if x_range else self._get_profile_limits(items)[:2]
+            if x_min is not None and x_max > x_min:
+                profile_texts = self._decimate_texts(profile_texts, (x_max - x_min) / lod_width * self.label_spacing)
+
+        for function_name, args, kwargs in profile_texts:
+            getattr(axes, function_name)(*args, **kwargs)
+
+        axes.autoscale_view()
+        if x_range:
+            axes.set_xlim(*x_range)
+        if y_range and y_range[0] is not None:
+            axes.set_ylim(*y_range)
+
+
+    def _decimate_texts(self, texts, min_distance):
+        """ Level of detail: in each row of texts (same y and orientation) remove the texts that are closer than
+            @min_distance to the previous one. Texts of the legend (negative x) are always kept
+        """
+
+        rows = {}
+        result = []
+        for text in texts:
+            x, y = self._get_text_position(text)
+            if x < 0:
+                result.append(text)
+                continue
+            key = (text[0], round(y, 3), text[2].get('rotation'))
+            rows.setdefault(key, []).append((x, text))
+
+        for row in rows.values():
+            row.sort(key=lambda item: item[0])
+            last_x = None
+            for x, text in row:
+                if last_x is None or x - last_x >= min_distance:
+                    result.append(text)
+                    last_x = x
+
+        return result
+
+
+    def _get_text_position(self, text):
+        """ Get position (x, y) of a text recorded by _text or _annotate """
+
+        function_name, args, kwargs = text
+        if function_name == 'text':
+            x, y = args[0], args[1]
+        else:
+            x, y = kwargs['xy'] if 'xy' in kwargs else args[1]
+        return self._to_float(x), self._to_float(y)
+
+
+    def _get_profile_limits(self, items):
+        """ Get limits (x_min, x_max, y_min, y_max) of the lines of @items, with margins like matplotlib ones """
+
+        lines = [line for lines in items[0].values() for line in lines]
+        if not lines:
+            return None, None, None, None
+
+        points = np.concatenate(lines)
+        x_min, x_max = np.nanmin(points[:, 0]), np.nanmax(points[:, 0])
+        y_min, y_max = np.nanmin(points[:, 1]), np.nanmax(points[:, 1])
+        margin = (y_max - y_min) * 0.05
+
+        return float(x_min), float(x_max), float(y_min - margin), float(y_max + margin)
+
+
+    def _is_in_range(self, values, x_range):
+        """ Check if any part of a line with x @values is inside @x_range """
+
+        return np.nanmin(values) <= x_range[1] and np.nanmax(values) >= x_range[0]
+
+
+    def _to_float(self, value):
+        """ Convert @value (float, Decimal or None) to float. None values are converted to NaN """
+
+        if value is None:
+            return np.nan
+        return float(value)
+
+
+    def _to_array(self, values):
+        """ Convert list of @values (or a single value) to a NumPy array of floats """
+
+        if not isinstance(values, (list, tuple)):
+            values = [values]
+        return np.array([self._to_float(value) for value in values], dtype=float)
+
 
     def _set_profile_layout(self):
         """ Set properties of main window """
@@ -621,12 +814,12 @@ class GwProfileButton(GwAction):
         ysup = [s1y, s2y, s3y]
 
         # draw first node bottom line
-        plt.plot(xinf, yinf, zorder=100, linestyle=self._get_stylesheet(node.data_type)[0],
-                 color=self._get_stylesheet(node.data_type)[1], linewidth=self._get_stylesheet(node.data_type)[2])
+        self._plot(xinf, yinf, zorder=100, linestyle=self._get_stylesheet(node.data_type)[0],
+                   color=self._get_stylesheet(node.data_type)[1], linewidth=self._get_stylesheet(node.data_type)[2])
 
         # draw first node upper line
-        plt.plot(xsup, ysup, zorder=100, linestyle=self._get_stylesheet(node.data_type)[0],
-                 color=self._get_stylesheet(node.data_type)[1], linewidth=self._get_stylesheet(node.data_type)[2])
+        self._plot(xsup, ysup, zorder=100, linestyle=self._get_stylesheet(node.data_type)[0],
+                   color=self._get_stylesheet(node.data_type)[1], linewidth=self._get_stylesheet(node.data_type)[2])
 
         self.first_top_x = 0
         self.first_top_y = node.top_elev
@@ -664,12 +857,12 @@ class GwProfileButton(GwAction):
         # Vertical line [-2,0]
         x = [start_point - self.fix_x * Decimal(0.75), start_point - self.fix_x * Decimal(0.75)]
         y = [self.min_top_elev - Decimal(1.9) * self.height_row, self.min_top_elev - Decimal(5.10) * self.height_row]
-        plt.plot(x, y, linestyle=line_style, color=line_color, linewidth=line_width, zorder=100)
+        self._plot(x, y, linestyle=line_style, color=line_color, linewidth=line_width, zorder=100)
 
         # Vertical line [-3,0]
         x = [start_point - self.fix_x, start_point - self.fix_x]
         y = [self.min_top_elev - 1 * self.height_row, self.min_top_elev - Decimal(5.85) * self.height_row]
-        plt.plot(x, y, linestyle=line_style, color=line_color, linewidth=line_width, zorder=100)
+        self._plot(x, y, linestyle=line_style, color=line_color, linewidth=line_width, zorder=100)
 
 
     def _draw_guitar_auxiliar_lines(self, start_point, first_vl=True):
@@ -685,32 +878,32 @@ class GwProfileButton(GwAction):
             x = [start_point, start_point]
             y = [self.min_top_elev - 1 * self.height_row,
                  self.min_top_elev - Decimal(1.9) * self.height_row]
-            plt.plot(x, y, linestyle=auxline_style, color=auxline_color, linewidth=auxline_width, zorder=100)
+            self._plot(x, y, linestyle=auxline_style, color=auxline_color, linewidth=auxline_width, zorder=100)
 
         # Vertical lines
         x = [start_point, start_point]
         y = [self.min_top_elev - Decimal(1.90) * self.height_row, self.min_top_elev - Decimal(2.05) * self.height_row]
-        plt.plot(x, y, linestyle=auxline_style, color=auxline_color, linewidth=auxline_width, zorder=100)
+        self._plot(x, y, linestyle=auxline_style, color=auxline_color, linewidth=auxline_width, zorder=100)
 
         x = [start_point, start_point]
         y = [self.min_top_elev - Decimal(2.60) * self.height_row, self.min_top_elev - Decimal(2.85) * self.height_row]
-        plt.plot(x, y, linestyle=auxline_style, color=auxline_color, linewidth=auxline_width, zorder=100)
+        self._plot(x, y, linestyle=auxline_style, color=auxline_color, linewidth=auxline_width, zorder=100)
 
         x = [start_point, start_point]
         y = [self.min_top_elev - Decimal(3.4) * self.height_row, self.min_top_elev - Decimal(3.65) * self.height_row]
-        plt.plot(x, y, linestyle=auxline_style, color=auxline_color, linewidth=auxline_width, zorder=100)
+        self._plot(x, y, linestyle=auxline_style, color=auxline_color, linewidth=auxline_width, zorder=100)
 
         x = [start_point, start_point]
         y = [self.min_top_elev - Decimal(4.20) * self.height_row, self.min_top_elev - Decimal(4.45) * self.height_row]
-        plt.plot(x, y, linestyle=auxline_style, color=auxline_color, linewidth=auxline_width, zorder=100)
+        self._plot(x, y, linestyle=auxline_style, color=auxline_color, linewidth=auxline_width, zorder=100)
 
         x = [start_point, start_point]
         y = [self.min_top_elev - Decimal(5) * self.height_row, self.min_top_elev - Decimal(5.25) * self.height_row]
-        plt.plot(x, y, linestyle=auxline_style, color=auxline_color, linewidth=auxline_width, zorder=100)
+        self._plot(x, y, linestyle=auxline_style, color=auxline_color, linewidth=auxline_width, zorder=100)
 
         x = [start_point, start_point]
         y = [self.min_top_elev - Decimal(5.85) * self.height_row, self.min_top_elev - Decimal(5.7) * self.height_row]
-        plt.plot(x, y, linestyle=auxline_style, color=auxline_color, linewidth=auxline_width, zorder=100)
+        self._plot(x, y, linestyle=auxline_style, color=auxline_color, linewidth=auxline_width, zorder=100)
 
 
     def _fill_guitar_text_legend(self):
@@ -724,50 +917,50 @@ class GwProfileButton(GwAction):
 
         legend = self.profile_json['body']['data']['legend']
         c = (self.fix_x - self.fix_x * Decimal(0.2)) / 2
-        plt.text(-(c + self.fix_x * Decimal(0.2)),
-                 self.min_top_elev - 1 * self.height_row - Decimal(0.35) * self.height_row, legend['catalog'],
-                 fontsize=7.5, color=text_color, fontweight=text_weight, horizontalalignment='center')
+        self._text(-(c + self.fix_x * Decimal(0.2)),
+                   self.min_top_elev - 1 * self.height_row - Decimal(0.35) * self.height_row, legend['catalog'],
+                   fontsize=7.5, color=text_color, fontweight=text_weight, horizontalalignment='center')
 
-        plt.text(-(c + self.fix_x * Decimal(0.2)),
-                 self.min_top_elev - 1 * self.height_row - Decimal(0.68) * self.height_row, legend['dimensions'],
-                 fontsize=7.5, color=text_color, fontweight=text_weight, horizontalalignment='center')
+        self._text(-(c + self.fix_x * Decimal(0.2)),
+                   self.min_top_elev - 1 * self.height_row - Decimal(0.68) * self.height_row, legend['dimensions'],
+                   fontsize=7.5, color=text_color, fontweight=text_weight, horizontalalignment='center')
 
         c = (self.fix_x * Decimal(0.25)) / 2
-        plt.text(-(c + self.fix_x * Decimal(0.74)),
-                 self.min_top_elev - Decimal(2) * self.height_row - self.height_row * 3 / 2, legend['ordinates'],
-                 fontsize=7.5, color=text_color, fontweight=text_weight, rotation='vertical',
-                 horizontalalignment='center', verticalalignment='center')
+        self._text(-(c + self.fix_x * Decimal(0.74)),
+                   self.min_top_elev - Decimal(2) * self.height_row - self.height_row * 3 / 2, legend['ordinates'],
+                   fontsize=7.5, color=text_color, fontweight=text_weight, rotation='vertical',
+                   horizontalalignment='center', verticalalignment='center')
 
-        plt.text(-self.fix_x * Decimal(0.70), self.min_top_elev - Decimal(1.85) * self.height_row - self.height_row / 2,
-                 legend['topelev'], fontsize=7.5, color=text_color, fontweight=text_weight, verticalalignment='center')
+        self._text(-self.fix_x * Decimal(0.70), self.min_top_elev - Decimal(1.85) * self.height_row - self.height_row / 2,
+                   legend['topelev'], fontsize=7.5, color=text_color, fontweight=text_weight, verticalalignment='center')
 
-        plt.text(-self.fix_x * Decimal(0.70), self.min_top_elev - Decimal(2.65) * self.height_row - self.height_row / 2,
-                 legend['ymax'], fontsize=7.5, color=text_color, fontweight=text_weight, verticalalignment='center')
+        self._text(-self.fix_x * Decimal(0.70), self.min_top_elev - Decimal(2.65) * self.height_row - self.height_row / 2,
+                   legend['ymax'], fontsize=7.5, color=text_color, fontweight=text_weight, verticalalignment='center')
 
-        plt.text(-self.fix_x * Decimal(0.70), self.min_top_elev - Decimal(3.45) * self.height_row - self.height_row / 2,
-                 legend['elev'], fontsize=7.5, color=text_color, fontweight=text_weight, verticalalignment='center')
+        self._text(-self.fix_x * Decimal(0.70), self.min_top_elev - Decimal(3.45) * self.height_row - self.height_row / 2,
+                   legend['elev'], fontsize=7.5, color=text_color, fontweight=text_weight, verticalalignment='center')
 
-        plt.text(-self.fix_x * Decimal(0.70), self.min_top_elev - Decimal(4.25) * self.height_row - self.height_row / 2,
-                 legend['distance'], fontsize=7.5, color=text_color, fontweight=text_weight, verticalalignment='center')
+        self._text(-self.fix_x * Decimal(0.70), self.min_top_elev - Decimal(4.25) * self.height_row - self.height_row / 2,
+                   legend['distance'], fontsize=7.5, color=text_color, fontweight=text_weight, verticalalignment='center')
 
         c = (self.fix_x - self.fix_x * Decimal(0.2)) / 2
-        plt.text(-(c + self.fix_x * Decimal(0.2)),
-                 self.min_top_elev - Decimal(self.height_row * 5 + self.height_row / 2), legend['code'],
-                 fontsize=7.5, color=text_color, fontweight=text_weight, horizontalalignment='center',
-                 verticalalignment='center')
+        self._text(-(c + self.fix_x * Decimal(0.2)),
+                   self.min_top_elev - Decimal(self.height_row * 5 + self.height_row / 2), legend['code'],
+                   fontsize=7.5, color=text_color, fontweight=text_weight, horizontalalignment='center',
+                   verticalalignment='center')
 
         # Print title
         title = tools_qt.get_text(self.dlg_draw_profile, self.dlg_draw_profile.txt_title, False, False)
         # Set default value if no title is given
         if title in ('', None):
             title = f"PROFILE {self.initNode} - {self.endNode}"
-        plt.text(-self.fix_x * Decimal(1), self.min_top_elev - Decimal(5.75) * self.height_row - self.height_row / 2,
-                 title, fontsize=title_size, color=title_color, fontweight=title_weight,
-                 verticalalignment='center')
+        self._text(-self.fix_x * Decimal(1), self.min_top_elev - Decimal(5.75) * self.height_row - self.height_row / 2,
+                   title, fontsize=title_size, color=title_color, fontweight=title_weight,
+                   verticalalignment='center')
 
         date = tools_qt.get_calendar_date(self.dlg_draw_profile, self.dlg_draw_profile.date)
-        plt.text(-self.fix_x * Decimal(1), self.min_top_elev - Decimal(6) * self.height_row - self.height_row / 2,
-                 date, fontsize=title_size * 0.7, color=title_color, fontweight=title_weight, verticalalignment='center')
+        self._text(-self.fix_x * Decimal(1), self.min_top_elev - Decimal(6) * self.height_row - self.height_row / 2,
+                   date, fontsize=title_size * 0.7, color=title_color, fontweight=title_weight, verticalalignment='center')
 
 
     def _draw_nodes(self, node, prev_node, index):
@@ -825,18 +1018,18 @@ class GwProfileButton(GwAction):
             ynsup = [s2y, s5y]
 
         # draw node bottom line
-        plt.plot(xninf, yninf,
-                 zorder=100,
-                 linestyle=self._get_stylesheet(node.data_type)[0],
-                 color=self._get_stylesheet(node.data_type)[1],
-                 linewidth=self._get_stylesheet(node.data_type)[2])
+        self._plot(xninf, yninf,
+                   zorder=100,
+                   linestyle=self._get_stylesheet(node.data_type)[0],
+                   color=self._get_stylesheet(node.data_type)[1],
+                   linewidth=self._get_stylesheet(node.data_type)[2])
 
         # draw node upper line
-        plt.plot(xnsup, ynsup,
-                 zorder=100,
-                 linestyle=self._get_stylesheet(node.data_type)[0],
-                 color=self._get_stylesheet(node.data_type)[1],
-                 linewidth=self._get_stylesheet(node.data_type)[2])
+        self._plot(xnsup, ynsup,
+                   zorder=100,
+                   linestyle=self._get_stylesheet(node.data_type)[0],
+                   color=self._get_stylesheet(node.data_type)[1],
+                   linewidth=self._get_stylesheet(node.data_type)[2])
 
         if self.lastnode_datatype == 'INTERPOLATED' or node.data_type == 'INTERPOLATED':
             data_type = 'INTERPOLATED'
@@ -844,18 +1037,18 @@ class GwProfileButton(GwAction):
             data_type = 'REAL'
 
         # draw arc bottom line
-        plt.plot(xainf, yainf,
-                 zorder=100,
-                 linestyle=self._get_stylesheet(data_type)[0],
-                 color=self._get_stylesheet(data_type)[1],
-                 linewidth=self._get_stylesheet(data_type)[2])
+        self._plot(xainf, yainf,
+                   zorder=100,
+                   linestyle=self._get_stylesheet(data_type)[0],
+                   color=self._get_stylesheet(data_type)[1],
+                   linewidth=self._get_stylesheet(data_type)[2])
 
         # draw arc upper line
-        plt.plot(xasup, yasup,
-                 zorder=100,
-                 linestyle=self._get_stylesheet(data_type)[0],
-                 color=self._get_stylesheet(data_type)[1],
-                 linewidth=self._get_stylesheet(data_type)[2])
+        self._plot(xasup, yasup,
+                   zorder=100,
+                   linestyle=self._get_stylesheet(data_type)[0],
+                   color=self._get_stylesheet(data_type)[1],
+                   linewidth=self._get_stylesheet(data_type)[2])
 
         self.node_top_x = node.start_point
         self.node_top_y = node.top_elev
@@ -887,12 +1080,12 @@ class GwProfileButton(GwAction):
         # Fill top_elevation
         s = ' ' + '\n' + str(self.nodes[index].descript['top_elev']) + '\n' + ' '
         xy = (Decimal(start_point), self.min_top_elev - Decimal(self.height_row * Decimal(1.8) + self.height_row / 2))
-        plt.annotate(s=s, xy=xy, fontsize=6, color=text_color, fontweight=text_weight, rotation='vertical',
-                     horizontalalignment='center', verticalalignment='center')
+        self._annotate(s=s, xy=xy, fontsize=6, color=text_color, fontweight=text_weight, rotation='vertical',
+                       horizontalalignment='center', verticalalignment='center')
         # Fill code
-        plt.text(0 + start_point, self.min_top_elev - Decimal(self.height_row * 5 + self.height_row / 2),
-                 self.nodes[index].descript['code'], fontsize=7.5, color=text_color, fontweight=text_weight,
-                 horizontalalignment='center', verticalalignment='center')
+        self._text(0 + start_point, self.min_top_elev - Decimal(self.height_row * 5 + self.height_row / 2),
+                   self.nodes[index].descript['code'], fontsize=7.5, color=text_color, fontweight=text_weight,
+                   horizontalalignment='center', verticalalignment='center')
 
         # Node init
         if index == 0:
@@ -901,29 +1094,29 @@ class GwProfileButton(GwAction):
             elev1 = self.nodes[0].elev1
 
             # Fill y_max
-            plt.annotate(' ' + '\n' + str(self.nodes[0].descript['ymax']) + '\n' + str(y1),
-                         xy=(Decimal(0 + start_point),
-                             self.min_top_elev - Decimal(self.height_row * Decimal(2.60) + self.height_row / 2)),
-                         fontsize=6,
-                         color=text_color, fontweight=text_weight,
-                         rotation='vertical', horizontalalignment='center', verticalalignment='center')
+            self._annotate(' ' + '\n' + str(self.nodes[0].descript['ymax']) + '\n' + str(y1),
+                           xy=(Decimal(0 + start_point),
+                               self.min_top_elev - Decimal(self.height_row * Decimal(2.60) + self.height_row / 2)),
+                           fontsize=6,
+                           color=text_color, fontweight=text_weight,
+                           rotation='vertical', horizontalalignment='center', verticalalignment='center')
 
             # Fill elevation
-            plt.annotate(' ' + '\n' + str(self.nodes[0].descript['elev']) + '\n' + str(elev1),
-                         xy=(Decimal(0 + start_point),
-                             self.min_top_elev - Decimal(self.height_row * Decimal(3.40) + self.height_row / 2)),
-                         fontsize=6,
-                         color=text_color, fontweight=text_weight,
-                         rotation='vertical', horizontalalignment='center', verticalalignment='center')
+            self._annotate(' ' + '\n' + str(self.nodes[0].descript['elev']) + '\n' + str(elev1),
+                           xy=(Decimal(0 + start_point),
+                               self.min_top_elev - Decimal(self.height_row * Decimal(3.40) + self.height_row / 2)),
+                           fontsize=6,
+                           color=text_color, fontweight=text_weight,
+                           rotation='vertical', horizontalalignment='center', verticalalignment='center')
 
             # Fill total length
-            plt.annotate(str(self.nodes[index].descript['total_distance']),
-                         xy=(Decimal(0 + start_point),
-                             self.min_top_elev - Decimal(
-                                 self.height_row * Decimal(4.20) + self.height_row / 2)),
-                         fontsize=6,
-                         color=text_color, fontweight=text_weight,
-                         rotation='vertical', horizontalalignment='center', verticalalignment='center')
+            self._annotate(str(self.nodes[index].descript['total_distance']),
+                           xy=(Decimal(0 + start_point),
+                               self.min_top_elev - Decimal(
+                                   self.height_row * Decimal(4.20) + self.height_row / 2)),
+                           fontsize=6,
+                           color=text_color, fontweight=text_weight,
+                           rotation='vertical', horizontalalignment='center', verticalalignment='center')
 
         # Nodes between init and end
         elif index < self.n - 1:
@@ -939,58 +1132,58 @@ class GwProfileButton(GwAction):
                 self.none_values.append(self.nodes[index].descript['code'])
 
             # Fill y_max
-            plt.annotate(
-                str(y2_prev) + '\n' + str(self.nodes[index].descript['ymax']) + '\n' + str(y1),
-                xy=(Decimal(0 + start_point),
-                    self.min_top_elev - Decimal(self.height_row * Decimal(2.60) + self.height_row / 2)),
-                fontsize=6,
-                color=text_color, fontweight=text_weight,
-                rotation='vertical', horizontalalignment='center', verticalalignment='center')
+            self._annotate(
+                  str(y2_prev) + '\n' + str(self.nodes[index].descript['ymax']) + '\n' + str(y1),
+                  xy=(Decimal(0 + start_point),
+                      self.min_top_elev - Decimal(self.height_row * Decimal(2.60) + self.height_row / 2)),
+                  fontsize=6,
+                  color=text_color, fontweight=text_weight,
+                  rotation='vertical', horizontalalignment='center', verticalalignment='center')
 
             # Fill elevation
-            plt.annotate(
-                str(elev2_prev) + '\n' + str(self.nodes[index].descript['elev']) + '\n' + str(elev1),
-                xy=(Decimal(0 + start_point),
-                    self.min_top_elev - Decimal(self.height_row * Decimal(3.40) + self.height_row / 2)),
-                fontsize=6,
-                color=text_color, fontweight=text_weight,
-                rotation='vertical', horizontalalignment='center', verticalalignment='center')
+            self._annotate(
+                  str(elev2_prev) + '\n' + str(self.nodes[index].descript['elev']) + '\n' + str(elev1),
+                  xy=(Decimal(0 + start_point),
+                      self.min_top_elev - Decimal(self.height_row * Decimal(3.40) + self.height_row / 2)),
+                  fontsize=6,
+                  color=text_color, fontweight=text_weight,
+                  rotation='vertical', horizontalalignment='center', verticalalignment='center')
 
             # Fill total length
-            plt.annotate(str(self.nodes[index].descript['total_distance']),
-                         xy=(Decimal(0 + start_point),
-                         self.min_top_elev - Decimal(self.height_row * Decimal(4.20) + self.height_row / 2)),
-                         fontsize=6,
-                         color=text_color, fontweight=text_weight,
-                         rotation='vertical', horizontalalignment='center', verticalalignment='center')
+            self._annotate(str(self.nodes[index].descript['total_distance']),
+                           xy=(Decimal(0 + start_point),
+                           self.min_top_elev - Decimal(self.height_row * Decimal(4.20) + self.height_row / 2)),
+                           fontsize=6,
+                           color=text_color, fontweight=text_weight,
+                           rotation='vertical', horizontalalignment='center', verticalalignment='center')
         # Node end
         elif index == self.n - 1:
 
             # Fill y_max
-            plt.annotate(
-                str(self.nodes[index - 1].y2) + '\n' + str(self.nodes[index].descript['ymax']),
-                xy=(Decimal(0 + start_point),
-                    self.min_top_elev - Decimal(self.height_row * Decimal(2.60) + self.height_row / 2)),
-                fontsize=6,
-                color=text_color, fontweight=text_weight,
-                rotation='vertical', horizontalalignment='center', verticalalignment='center')
+            self._annotate(
+                  str(self.nodes[index - 1].y2) + '\n' + str(self.nodes[index].descript['ymax']),
+                  xy=(Decimal(0 + start_point),
+                      self.min_top_elev - Decimal(self.height_row * Decimal(2.60) + self.height_row / 2)),
+                  fontsize=6,
+                  color=text_color, fontweight=text_weight,
+                  rotation='vertical', horizontalalignment='center', verticalalignment='center')
 
             # Fill elevation
-            plt.annotate(
-                str(self.nodes[index - 1].elev2) + '\n' + str(self.nodes[index].descript['elev']),
-                xy=(Decimal(0 + start_point),
-                    self.min_top_elev - Decimal(self.height_row * Decimal(3.40) + self.height_row / 2)),
-                fontsize=6,
-                color=text_color, fontweight=text_weight,
-                rotation='vertical', horizontalalignment='center', verticalalignment='center')
+            self._annotate(
+                  str(self.nodes[index - 1].elev2) + '\n' + str(self.nodes[index].descript['elev']),
+                  xy=(Decimal(0 + start_point),
+                      self.min_top_elev - Decimal(self.height_row * Decimal(3.40) + self.height_row / 2)),
+                  fontsize=6,
+                  color=text_color, fontweight=text_weight,
+                  rotation='vertical', horizontalalignment='center', verticalalignment='center')
 
             # Fill total length
-            plt.annotate(str(self.nodes[index].descript['total_distance']),
-                         xy=(Decimal(0 + start_point),
-                         self.min_top_elev - Decimal(self.height_row * Decimal(4.20) + self.height_row / 2)),
-                         fontsize=6,
-                         color=text_color, fontweight=text_weight,
-                         rotation='vertical', horizontalalignment='center', verticalalignment='center')
+            self._annotate(str(self.nodes[index].descript['total_distance']),
+                           xy=(Decimal(0 + start_point),
+                           self.min_top_elev - Decimal(self.height_row * Decimal(4.20) + self.height_row / 2)),
+                           fontsize=6,
+                           color=text_color, fontweight=text_weight,
+                           rotation='vertical', horizontalalignment='center', verticalalignment='center')
 
 
         # Fill diameter and slope / length
@@ -998,18 +1191,18 @@ class GwProfileButton(GwAction):
 
             # Fill diameter
             center = self.gis_length[index + 1] / 2
-            plt.text(center + start_point, self.min_top_elev - 1 * self.height_row - Decimal(0.35) * self.height_row,
-                     self.arc_catalog[index],
-                     fontsize=7.5,
-                     color=text_color, fontweight=text_weight,
-                     horizontalalignment='center')  # PUT IN THE MIDDLE PARAMETRIZATION
+            self._text(center + start_point, self.min_top_elev - 1 * self.height_row - Decimal(0.35) * self.height_row,
+                       self.arc_catalog[index],
+                       fontsize=7.5,
+                       color=text_color, fontweight=text_weight,
+                       horizontalalignment='center')  # PUT IN THE MIDDLE PARAMETRIZATION
 
             # Fill slope / length
-            plt.text(center + start_point, self.min_top_elev - 1 * self.height_row - Decimal(0.68) * self.height_row,
-                     self.arc_dimensions[index],
-                     fontsize=7.5,
-                     color=text_color, fontweight=text_weight,
-                     horizontalalignment='center')  # PUT IN THE MIDDLE PARAMETRIZATION
+            self._text(center + start_point, self.min_top_elev - 1 * self.height_row - Decimal(0.68) * self.height_row,
+                       self.arc_dimensions[index],
+                       fontsize=7.5,
+                       color=text_color, fontweight=text_weight,
+                       horizontalalignment='center')  # PUT IN THE MIDDLE PARAMETRIZATION
 
 
     def _fill_guitar_text_terrain(self, start_point, index):
@@ -1023,41 +1216,41 @@ class GwProfileButton(GwAction):
             # Fill top_elevation
             s = ' ' + '\n' + str(self.links[index].descript['top_elev']) + '\n' + ' '
             xy = (Decimal(start_point), self.min_top_elev - Decimal(self.height_row * Decimal(1.8) + self.height_row / 2))
-            plt.annotate(s=s, xy=xy, fontsize=6, color=text_color, fontweight=text_weight, rotation='vertical',
-                         horizontalalignment='center', verticalalignment='center')
+            self._annotate(s=s, xy=xy, fontsize=6, color=text_color, fontweight=text_weight, rotation='vertical',
+                           horizontalalignment='center', verticalalignment='center')
 
             # Fill code
-            plt.text(0 + start_point, self.min_top_elev - Decimal(self.height_row * Decimal(5) + self.height_row / 2),
-                     self.links[index].descript['code'],
-                     fontsize=7.5,
-                     color=text_color, fontweight=text_weight,
-                     horizontalalignment='center', verticalalignment='center')
+            self._text(0 + start_point, self.min_top_elev - Decimal(self.height_row * Decimal(5) + self.height_row / 2),
+                       self.links[index].descript['code'],
+                       fontsize=7.5,
+                       color=text_color, fontweight=text_weight,
+                       horizontalalignment='center', verticalalignment='center')
 
             # Fill y_max
-            plt.annotate(
-                str(self.links[index].descript['ymax']),
-                xy=(Decimal(0 + start_point),
-                    self.min_top_elev - Decimal(self.height_row * Decimal(2.60) + self.height_row / 2)),
-                fontsize=6,
-                color=text_color, fontweight=text_weight,
-                rotation='vertical', horizontalalignment='center', verticalalignment='center')
+            self._annotate(
+                  str(self.links[index].descript['ymax']),
+                  xy=(Decimal(0 + start_point),
+                      self.min_top_elev - Decimal(self.height_row * Decimal(2.60) + self.height_row / 2)),
+                  fontsize=6,
+                  color=text_color, fontweight=text_weight,
+                  rotation='vertical', horizontalalignment='center', verticalalignment='center')
 
             # Fill elevation
-            plt.annotate(
-                str(self.links[index].descript['elev']),
-                xy=(Decimal(0 + start_point),
-                    self.min_top_elev - Decimal(self.height_row * Decimal(3.40) + self.height_row / 2)),
-                fontsize=6,
-                color=text_color, fontweight=text_weight,
-                rotation='vertical', horizontalalignment='center', verticalalignment='center')
+            self._annotate(
+                  str(self.links[index].descript['elev']),
+                  xy=(Decimal(0 + start_point),
+                      self.min_top_elev - Decimal(self.height_row * Decimal(3.40) + self.height_row / 2)),
+                  fontsize=6,
+                  color=text_color, fontweight=text_weight,
+                  rotation='vertical', horizontalalignment='center', verticalalignment='center')
 
             # Fill total length
-            plt.annotate(str(self.links[index].descript['total_distance']),
-                 xy=(Decimal(0 + start_point),
-                     self.min_top_elev - Decimal(self.height_row * Decimal(4.20) + self.height_row / 2)),
-                fontsize=6,
-                color=text_color, fontweight=text_weight,
-                rotation='vertical', horizontalalignment='center', verticalalignment='center')
+            self._annotate(str(self.links[index].descript['total_distance']),
+                   xy=(Decimal(0 + start_point),
+                       self.min_top_elev - Decimal(self.height_row * Decimal(4.20) + self.height_row / 2)),
+                  fontsize=6,
+                  color=text_color, fontweight=text_weight,
+                  rotation='vertical', horizontalalignment='center', verticalalignment='center')
 
 
     def _draw_end_node(self, node, prev_node, index):
@@ -1102,32 +1295,32 @@ class GwProfileButton(GwAction):
         ynsup = [s2y, s3y, s4y, i4y]
 
         # draw node bottom line
-        plt.plot(xninf, yninf,
-                 zorder=100,
-                 linestyle=self._get_stylesheet(node.data_type)[0],
-                 color=self._get_stylesheet(node.data_type)[1],
-                 linewidth=self._get_stylesheet(node.data_type)[2])
+        self._plot(xninf, yninf,
+                   zorder=100,
+                   linestyle=self._get_stylesheet(node.data_type)[0],
+                   color=self._get_stylesheet(node.data_type)[1],
+                   linewidth=self._get_stylesheet(node.data_type)[2])
 
         # draw node upper line
-        plt.plot(xnsup, ynsup,
-                 zorder=100,
-                 linestyle=self._get_stylesheet(node.data_type)[0],
-                 color=self._get_stylesheet(node.data_type)[1],
-                 linewidth=self._get_stylesheet(node.data_type)[2])
+        self._plot(xnsup, ynsup,
+                   zorder=100,
+                   linestyle=self._get_stylesheet(node.data_type)[0],
+                   color=self._get_stylesheet(node.data_type)[1],
+                   linewidth=self._get_stylesheet(node.data_type)[2])
 
         # draw arc bottom line
-        plt.plot(xainf, yainf,
-                 zorder=100,
-                 linestyle=self._get_stylesheet(self.lastnode_datatype)[0],
-                 color=self._get_stylesheet(self.lastnode_datatype)[1],
-                 linewidth=self._get_stylesheet(self.lastnode_datatype)[2])
+        self._plot(xainf, yainf,
+                   zorder=100,
+                   linestyle=self._get_stylesheet(self.lastnode_datatype)[0],
+                   color=self._get_stylesheet(self.lastnode_datatype)[1],
+                   linewidth=self._get_stylesheet(self.lastnode_datatype)[2])
 
         # draw arc upper line
-        plt.plot(xasup, yasup,
-                 zorder=100,
-                 linestyle=self._get_stylesheet(self.lastnode_datatype)[0],
-                 color=self._get_stylesheet(self.lastnode_datatype)[1],
-                 linewidth=self._get_stylesheet(self.lastnode_datatype)[2])
+        self._plot(xasup, yasup,
+                   zorder=100,
+                   linestyle=self._get_stylesheet(self.lastnode_datatype)[0],
+                   color=self._get_stylesheet(self.lastnode_datatype)[1],
+                   linewidth=self._get_stylesheet(self.lastnode_datatype)[2])
 
         self.first_top_x = self.slast2[0]
         self.first_top_y = self.slast2[1]
@@ -1192,30 +1385,30 @@ class GwProfileButton(GwAction):
         # Draw upper horizontal lines (long ones)
         x = [self.nodes[self.n - 1].start_point, self.nodes[0].start_point - self.fix_x]
         y = [self.min_top_elev - self.height_row, self.min_top_elev - self.height_row]
-        plt.plot(x, y, color=line_color, linestyle=line_style, linewidth=line_width, zorder=100)
+        self._plot(x, y, color=line_color, linestyle=line_style, linewidth=line_width, zorder=100)
 
         x = [self.nodes[self.n - 1].start_point, self.nodes[0].start_point - self.fix_x]
         y = [self.min_top_elev - Decimal(1.9) * self.height_row, self.min_top_elev - Decimal(1.9) * self.height_row]
-        plt.plot(x, y, color=line_color, linestyle=line_style, linewidth=line_width, zorder=100)
+        self._plot(x, y, color=line_color, linestyle=line_style, linewidth=line_width, zorder=100)
 
         # Draw middle horizontal lines (short ones)
         x = [self.nodes[self.n - 1].start_point, self.nodes[0].start_point - self.fix_x * Decimal(0.75)]
         y = [self.min_top_elev - Decimal(2.70) * self.height_row, self.min_top_elev - Decimal(2.70) * self.height_row]
-        plt.plot(x, y, color=line_color, linestyle=line_style, linewidth=line_width, zorder=100)
+        self._plot(x, y, color=line_color, linestyle=line_style, linewidth=line_width, zorder=100)
         x = [self.nodes[self.n - 1].start_point, self.nodes[0].start_point - self.fix_x * Decimal(0.75)]
         y = [self.min_top_elev - Decimal(3.50) * self.height_row, self.min_top_elev - Decimal(3.50) * self.height_row]
-        plt.plot(x, y, color=line_color, linestyle=line_style, linewidth=line_width, zorder=100)
+        self._plot(x, y, color=line_color, linestyle=line_style, linewidth=line_width, zorder=100)
         x = [self.nodes[self.n - 1].start_point, self.nodes[0].start_point - self.fix_x * Decimal(0.75)]
         y = [self.min_top_elev - Decimal(4.30) * self.height_row, self.min_top_elev - Decimal(4.30) * self.height_row]
-        plt.plot(x, y, color=line_color, linestyle=line_style, linewidth=line_width, zorder=100)
+        self._plot(x, y, color=line_color, linestyle=line_style, linewidth=line_width, zorder=100)
 
         # Draw lower horizontal lines (long ones)
         x = [self.nodes[self.n - 1].start_point, self.nodes[0].start_point - self.fix_x]
         y = [self.min_top_elev - Decimal(5.10) * self.height_row, self.min_top_elev - Decimal(5.10) * self.height_row]
-        plt.plot(x, y, color=line_color, linestyle=line_style, linewidth=line_width, zorder=100)
+        self._plot(x, y, color=line_color, linestyle=line_style, linewidth=line_width, zorder=100)
         x = [self.nodes[self.n - 1].start_point, self.nodes[0].start_point - self.fix_x]
         y = [self.min_top_elev - Decimal(5.85) * self.height_row, self.min_top_elev - Decimal(5.85) * self.height_row]
-        plt.plot(x, y, color=line_color, linestyle=line_style, linewidth=line_width, zorder=100)
+        self._plot(x, y, color=line_color, linestyle=line_style, linewidth=line_width, zorder=100)
 
 
     def _draw_grid(self):
@@ -1242,22 +1435,22 @@ class GwProfileButton(GwAction):
             reference_plane = self.profile_json['body']['data']['legend']['referencePlane']
         except KeyError:
             reference_plane = "REFERENCE"
-        plt.text(-self.fix_x * Decimal(1), self.min_top_elev - Decimal(0.5) * self.height_row - self.height_row / 2,
-                 f"{reference_plane}: {round(self.min_top_elev - 1 * self.height_row, 2)}\n ",
-                 fontsize=8.5,
-                 color=text_color, fontweight=text_weight,
-                 verticalalignment='center')
+        self._text(-self.fix_x * Decimal(1), self.min_top_elev - Decimal(0.5) * self.height_row - self.height_row / 2,
+                   f"{reference_plane}: {round(self.min_top_elev - 1 * self.height_row, 2)}\n ",
+                   fontsize=8.5,
+                   color=text_color, fontweight=text_weight,
+                   verticalalignment='center')
 
         # Draw boundary
         x = [0, 0]
         y = [self.min_top_elev - 1 * self.height_row, int(math.ceil(self.max_top_elev) + 1)]
-        plt.plot(x, y, color=boundary_color, linestyle=boundary_style, linewidth=boundary_width, zorder=100)
+        self._plot(x, y, color=boundary_color, linestyle=boundary_style, linewidth=boundary_width, zorder=100)
         x = [start_point, start_point]
         y = [self.min_top_elev - 1 * self.height_row, int(math.ceil(self.max_top_elev) + 1)]
-        plt.plot(x, y, color=boundary_color, linestyle=boundary_style, linewidth=boundary_width, zorder=100)
+        self._plot(x, y, color=boundary_color, linestyle=boundary_style, linewidth=boundary_width, zorder=100)
         x = [0, start_point]
         y = [int(math.ceil(self.max_top_elev) + 1), int(math.ceil(self.max_top_elev) + 1)]
-        plt.plot(x, y, color=boundary_color, linestyle=boundary_style, linewidth=boundary_width, zorder=100)
+        self._plot(x, y, color=boundary_color, linestyle=boundary_style, linewidth=boundary_width, zorder=100)
 
         # Draw horitzontal lines
         y = int(math.ceil(self.min_top_elev - 1 * self.height_row))
@@ -1277,17 +1470,17 @@ class GwProfileButton(GwAction):
                 y1 = [i, i]
 
             # set line
-            plt.plot(x1, y1, color=line_color, linestyle=line_style, linewidth=line_width, zorder=1)
+            self._plot(x1, y1, color=line_color, linestyle=line_style, linewidth=line_width, zorder=1)
 
             # set texts
-            plt.text(0 - Decimal(geom1) * Decimal(1.5), i, str(i),
-                     fontsize=7.5,
-                     color=text_color, fontweight=text_weight,
-                     horizontalalignment='right', verticalalignment='center')
-            plt.text(Decimal(start_point) + Decimal(geom1) * Decimal(1.5), i, str(i),
-                     fontsize=7.5,
-                     color=text_color, fontweight=text_weight,
-                     horizontalalignment='left', verticalalignment='center')
+            self._text(0 - Decimal(geom1) * Decimal(1.5), i, str(i),
+                       fontsize=7.5,
+                       color=text_color, fontweight=text_weight,
+                       horizontalalignment='right', verticalalignment='center')
+            self._text(Decimal(start_point) + Decimal(geom1) * Decimal(1.5), i, str(i),
+                       fontsize=7.5,
+                       color=text_color, fontweight=text_weight,
+                       horizontalalignment='left', verticalalignment='center')
 
         # Draw vertical lines
         x = int(math.floor(start_point))
@@ -1296,11 +1489,11 @@ class GwProfileButton(GwAction):
             y1 = [self.min_top_elev - 1 * self.height_row, int(math.ceil(self.max_top_elev) + 1)]
 
             # set line
-            plt.plot(x1, y1, color=line_color, linestyle=line_style, linewidth=line_width, zorder=1)
+            self._plot(x1, y1, color=line_color, linestyle=line_style, linewidth=line_width, zorder=1)
 
             # set texts
-            plt.annotate(str(i) + '\n' + ' ', xy=(i, int(math.ceil(self.max_top_elev) + 1)),
-                         fontsize=6.5, color=text_color, fontweight=text_weight, horizontalalignment='center')
+            self._annotate(str(i) + '\n' + ' ', xy=(i, int(math.ceil(self.max_top_elev) + 1)),
+                           fontsize=6.5, color=text_color, fontweight=text_weight, horizontalalignment='center')
 
 
     def _draw_terrain(self, index):
@@ -1312,14 +1505,14 @@ class GwProfileButton(GwAction):
 
         # Draw marker
         if index == 1:
-            plt.plot(self.first_top_x, self.first_top_y, marker='|', color=line_color)
+            self._plot(self.first_top_x, self.first_top_y, marker='|', color=line_color)
         else:
-            plt.plot(self.node_top_x, self.node_top_y, marker='|', color=line_color)
+            self._plot(self.node_top_x, self.node_top_y, marker='|', color=line_color)
 
         # Draw line
         x = [self.first_top_x, self.node_top_x]
         y = [self.first_top_y, self.node_top_y]
-        plt.plot(x, y, color=line_color, linewidth=line_width, linestyle=line_style)
+        self._plot(x, y, color=line_color, linewidth=line_width, linestyle=line_style)
 
 
     def _clear_profile(self):
@@ -5,19 +5,18 @@ General Public License as published by the Free Software Foundation, either vers
 or (at your option) any later version.
 """
 # -*- coding: utf-8 -*-
-import csv
-import json
 import os
 from functools import partial
 
-from qgis.PyQt.QtGui import QStandardItem, QStandardItemModel
 from qgis.PyQt.QtWidgets import QFileDialog
+from qgis.core import QgsApplication
 
 from ..dialog import GwAction
+from ...threads.csv_import import GwCsvImportTask
 from ...ui.ui_manager import GwCsvUi
 from ...utils import tools_gw
 from .... import global_vars
-from ....lib import tools_qt, tools_log, tools_db, tools_qgis, tools_os
+from ....lib import tools_qt, tools_log, tools_db, tools_qgis
 
 
 class GwCSVButton(GwAction):
@@ -54,6 +53,7 @@ class GwCSVButton(GwAction):
     def _open_csv(self):
 
         self.func_name = None
+        self.csv_model = None
         self.dlg_csv = GwCsvUi()
         tools_gw.load_settings(self.dlg_csv)
 
@@ -69,8 +69,8 @@ class GwCSVButton(GwAction):
         self.dlg_csv.rb_space.setChecked(False)
 
         # Signals
-        self.dlg_csv.btn_cancel.clicked.connect(partial(tools_gw.close_dialog, self.dlg_csv))
-        self.dlg_csv.rejected.connect(partial(tools_gw.close_dialog, self.dlg_csv))
+        self.dlg_csv.btn_cancel.clicked.connect(partial(self._close_dialog, self.dlg_csv))
+        self.dlg_csv.rejected.connect(partial(self._close_dialog, self.dlg_csv))
         self.dlg_csv.btn_accept.clicked.connect(partial(self._write_csv, self.dlg_csv, temp_tablename))
         self.dlg_csv.cmb_import_type.currentIndexChanged.connect(partial(self._update_info, self.dlg_csv))
         self.dlg_csv.cmb_import_type.currentIndexChanged.connect(partial(self._get_function_name))
@@ -134,44 +134,23 @@ class GwCSVButton(GwAction):
 
 
     def _write_csv(self, dialog, temp_tablename):
-        """ Write csv in postgres and call gw_fct_utils_csv2pg function """
+        """ Load csv into table @temp_tablename and call import function in a background task """
 
         self.save_settings_values()
-        insert_status = True
         if not self._validate_params(dialog):
             return
 
-        fid_aux = tools_qt.get_combo_value(dialog, dialog.cmb_import_type, 0)
-        self._delete_table_csv(temp_tablename, fid_aux)
-        path = tools_qt.get_text(dialog, dialog.txt_file_csv)
-        label_aux = tools_qt.get_text(dialog, dialog.txt_import, return_string_null=False)
-        delimiter = self._get_delimiter(dialog)
-        _unicode = tools_qt.get_text(dialog, dialog.cmb_unicode_list)
+        # Manage if task is already running
+        if hasattr(self, 'csv_task') and self.csv_task is not None:
+            try:
+                if self.csv_task.isActive():
+                    message = "Import csv task is already active!"
+                    tools_qgis.show_warning(message)
+                    return
+            except RuntimeError:
+                pass
 
-        try:
-            with open(path, 'r', encoding=_unicode) as csvfile:
-                insert_status = self._insert_into_db(dialog, csvfile, delimiter, _unicode)
-                csvfile.close()
-                del csvfile
-        except Exception as e:
-            tools_qgis.show_warning("EXCEPTION: " + str(e))
-
-        if insert_status is False:
-            return
-
-        extras = f'"importParam":"{label_aux}"'
-        extras += f', "fid":"{fid_aux}"'
-        body = tools_gw.create_body(extras=extras)
-
-        result = tools_gw.execute_procedure(self.func_name, body)
-        if not result:
-            return
-        else:
-            if result['status'] == "Accepted":
-                tools_gw.fill_tab_log(dialog, result['body']['data'], close=False)
-            if 'message' in result:
-                msg = result['message']['text']
-                tools_qt.show_info_box(msg)
+        self._insert_into_db(dialog, temp_tablename)
 
 
     def _update_info(self, dialog):
@@ -219,19 +198,35 @@ class GwCSVButton(GwAction):
             return
 
         delimiter = self._get_delimiter(dialog)
-        model = QStandardItemModel()
         _unicode = tools_qt.get_text(dialog, dialog.cmb_unicode_list)
         _ignoreheader = dialog.chk_ignore_header.isChecked()
-        dialog.tbl_csv.setModel(model)
-        dialog.tbl_csv.horizontalHeader().setStretchLastSection(True)
 
         try:
-            with open(path, "r", encoding=_unicode) as file_input:
-                self._read_csv_file(model, file_input, delimiter, _unicode, _ignoreheader)
+            # Same file: only visible rows are parsed again
+            if self.csv_model is not None and self.csv_model.is_file(path):
+                self.csv_model.set_format(_unicode, delimiter, _ignoreheader)
+                return
+
+            # Release previous file once the view no longer shows it (on Windows a mapped file can't be modified)
+            csv_model = tools_qt.GwCsvTableModel(path, _unicode, delimiter, _ignoreheader)
+            dialog.tbl_csv.setModel(csv_model)
+            dialog.tbl_csv.horizontalHeader().setStretchLastSection(True)
+            self._close_csv_model()
+            self.csv_model = csv_model
         except Exception as e:
             tools_qgis.show_warning(str(e))
 
 
+    def _close_csv_model(self):
+        """ Release file of current preview """
+
+        if self.csv_model is None:
+            return
+
+        self.csv_model.close()
+        self.csv_model = None
+
+
     def _load_settings_values(self):
         """ Load QGIS settings related with csv options """
 
@@ -275,14 +270,6 @@ class GwCSVButton(GwAction):
         return True
 
 
-    def _delete_table_csv(self, temp_tablename, fid_aux):
-        """ Delete records from temp_csv for current user and selected cat """
-
-        sql = (f"DELETE FROM {temp_tablename} "
-               f"WHERE fid = '{fid_aux}' AND cur_user = current_user")
-        tools_db.execute_sql(sql)
-
-
     def _get_delimiter(self, dialog):
 
         delimiter = ';'
@@ -295,54 +282,56 @@ class GwCSVButton(GwAction):
         return delimiter
 
 
-    def _insert_into_db(self, dialog, csvfile, delimiter, _unicode):
-
-        progress = 0
-        dialog.progressBar.setVisible(True)
-        dialog.progressBar.setValue(progress)
-        # Counts rows in csvfile, using var "row_count" to do progressbar
-        # noinspection PyUnusedLocal
-        row_count = sum(1 for rows in csvfile)
-        if row_count > 20:
-            row_count -= 20  # -20 for see 100% complete progress
-        dialog.progressBar.setMaximum(100)
-        csvfile.seek(0)  # Position the cursor at position 0 of the file
-        reader = csv.reader(csvfile, delimiter=delimiter,)
-        fid_aux = tools_qt.get_combo_value(dialog, dialog.cmb_import_type, 0)
-        ignoreheader = dialog.chk_ignore_header.isChecked()
-        fields = []
-        cont = 1
-        for row in reader:
-            field = {'fid': fid_aux}
-            if tools_os.set_boolean(ignoreheader) is True:
-                ignoreheader = False
-                continue
-
-            for x in range(0, len(row)):
-                value = row[x].strip().replace("\n", "")
-                field[f"csv{x + 1}"] = f"{value}" if value else None
-            fields.append(field)
-            cont += 1
-            progress = (100 * cont) / row_count
-            dialog.progressBar.setValue(progress)
-        dialog.progressBar.setValue(100)
-        if not fields:
-            return False
+    def _insert_into_db(self, dialog, temp_tablename):
+        """ Set background task 'Import csv' """
 
-        decimal_sep = "null"
+        decimal_sep = None
         if dialog.rb_dec_comma.isChecked():
-            decimal_sep = '","'
+            decimal_sep = ','
         elif dialog.rb_dec_period.isChecked():
-            decimal_sep = '"."'
+            decimal_sep = '.'
+
+        params = {'path': tools_qt.get_text(dialog, dialog.txt_file_csv),
+                  'unicode': tools_qt.get_text(dialog, dialog.cmb_unicode_list),
+                  'delimiter': self._get_delimiter(dialog),
+                  'ignore_header': dialog.chk_ignore_header.isChecked(),
+                  'decimal_sep': decimal_sep,
+                  'fid': tools_qt.get_combo_value(dialog, dialog.cmb_import_type, 0),
+                  'label': tools_qt.get_text(dialog, dialog.txt_import, return_string_null=False),
+                  'function_name': self.func_name,
+                  'temp_tablename': temp_tablename}
+
+        dialog.btn_accept.setEnabled(False)
+        dialog.progressBar.setMaximum(100)
+        dialog.progressBar.setValue(0)
+        dialog.progressBar.setVisible(True)
 
-        values = f'"separator": {decimal_sep}, "values":{(json.dumps(fields, ensure_ascii=False).encode(_unicode)).decode()}'
-        body = tools_gw.create_body(extras=values)
-        result = tools_gw.execute_procedure('gw_fct_setcsv', body)
+        description = "Import csv"
+        self.csv_task = GwCsvImportTask(description, dialog, params)
+        self.csv_task.progressChanged.connect(partial(self._set_progress, dialog))
+        QgsApplication.taskManager().addTask(self.csv_task)
+        QgsApplication.taskManager().triggerTask(self.csv_task)
 
-        if result and 'status' in result and result['status'] == 'Accepted':
-            return True
 
-        return False
+    def _set_progress(self, dialog, progress):
+
+        try:
+            dialog.progressBar.setValue(int(progress))
+        except RuntimeError:
+            pass
+
+
+    def _close_dialog(self, dialog):
+        """ Cancel running import (if any) and close dialog """
+
+        if hasattr(self, 'csv_task') and self.csv_task is not None:
+            try:
+                if self.csv_task.isActive():
+                    self.csv_task.cancel()
+            except RuntimeError:
+                pass
+        self._close_csv_model()
+        tools_gw.close_dialog(dialog)
 
 
     def _get_path(self, dialog):
@@ -361,18 +350,6 @@ class GwCSVButton(GwAction):
         return path
 
 
-    def _read_csv_file(self, model, file_input, delimiter, _unicode, _ignoreheader):
-
-        rows = csv.reader(file_input, delimiter=delimiter)
-        for row in rows:
-            if tools_os.set_boolean(_ignoreheader) is True:
-                _ignoreheader = False
-                continue
-            unicode_row = [x for x in row]
-            items = [QStandardItem(field) for field in unicode_row]
-            model.appendRow(items)
-
-
     def _get_rolenames(self):
         """ Get list of rolenames of current user """
 
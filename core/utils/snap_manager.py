@@ -5,12 +5,15 @@ General Public License as published by the Free Software Foundation, either vers
 or (at your option) any later version.
 """
 # -*- coding: utf-8 -*-
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from functools import partial
 
 from qgis.PyQt.QtCore import QPoint
 from qgis.PyQt.QtGui import QColor
 from qgis.core import QgsProject, QgsPointXY, QgsVectorLayer, QgsPointLocator, QgsSnappingConfig, QgsSnappingUtils, \
-    QgsTolerance, QgsFeatureRequest
+    QgsTolerance, QgsFeature, QgsFeatureRequest
 from qgis.gui import QgsVertexMarker, QgsMapCanvas, QgsMapToolEmitPoint
 
 from ... import global_vars
@@ -18,6 +21,53 @@ from ...lib import tools_qgis
 from . import tools_gw
 
 
+# Recently snapped features {layer_id: OrderedDict{fid: (attributes, feature)}}. Shared by all snap managers
+# Only used from Qt main thread
+_snapped_features = {}
+_snapped_features_size = 50             # Max features cached per layer
+# Layers (None for all of them) reset from other threads. Main thread discards them at the next lookup
+_snapped_features_stale = set()
+_snapped_features_lock = threading.Lock()
+
+
+def reset_snapped_features(layer_id=None):
+    """ Discard cached snapped features of layer @layer_id (all layers if None)
+    If called from another thread, features are discarded by Qt main thread before its next lookup
+    """
+
+    if threading.current_thread() is not threading.main_thread():
+        with _snapped_features_lock:
+            _snapped_features_stale.add(layer_id)
+        return
+
+    _clear_snapped_features(layer_id)
+
+
+def _clear_snapped_features(layer_id=None):
+
+    # Keep layer entries: their signals are already connected
+    for key, features in _snapped_features.items():
+        if layer_id in (None, key):
+            features.clear()
+
+
+def _clear_stale_snapped_features():
+    """ Discard features of layers reset from other threads """
+
+    if not _snapped_features_stale:
+        return
+    with _snapped_features_lock:
+        stale = list(_snapped_features_stale)
+        _snapped_features_stale.clear()
+    for layer_id in stale:
+        _clear_snapped_features(layer_id)
+
+
+def _on_layer_data_changed(layer_id, *args):
+
+    reset_snapped_features(layer_id)
+
+
 class GwSnapManager(object):
 
     def __init__(self, iface):
@@ -25,6 +75,7 @@ class GwSnapManager(object):
         self.iface = iface
         self.canvas = self.iface.mapCanvas()
         self.previous_snapping = None
+        self.staged_changes = 0
         self.is_valid = False
         self.point_xy = {"x": None, "y": None}
 
@@ -70,10 +121,47 @@ class GwSnapManager(object):
         self.previous_snapping = self.snapping_config
 
 
+    def begin_snapping_changes(self):
+        """ Stage snapping changes until apply_snapping_changes is called. Calls can be nested
+            Prefer snapping_changes(), which always applies them even if an exception is raised
+        """
+
+        if self.staged_changes == 0:
+            # Keep a copy of the current configuration so it can be restored with recover_snapping_options
+            self.snapping_config = self.get_snapping_options()
+            self.previous_snapping = QgsSnappingConfig(self.snapping_config)
+            self.snapping_config.setEnabled(True)
+            self.set_snapping_layers()
+        self.staged_changes += 1
+
+
+    def apply_snapping_changes(self):
+        """ Apply staged snapping changes to the project with a single configuration update """
+
+        if self.staged_changes == 0:
+            return
+
+        self.staged_changes -= 1
+        if self.staged_changes == 0:
+            self.restore_snap_options(self.snapping_config)
+
+
+    @contextmanager
+    def snapping_changes(self):
+        """ Context manager that stages snapping changes and applies them on exit, even if an exception is raised """
+
+        self.begin_snapping_changes()
+        try:
+            yield self
+        finally:
+            self.apply_snapping_changes()
+
+
     def set_snapping_status(self, enable=False):
         """ Enable/Disable snapping of all layers """
 
-        QgsProject.instance().blockSignals(True)
+        if not self.staged_changes:
+            QgsProject.instance().blockSignals(True)
 
         layers = tools_qgis.get_project_layers()
         # Loop through all the layers in the project
@@ -84,8 +172,9 @@ class GwSnapManager(object):
             layer_settings.setEnabled(enable)
             self.snapping_config.setIndividualLayerSettings(layer, layer_settings)
 
-        QgsProject.instance().blockSignals(False)
-        QgsProject.instance().snappingConfigChanged.emit(self.snapping_config)
+        if not self.staged_changes:
+            QgsProject.instance().blockSignals(False)
+            QgsProject.instance().snappingConfigChanged.emit(self.snapping_config)
 
 
     def set_snap_mode(self, mode=3):
@@ -93,6 +182,10 @@ class GwSnapManager(object):
         :param mode: 1 = ActiveLayer, 2=AllLayers, 3=AdvancedConfiguration (int or SnappingMode)
         """
 
+        if self.staged_changes:
+            self.snapping_config.setMode(mode)
+            return
+
         snapping_options = self.get_snapping_options()
         if snapping_options:
             QgsProject.instance().blockSignals(True)
@@ -105,70 +198,35 @@ class GwSnapManager(object):
     def config_snap_to_arc(self):
         """ Set snapping to 'arc' """
 
-        QgsProject.instance().blockSignals(True)
-        self.set_snapping_layers()
+        if not self.staged_changes:
+            self.set_snapping_layers()
         segment_flag = tools_gw.get_segment_flag(2)
-        layer_settings = self.config_snap_to_layer(self.layer_arc, QgsPointLocator.All, True)
-        if layer_settings:
-            tools_gw.set_snapping_type(layer_settings, segment_flag)
-            layer_settings.setTolerance(15)
-            layer_settings.setEnabled(True)
-        else:
-            layer_settings = QgsSnappingConfig.IndividualLayerSettings(True, segment_flag, 15, 1)
-        self.snapping_config.setIndividualLayerSettings(self.layer_arc, layer_settings)
-        self.restore_snap_options(self.snapping_config)
+        self._config_snap_to_feature_layer(self.layer_arc, QgsPointLocator.All, segment_flag)
 
 
     def config_snap_to_node(self):
         """ Set snapping to 'node' """
 
-        QgsProject.instance().blockSignals(True)
         vertex_flag = tools_gw.get_vertex_flag(1)
-        layer_settings = self.config_snap_to_layer(self.layer_node, QgsPointLocator.Vertex, True)
-        if layer_settings:
-            tools_gw.set_snapping_type(layer_settings, vertex_flag)
-            layer_settings.setTolerance(15)
-            layer_settings.setEnabled(True)
-        else:
-            layer_settings = QgsSnappingConfig.IndividualLayerSettings(True, vertex_flag, 15, 1)
-        self.snapping_config.setIndividualLayerSettings(self.layer_node, layer_settings)
-        self.restore_snap_options(self.snapping_config)
+        self._config_snap_to_feature_layer(self.layer_node, QgsPointLocator.Vertex, vertex_flag)
 
 
     def config_snap_to_connec(self):
         """ Set snapping to 'connec' """
 
-        QgsProject.instance().blockSignals(True)
-        snapping_config = self.get_snapping_options()
+        if not self.staged_changes:
+            self.layer_connec = tools_qgis.get_layer_by_tablename('v_edit_connec')
         vertex_flag = tools_gw.get_vertex_flag(1)
-        layer_settings = self.config_snap_to_layer(tools_qgis.get_layer_by_tablename('v_edit_connec'),
-            QgsPointLocator.Vertex, True)
-        if layer_settings:
-            tools_gw.set_snapping_type(layer_settings, vertex_flag)
-            layer_settings.setTolerance(15)
-            layer_settings.setEnabled(True)
-        else:
-            layer_settings = QgsSnappingConfig.IndividualLayerSettings(True, vertex_flag, 15, 1)
-        snapping_config.setIndividualLayerSettings(tools_qgis.get_layer_by_tablename('v_edit_connec'), layer_settings)
-        self.restore_snap_options(self.snapping_config)
+        self._config_snap_to_feature_layer(self.layer_connec, QgsPointLocator.Vertex, vertex_flag)
 
 
     def config_snap_to_gully(self):
         """ Set snapping to 'gully' """
 
-        QgsProject.instance().blockSignals(True)
-        snapping_config = self.get_snapping_options()
+        if not self.staged_changes:
+            self.layer_gully = tools_qgis.get_layer_by_tablename('v_edit_gully')
         vertex_flag = tools_gw.get_vertex_flag(1)
-        layer_settings = self.config_snap_to_layer(tools_qgis.get_layer_by_tablename('v_edit_gully'),
-            QgsPointLocator.Vertex, True)
-        if layer_settings:
-            tools_gw.set_snapping_type(layer_settings, vertex_flag)
-            layer_settings.setTolerance(15)
-            layer_settings.setEnabled(True)
-        else:
-            layer_settings = QgsSnappingConfig.IndividualLayerSettings(True, vertex_flag, 15, 1)
-        snapping_config.setIndividualLayerSettings(tools_qgis.get_layer_by_tablename('v_edit_gully'), layer_settings)
-        self.restore_snap_options(self.snapping_config)
+        self._config_snap_to_feature_layer(self.layer_gully, QgsPointLocator.Vertex, vertex_flag)
 
 
     def config_snap_to_layer(self, layer, point_locator=QgsPointLocator.All, set_settings=False):
@@ -188,12 +246,19 @@ class GwSnapManager(object):
     def restore_snap_options(self, snappings_options):
         """ Function that applies selected snapping configuration """
 
-        QgsProject.instance().blockSignals(True)
         if snappings_options is None and self.snapping_config:
             snappings_options = self.snapping_config
+
+        # Changes are being staged: the configuration will be applied by apply_snapping_changes
+        if self.staged_changes:
+            if snappings_options is not self.snapping_config:
+                self.snapping_config = QgsSnappingConfig(snappings_options)
+            return
+
+        QgsProject.instance().blockSignals(True)
         QgsProject.instance().setSnappingConfig(snappings_options)
         QgsProject.instance().blockSignals(False)
-        QgsProject.instance().snappingConfigChanged.emit(self.snapping_config)
+        QgsProject.instance().snappingConfigChanged.emit(snappings_options)
 
 
     def recover_snapping_options(self):
@@ -318,7 +383,11 @@ class GwSnapManager(object):
         return feature_id
 
 
-    def get_snapped_feature(self, result, select_feature=False):
+    def get_snapped_feature(self, result, select_feature=False, attributes=None, use_cache=True):
+        """ Return snapped feature. Recently snapped features are cached until their layer is edited
+        :param attributes: List of field names to fetch, without geometry. All fields and geometry if None
+        :param use_cache: If False, read current values of the feature from its layer (and refresh the cache)
+        """
 
         if not result.isValid():
             return None
@@ -327,8 +396,15 @@ class GwSnapManager(object):
         try:
             layer = result.layer()
             feature_id = result.featureId()
-            feature_request = QgsFeatureRequest().setFilterFid(feature_id)
-            snapped_feat = next(layer.getFeatures(feature_request))
+            if use_cache:
+                snapped_feat = self._get_cached_feature(layer, feature_id, attributes)
+            if snapped_feat is None:
+                feature_request = QgsFeatureRequest().setFilterFid(feature_id)
+                if attributes is not None:
+                    feature_request.setFlags(QgsFeatureRequest.NoGeometry)
+                    feature_request.setSubsetOfAttributes(attributes, layer.fields())
+                snapped_feat = next(layer.getFeatures(feature_request))
+                self._set_cached_feature(layer, feature_id, attributes, snapped_feat)
             if select_feature and snapped_feat:
                 self._select_snapped_feature(result, feature_id)
         except Exception:
@@ -374,6 +450,19 @@ class GwSnapManager(object):
 
     # region private functions
 
+    def _config_snap_to_feature_layer(self, layer, point_locator, type_flag):
+        """ Enable snapping to @layer with @type_flag and apply it (or stage it if changes are being staged) """
+
+        layer_settings = self.config_snap_to_layer(layer, point_locator, True)
+        if layer_settings:
+            tools_gw.set_snapping_type(layer_settings, type_flag)
+            layer_settings.setTolerance(15)
+            layer_settings.setEnabled(True)
+        else:
+            layer_settings = QgsSnappingConfig.IndividualLayerSettings(True, type_flag, 15, 1)
+        self.snapping_config.setIndividualLayerSettings(layer, layer_settings)
+        self.restore_snap_options(self.snapping_config)
+
 
     def _get_mouse_move(self, vertex_marker, point):
 
@@ -404,6 +493,46 @@ class GwSnapManager(object):
         vertex_marker.hide()
 
 
+    def _get_cached_feature(self, layer, feature_id, attributes=None):
+        """ Return a copy of cached feature @feature_id of @layer if it has all requested @attributes """
+
+        _clear_stale_snapped_features()
+        features = _snapped_features.get(layer.id())
+        if not features or feature_id not in features:
+            return None
+
+        cached_attributes, feature = features[feature_id]
+        if cached_attributes is not None and (attributes is None or not cached_attributes.issuperset(attributes)):
+            return None
+
+        features.move_to_end(feature_id)
+        return QgsFeature(feature)
+
+
+    def _set_cached_feature(self, layer, feature_id, attributes, feature):
+        """ Cache @feature of @layer. Whole layer cache is discarded when its data changes """
+
+        _clear_stale_snapped_features()
+        features = _snapped_features.get(layer.id())
+        if features is None:
+            features = _snapped_features[layer.id()] = OrderedDict()
+            on_changed = partial(_on_layer_data_changed, layer.id())
+            layer.dataChanged.connect(on_changed)
+            layer.featureAdded.connect(on_changed)
+            layer.featureDeleted.connect(on_changed)
+            layer.attributeValueChanged.connect(on_changed)
+            layer.geometryChanged.connect(on_changed)
+            layer.subsetStringChanged.connect(on_changed)
+            layer.willBeDeleted.connect(partial(_snapped_features.pop, layer.id(), None))
+
+        if attributes is not None:
+            attributes = frozenset(attributes)
+        features[feature_id] = (attributes, QgsFeature(feature))
+        features.move_to_end(feature_id)
+        while len(features) > _snapped_features_size:
+            features.popitem(last=False)
+
+
     def _select_snapped_feature(self, result, feature_id):
 
         if not result.isValid():
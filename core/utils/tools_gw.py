@@ -12,6 +12,8 @@ import random
 import re
 import sys
 import sqlite3
+import threading
+import time
 import webbrowser
 
 if 'nt' in sys.builtin_module_names:
@@ -19,7 +21,7 @@ if 'nt' in sys.builtin_module_names:
 from collections import OrderedDict
 from functools import partial
 
-from qgis.PyQt.QtCore import Qt, QStringListModel, QVariant, QDate, QSettings, QLocale
+from qgis.PyQt.QtCore import Qt, QStringListModel, QVariant, QDate, QSettings, QLocale, QTimer
 from qgis.PyQt.QtGui import QCursor, QPixmap, QColor, QFontMetrics, QStandardItemModel, QIcon, QStandardItem, \
     QIntValidator, QDoubleValidator
 from qgis.PyQt.QtSql import QSqlTableModel
@@ -33,6 +35,7 @@ from qgis.core import Qgis, QgsProject, QgsPointXY, QgsVectorLayer, QgsField, Qg
 from qgis.gui import QgsDateTimeEdit, QgsRubberBand
 
 from ..models.cat_feature import GwCatFeature
+from ..threads.search_execute import GwSearchWorker
 from ..ui.dialog import GwDialog
 from ..ui.main_window import GwMainWindow
 from ..ui.docker import GwDocker
@@ -40,11 +43,28 @@ from ..ui.ui_manager import GwSelectorUi
 from . import tools_backend_calls
 from ..load_project_menu import GwMenuLoad
 from ..utils.select_manager import GwSelectManager
-from ..utils.snap_manager import GwSnapManager
+from ..utils.snap_manager import GwSnapManager, reset_snapped_features
 from ... import global_vars
 from ...lib import tools_qgis, tools_qt, tools_log, tools_os, tools_db
 from ...lib.tools_qt import GwHyperLinkLabel
 
+# Process-wide store of configuration files: parsers live in global_vars.configs and are reloaded only when the file
+# changes on disk. Writes are applied in memory and flushed to disk by a debounced timer
+_config_lock = threading.RLock()
+_config_mtimes = {}                     # {file_name: mtime of the file when it was last read or written}
+_config_checked = {}                    # {file_name: time.monotonic() of the last mtime check}
+_config_dirty = set()                   # Files with pending writes
+_config_flush_timer = None
+_config_check_interval = 1.0            # Seconds between mtime checks of the same file
+_config_flush_delay = 2.0               # Seconds to wait for more writes before flushing to disk
+
+# Typeahead service shared by all typeahead widgets: results of gw_fct_gettypeahead are cached by
+# (queryText, queryTextFilter, parentValue) and searched text, and fetched in background after a debounce
+_typeahead_cache = OrderedDict()        # {((queryText, queryTextFilter, parentValue), text): [idval, ...]}
+_typeahead_cache_size = 200
+_typeahead_delay = 300                  # Milliseconds without typing before querying the database
+_typeahead_contexts = {}                # {id(widget): {'timer': QTimer, 'worker': GwSearchWorker, 'request': dict}}
+
 
 def load_settings(dialog):
     """ Load user UI settings related with dialog position and size """
@@ -90,10 +110,14 @@ def save_settings(dialog):
 def initialize_parsers():
     """ Initialize parsers of configuration files: init, session, giswater, user_params """
 
-    for config in global_vars.list_configs:
-        filepath, parser = _get_parser_from_filename(config)
-        global_vars.configs[config][0] = filepath
-        global_vars.configs[config][1] = parser
+    with _config_lock:
+        flush_config_parsers()
+        for config in global_vars.list_configs:
+            filepath, parser = _get_parser_from_filename(config)
+            global_vars.configs[config][0] = filepath
+            global_vars.configs[config][1] = parser
+            _config_mtimes[config] = _get_file_mtime(filepath)
+            _config_checked[config] = time.monotonic()
 
 
 def get_config_parser(section: str, parameter: str, config_type, file_name, prefix=True, get_comment=False,
@@ -104,9 +128,8 @@ def get_config_parser(section: str, parameter: str, config_type, file_name, pref
         tools_log.log_warning(f"get_config_parser: Reference config_type = '{config_type}' it is not managed")
         return None
 
-    # Get configuration filepath and parser object
+    # Get configuration filepath
     path = global_vars.configs[file_name][0]
-    parser = global_vars.configs[file_name][1]
 
     # Needed to avoid errors with giswater plugins
     if path is None:
@@ -115,15 +138,8 @@ def get_config_parser(section: str, parameter: str, config_type, file_name, pref
 
     value = None
     raw_parameter = parameter
-    if parser is None:
-        tools_log.log_info(f"Creating parser for file: {path}")
-        parser = configparser.ConfigParser(comment_prefixes=";", allow_no_value=True)
-        parser.read(path)
-
-    # If project has already been loaded and filename is 'init' or 'session', always read and parse file
-    if force_reload or (global_vars.project_loaded and file_name in ('init', 'session')):
-        parser = configparser.ConfigParser(comment_prefixes=";", allow_no_value=True)
-        parser.read(path)
+    # Get cached parser object, it is reloaded only if the file has been modified outside the plugin
+    parser = _get_config_store(file_name, force_reload)
 
     if config_type == 'user' and prefix and global_vars.project_type is not None:
         parameter = f"{global_vars.project_type}_{parameter}"
@@ -159,47 +175,64 @@ def set_config_parser(section: str, parameter: str, value: str = None, config_ty
 
     # Get configuration filepath and parser object
     path = global_vars.configs[file_name][0]
+    if path is None:
+        tools_log.log_warning(f"set_config_parser: Config file is not set")
+        return None
 
     try:
 
-        parser = configparser.ConfigParser(comment_prefixes=";", allow_no_value=True)
-        parser.read(path)
-
-        raw_parameter = parameter
-        if config_type == 'user' and prefix and global_vars.project_type is not None:
-            parameter = f"{global_vars.project_type}_{parameter}"
-
-        # Check if section exists in file
-        if section not in parser:
-            parser.add_section(section)
-
-        # Cast to str because parser only allow strings
-        value = f"{value}"
-        if value is not None:
-            # Add the comment to the value if there is one
-            if comment is not None:
-                value += f" #{comment}"
-            # If the previous value had an inline comment, don't remove it
+        # The flush timer writes the parser from another thread: never modify it without the lock
+        with _config_lock:
+            parser = _get_config_store(file_name)
+
+            raw_parameter = parameter
+            if config_type == 'user' and prefix and global_vars.project_type is not None:
+                parameter = f"{global_vars.project_type}_{parameter}"
+
+            # Check if section exists in file
+            if section not in parser:
+                parser.add_section(section)
+
+            # Cast to str because parser only allow strings
+            value = f"{value}"
+            if value is not None:
+                # Add the comment to the value if there is one
+                if comment is not None:
+                    value += f" #{comment}"
+                # If the previous value had an inline comment, don't remove it
+                else:
+                    prev = get_config_parser(section, parameter, config_type, file_name, False, True, False)
+                    if prev is not None and "#" in prev:
+                        value += f" #{prev.split('#')[1]}"
+                parser.set(section, parameter, value)
+                # Check if the parameter exists in the inventory, if not creates it
+                if chk_user_params and config_type in "user":
+                    _check_user_params(section, raw_parameter, file_name, prefix)
             else:
-                prev = get_config_parser(section, parameter, config_type, file_name, False, True, False)
-                if prev is not None and "#" in prev:
-                    value += f" #{prev.split('#')[1]}"
-            parser.set(section, parameter, value)
-            # Check if the parameter exists in the inventory, if not creates it
-            if chk_user_params and config_type in "user":
-                _check_user_params(section, raw_parameter, file_name, prefix)
-        else:
-            parser.set(section, parameter)  # This is just for writing comments
+                parser.set(section, parameter)  # This is just for writing comments
 
-        with open(path, 'w') as configfile:
-            parser.write(configfile)
-            configfile.close()
+            # Changes are written to disk by the debounced flush
+            _config_dirty.add(file_name)
+            _schedule_config_flush()
 
     except Exception as e:
         tools_log.log_warning(f"set_config_parser exception [{type(e).__name__}]: {e}")
         return
 
 
+def flush_config_parsers():
+    """ Write pending changes of configuration files to disk """
+
+    global _config_flush_timer
+
+    with _config_lock:
+        if _config_flush_timer is not None:
+            _config_flush_timer.cancel()
+            _config_flush_timer = None
+        for file_name in list(_config_dirty):
+            _write_config_file(file_name)
+
+
 def save_current_tab(dialog, tab_widget, selector_name):
     """
     Save the name of current tab used by the user into QSettings()
@@ -1402,20 +1435,36 @@ def fill_typeahead(completer, model, field, dialog, widget):
     if 'parentId' in field:
         parent_id = field["parentId"]
 
+    parent_value = tools_qt.get_text(dialog, "data_" + str(field["parentId"]))
+    text = tools_qt.get_text(dialog, widget)
+    key = (field["queryText"], field["queryTextFilter"], parent_value)
+    context = _get_typeahead_context(widget)
+
+    # Use cached results when possible
+    list_items = _get_typeahead_items(key, text)
+    if list_items is not None:
+        context['request'] = None
+        context['timer'].stop()
+        tools_qt.set_completer_object(completer, model, widget, list_items)
+        return
+
     extras = f'"queryText":"{field["queryText"]}"'
     extras += f', "queryTextFilter":"{field["queryTextFilter"]}"'
     extras += f', "parentId":"{parent_id}"'
-    extras += f', "parentValue":"{tools_qt.get_text(dialog, "data_" + str(field["parentId"]))}"'
-    extras += f', "textToSearch":"{tools_qt.get_text(dialog, widget)}"'
+    extras += f', "parentValue":"{parent_value}"'
+    extras += f', "textToSearch":"{text}"'
     body = create_body(extras=extras)
-    complet_list = execute_procedure('gw_fct_gettypeahead', body)
-    if not complet_list or complet_list['status'] == 'Failed':
-        return False
 
-    list_items = []
-    for field in complet_list['body']['data']:
-        list_items.append(field['idval'])
-    tools_qt.set_completer_object(completer, model, widget, list_items)
+    # Wait until user stops typing
+    context['request'] = {'completer': completer, 'model': model, 'widget': widget, 'key': key, 'text': text,
+                          'body': body, 'request_id': None}
+    context['timer'].start(_typeahead_delay)
+
+
+def reset_typeahead_cache():
+    """ Remove cached results of typeahead widgets """
+
+    _typeahead_cache.clear()
 
 
 def set_data_type(field, widget):
@@ -1596,22 +1645,24 @@ def get_expression_filter(feature_type, list_ids=None, layers=None):
         return None
 
     # Set expression filter with features in the list
-    expr_filter = field_id + " IN ("
-    for i in range(len(list_ids)):
-        expr_filter += f"'{list_ids[i]}', "
-    expr_filter = expr_filter[:-2] + ")"
-
-    # Check expression
-    (is_valid, expr) = tools_qt.check_expression_filter(expr_filter)
-    if not is_valid:
-        return None
+    expr_filter = get_ids_filter(field_id, list_ids)
 
-    # Select features of layers applying @expr
-    tools_qgis.select_features_by_ids(feature_type, expr, layers=layers)
+    # Select features of layers which are in the list
+    tools_qgis.select_features_by_list(feature_type, list_ids, layers=layers)
 
     return expr_filter
 
 
+def get_ids_filter(field_id, list_ids):
+    """ Get expression filter '"@field_id" IN (...)' with the contents of @list_ids """
+
+    if not list_ids:
+        return None
+
+    values = ", ".join(f"'{value}'" for value in list_ids)
+    return f'"{field_id}" IN ({values})'
+
+
 def get_actions_from_json(json_result, sql):
     """
     Manage options for layers (active, visible, zoom and indexing)
@@ -1726,6 +1777,11 @@ def execute_procedure(function_name, parameters=None, schema_name=None, commit=T
     if log_sql:
         tools_log.log_db(json_result, header="SERVER RESPONSE")
 
+    # Features created, edited or deleted by database functions don't emit any signal of the layers
+    if not function_name.startswith('gw_fct_get'):
+        tools_qgis.reset_feature_id_index()
+        reset_snapped_features()
+
     # All functions called from python should return 'status', if not, something has probably failed in postrgres
     if 'status' not in json_result:
         manage_json_exception(json_result, sql)
@@ -1979,9 +2035,18 @@ def get_rows_by_feature_type(class_object, dialog, table_object, feature_type):
            f"WHERE {table_object}_id = '{object_id}'")
     rows = tools_db.get_rows(sql, log_info=False)
     if rows:
+        # Keep lists without duplicates, checking membership against sets
+        list_ids = class_object.list_ids[feature_type]
+        seen_list_ids = set(list_ids)
+        seen_ids = set(class_object.ids)
         for row in rows:
-            class_object.list_ids[feature_type].append(str(row[0]))
-            class_object.ids.append(str(row[0]))
+            feature_id = str(row[0])
+            if feature_id not in seen_list_ids:
+                seen_list_ids.add(feature_id)
+                list_ids.append(feature_id)
+            if feature_id not in seen_ids:
+                seen_ids.add(feature_id)
+                class_object.ids.append(feature_id)
 
         expr_filter = get_expression_filter(feature_type, class_object.list_ids, class_object.layers)
         table_name = f"v_edit_{feature_type}"
@@ -2219,37 +2284,29 @@ def selection_changed(class_object, dialog, table_object, query=False, lazy_widg
     tools_qgis.disconnect_signal_selection_changed()
     field_id = f"{class_object.feature_type}_id"
 
-    ids = []
     if class_object.layers is None:
         return
 
-    # Iterate over all layers of the group
+    # Ordered set of selected ids: dict keys keep insertion order and give O(1) membership
+    selected_ids = {}
     for layer in class_object.layers[class_object.feature_type]:
         if layer.selectedFeatureCount() > 0:
-            # Get selected features of the layer
-            features = layer.selectedFeatures()
-            for feature in features:
-                # Append 'feature_id' into the list
-                selected_id = feature.attribute(field_id)
-                if selected_id not in ids:
-                    ids.append(selected_id)
-
+            # Get 'feature_id' of selected features of the layer, without geometry
+            field_index = layer.fields().indexFromName(field_id)
+            request = QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry)
+            if field_index != -1:
+                request.setSubsetOfAttributes([field_index])
+            for feature in layer.getSelectedFeatures(request):
+                selected_ids[feature.attribute(field_id)] = None
+
+    ids = list(selected_ids)
     class_object.list_ids[class_object.feature_type] = ids
 
     expr_filter = None
     if len(ids) > 0:
         # Set 'expr_filter' with features that are in the list
-        expr_filter = f'"{field_id}" IN ('
-        for i in range(len(ids)):
-            expr_filter += f"'{ids[i]}', "
-        expr_filter = expr_filter[:-2] + ")"
-
-        # Check expression
-        (is_valid, expr) = tools_qt.check_expression_filter(expr_filter)  # @UnusedVariable
-        if not is_valid:
-            return
-
-        tools_qgis.select_features_by_ids(class_object.feature_type, expr, class_object.layers)
+        expr_filter = get_ids_filter(field_id, ids)
+        tools_qgis.select_features_by_list(class_object.feature_type, ids, class_object.layers)
 
     # Reload contents of table 'tbl_@table_object_x_@feature_type'
     if query:
@@ -2293,7 +2350,8 @@ def insert_feature(class_object, dialog, table_object, query=False, remove_ids=T
         tools_qt.show_info_box(message)
         return
 
-    # Iterate over all layers of the group
+    # Iterate over all layers of the group. Membership is checked against a set
+    seen_ids = set(class_object.ids)
     for layer in class_object.layers[feature_type]:
         if layer.selectedFeatureCount() > 0:
             # Get selected features of the layer
@@ -2301,28 +2359,20 @@ def insert_feature(class_object, dialog, table_object, query=False, remove_ids=T
             for feature in features:
                 # Append 'feature_id' into the list
                 selected_id = feature.attribute(field_id)
-                if selected_id not in class_object.ids:
+                if selected_id not in seen_ids:
+                    seen_ids.add(selected_id)
                     class_object.ids.append(selected_id)
-        if feature_id not in class_object.ids:
+        if feature_id not in seen_ids:
             # If feature id doesn't exist in list -> add
+            seen_ids.add(feature_id)
             class_object.ids.append(str(feature_id))
 
     # Set expression filter with features in the list
-    expr_filter = f'"{field_id}" IN (  '
-    for i in range(len(class_object.ids)):
-        expr_filter += f"'{class_object.ids[i]}', "
-    expr_filter = expr_filter[:-2] + ")"
-
-    # Check expression
-    (is_valid, expr) = tools_qt.check_expression_filter(expr_filter)
-    if not is_valid:
-        return
+    expr_filter = get_ids_filter(field_id, class_object.ids)
 
-    # Select features with previous filter
-    # Build a list of feature id's and select them
+    # Select features which are in the list
     for layer in class_object.layers[feature_type]:
-        it = layer.getFeatures(QgsFeatureRequest(expr))
-        id_list = [i.id() for i in it]
+        id_list = tools_qgis.get_feature_ids(layer, field_id, class_object.ids)
         if len(id_list) > 0:
             layer.selectByIds(id_list)
 
@@ -2738,20 +2788,8 @@ def delete_records(class_object, dialog, table_object, query=False, lazy_widget=
     else:
         return
 
-    expr_filter = None
-    expr = None
-    if len(class_object.ids) > 0:
-
-        # Set expression filter with features in the list
-        expr_filter = f'"{field_id}" IN ('
-        for i in range(len(class_object.ids)):
-            expr_filter += f"'{class_object.ids[i]}', "
-        expr_filter = expr_filter[:-2] + ")"
-
-        # Check expression
-        (is_valid, expr) = tools_qt.check_expression_filter(expr_filter)  # @UnusedVariable
-        if not is_valid:
-            return
+    # Set expression filter with features in the list
+    expr_filter = get_ids_filter(field_id, class_object.ids)
 
     # Update model of the widget with selected expr_filter
     if query:
@@ -2761,9 +2799,8 @@ def delete_records(class_object, dialog, table_object, query=False, lazy_widget=
         load_tablename(dialog, table_object, feature_type, expr_filter)
         tools_qt.set_lazy_init(table_object, lazy_widget=lazy_widget, lazy_init_function=lazy_init_function)
 
-    # Select features with previous filter
-    # Build a list of feature id's and select them
-    tools_qgis.select_features_by_ids(feature_type, expr, layers=class_object.layers)
+    # Select features which are in the list (remove selection if list is empty)
+    tools_qgis.select_features_by_list(feature_type, class_object.ids, layers=class_object.layers)
 
     if query:
         class_object.layers = remove_selection(layers=class_object.layers)
@@ -2898,15 +2935,19 @@ def manage_current_selections_docker(result, open=False):
             global_vars.iface.addDockWidget(Qt.LeftDockWidgetArea, global_vars.session_vars['current_selections'])
 
 
-def create_sqlite_conn(file_name):
-    """ Creates an sqlite connection to a file """
+def create_sqlite_conn(file_name, folder=None):
+    """ Creates an sqlite connection to a file
+        If @folder is set, file is created in that folder if it doesn't exist """
 
     status = False
     cursor = None
     try:
-        db_path = f"{global_vars.plugin_dir}{os.sep}resources{os.sep}gis{os.sep}{file_name}.sqlite"
+        if folder is None:
+            db_path = f"{global_vars.plugin_dir}{os.sep}resources{os.sep}gis{os.sep}{file_name}.sqlite"
+        else:
+            db_path = f"{folder}{os.sep}{file_name}.sqlite"
         tools_log.log_info(db_path)
-        if os.path.exists(db_path):
+        if os.path.exists(db_path) or folder is not None:
             conn = sqlite3.connect(db_path)
             cursor = conn.cursor()
             status = True
@@ -3249,4 +3290,182 @@ def _get_parser_from_filename(filename):
 
     return filepath, parser
 
+
+def _get_typeahead_context(widget):
+    """ Get (or create) the debounce timer, worker and pending request of typeahead @widget """
+
+    widget_id = id(widget)
+    context = _typeahead_contexts.get(widget_id)
+    if context is None:
+        timer = QTimer()
+        timer.setSingleShot(True)
+        timer.timeout.connect(partial(_execute_typeahead, widget_id))
+        context = {'timer': timer, 'worker': None, 'request': None}
+        _typeahead_contexts[widget_id] = context
+        widget.destroyed.connect(partial(_remove_typeahead_context, widget_id))
+    return context
+
+
+def _remove_typeahead_context(widget_id, *args):
+    """ Stop timer and worker of a destroyed typeahead widget """
+
+    context = _typeahead_contexts.pop(widget_id, None)
+    if context is None:
+        return
+    context['timer'].stop()
+    if context['worker'] is not None:
+        context['worker'].stop()
+
+
+def _execute_typeahead(widget_id):
+    """ Execute gw_fct_gettypeahead of the last request of typeahead widget @widget_id in background """
+
+    context = _typeahead_contexts.get(widget_id)
+    if context is None or context['request'] is None:
+        return
+
+    # Each widget has its own worker, so typing in one widget doesn't cancel the request of another one
+    if context['worker'] is None:
+        context['worker'] = GwSearchWorker()
+        context['worker'].search_finished.connect(partial(_typeahead_finished, widget_id))
+    request = context['request']
+    request['request_id'] = context['worker'].submit('gw_fct_gettypeahead', request['body'])
+
+
+def _typeahead_finished(widget_id, request_id, function_name, sql, result):
+    """ Manage result of gw_fct_gettypeahead executed in background (executed in Qt main thread) """
+
+    context = _typeahead_contexts.get(widget_id)
+    if context is None:
+        return
+    request = context['request']
+    if request is None or request['request_id'] != request_id:
+        return
+
+    context['request'] = None
+    if not result:
+        return
+    if 'status' not in result or result['status'] == 'Failed':
+        manage_json_exception(result, sql)
+        return
+
+    list_items = [field['idval'] for field in result['body']['data']]
+    _set_typeahead_items(request['key'], request['text'], list_items)
+
+    try:
+        widget = request['widget']
+        tools_qt.set_completer_object(request['completer'], request['model'], widget, list_items)
+        # Result arrives after the key press, so popup has to be shown explicitly
+        if widget.hasFocus() and list_items:
+            request['completer'].complete()
+    except RuntimeError:
+        # Form has been closed while waiting for the database
+        pass
+
+
+def _get_typeahead_items(key, text):
+    """ Get cached items of @key for @text
+    Results are not refined locally from a shorter text: matching rules belong to gw_fct_gettypeahead
+    """
+
+    if (key, text) in _typeahead_cache:
+        _typeahead_cache.move_to_end((key, text))
+        return _typeahead_cache[(key, text)]
+
+    return None
+
+
+def _set_typeahead_items(key, text, list_items):
+    """ Store @list_items received for @key and @text """
+
+    _typeahead_cache[(key, text)] = list_items
+    _typeahead_cache.move_to_end((key, text))
+    while len(_typeahead_cache) > _typeahead_cache_size:
+        _typeahead_cache.popitem(last=False)
+
+
+def _get_file_mtime(filepath):
+    """ Get modification time of @filepath, None if it doesn't exist """
+
+    if filepath is None:
+        return None
+    try:
+        return os.stat(filepath).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _get_config_store(file_name, force_reload=False):
+    """ Get parser of @file_name from the config store, reloading it only if the file has changed on disk """
+
+    with _config_lock:
+        path = global_vars.configs[file_name][0]
+        parser = global_vars.configs[file_name][1]
+
+        # Pending writes must reach the disk before discarding the parser
+        if force_reload and file_name in _config_dirty:
+            _write_config_file(file_name)
+
+        if parser is not None and not force_reload:
+            # In-memory parser is authoritative while it has pending writes
+            if file_name in _config_dirty:
+                return parser
+            # Throttle mtime checks, so hot paths don't hit the filesystem on every call
+            now = time.monotonic()
+            if now - _config_checked.get(file_name, 0) < _config_check_interval:
+                return parser
+            _config_checked[file_name] = now
+            mtime = _get_file_mtime(path)
+            if mtime == _config_mtimes.get(file_name):
+                return parser
+        else:
+            mtime = _get_file_mtime(path)
+
+        if parser is None:
+            tools_log.log_info(f"Creating parser for file: {path}")
+        parser = configparser.ConfigParser(comment_prefixes=";", allow_no_value=True)
+        parser.read(path)
+        global_vars.configs[file_name][1] = parser
+        _config_mtimes[file_name] = mtime
+        _config_checked[file_name] = time.monotonic()
+
+        return parser
+
+
+def _schedule_config_flush():
+    """ (Re)start the timer that writes pending configuration changes to disk """
+
+    global _config_flush_timer
+
+    with _config_lock:
+        if _config_flush_timer is not None:
+            _config_flush_timer.cancel()
+        _config_flush_timer = threading.Timer(_config_flush_delay, flush_config_parsers)
+        _config_flush_timer.daemon = True
+        _config_flush_timer.start()
+
+
+def _write_config_file(file_name):
+    """ Atomically write parser of @file_name to disk, using a temporary file in the same folder """
+
+    path = global_vars.configs[file_name][0]
+    parser = global_vars.configs[file_name][1]
+    _config_dirty.discard(file_name)
+    if path is None or parser is None:
+        return
+
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, 'w') as configfile:
+            parser.write(configfile)
+        os.replace(tmp_path, path)
+        _config_mtimes[file_name] = _get_file_mtime(path)
+        _config_checked[file_name] = time.monotonic()
+    except Exception as e:
+        tools_log.log_warning(f"Error writing config file {path} [{type(e).__name__}]: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
 # endregion
@@ -43,6 +43,7 @@ dao = None                              # Instance of class GwPgDao. Found in "/
 dao_db_credentials = None               # Credentials used to establish the connection with PostgreSql. Saving {db, schema, table, service, host, port, user, password, sslmode}
 notify = None                           # Instance of class GwNotify. Found in "/core/threads/notify.py"
 exec_procedure_max_retries = None       # Maximum number of execution retries of a PostgreSQL function
+dao_pool_params = {}                    # Parameters of the auxiliary connection pool of GwPgDao: {min_size, max_size, idle_timeout}
 project_vars = {}                       # Project variables from QgsProject related to Giswater
 project_vars['info_type'] = None        # gwInfoType
 project_vars['add_schema'] = None       # gwAddSchema
@@ -12,6 +12,9 @@ from qgis.PyQt.QtCore import QSettings
 from .. import global_vars
 from . import tools_log, tools_qt, tools_qgis, tools_pgdao, tools_os
 
+# Routines available in each schema: {schema_name: set of lowercase routine names}
+_functions_cache = {}
+
 
 def create_list_for_completer(sql):
     """
@@ -272,6 +275,7 @@ def connect_to_database(host, port, db, user, pwd, sslmode):
     # psycopg2 connection
     global_vars.dao = tools_pgdao.GwPgDao()
     global_vars.dao.set_params(host, port, db, user, pwd, sslmode)
+    global_vars.dao.set_pool_params(**global_vars.dao_pool_params)
     status = global_vars.dao.init_db()
     tools_log.log_info(f"PostgreSQL PID: {global_vars.dao.pid}")
     if not status:
@@ -313,6 +317,7 @@ def connect_to_database_service(service, sslmode=None):
         # psycopg2 connection
         global_vars.dao = tools_pgdao.GwPgDao()
         global_vars.dao.set_conn_string(conn_string)
+        global_vars.dao.set_pool_params(**global_vars.dao_pool_params)
         status = global_vars.dao.init_db()
         tools_log.log_info(f"PostgreSQL PID: {global_vars.dao.pid}")
         if not status:
@@ -356,7 +361,8 @@ def get_row(sql, log_info=True, log_sql=False, commit=True, params=None, aux_con
     return row
 
 
-def get_rows(sql, log_info=True, log_sql=False, commit=True, params=None, add_empty_row=False):
+def get_rows(sql, log_info=True, log_sql=False, commit=True, params=None, add_empty_row=False, aux_conn=None,
+             is_thread=False):
     """ Execute SQL. Check its result in log tables, and show it to the user """
 
     if global_vars.dao is None:
@@ -364,11 +370,13 @@ def get_rows(sql, log_info=True, log_sql=False, commit=True, params=None, add_em
         return None
     sql = _get_sql(sql, log_sql, params)
     rows = None
-    rows2 = global_vars.dao.get_rows(sql, commit)
+    rows2 = global_vars.dao.get_rows(sql, commit, aux_conn=aux_conn)
     global_vars.session_vars['last_error'] = global_vars.dao.last_error
     if not rows2:
         # Check if any error has been raised
-        if global_vars.session_vars['last_error']:
+        if global_vars.session_vars['last_error'] and is_thread:
+            tools_log.log_warning(global_vars.session_vars['last_error'], parameter=sql)
+        elif global_vars.session_vars['last_error']:
             tools_qt.manage_exception_db(global_vars.session_vars['last_error'], sql)
         elif global_vars.session_vars['last_error'] is None and log_info:
             tools_log.log_info("Any record found", parameter=sql, stack_level_increase=1)
@@ -382,12 +390,27 @@ def get_rows(sql, log_info=True, log_sql=False, commit=True, params=None, add_em
     return rows
 
 
-def execute_sql(sql, log_sql=False, log_error=False, commit=True, filepath=None, is_thread=False):
+def get_rows_iter(sql, fetch_size=10000, log_sql=False, aux_conn=None):
+    """ Execute SQL through a server-side cursor and return a generator of its rows
+        Database errors are raised while iterating it and stored in session_vars['last_error'] """
+
+    if log_sql:
+        tools_log.log_db(sql, stack_level_increase=1)
+    rows = global_vars.dao.get_rows_iter(sql, fetch_size, aux_conn=aux_conn)
+    try:
+        for row in rows:
+            yield row
+    finally:
+        rows.close()
+        global_vars.session_vars['last_error'] = global_vars.dao.last_error
+
+
+def execute_sql(sql, log_sql=False, log_error=False, commit=True, filepath=None, is_thread=False, aux_conn=None):
     """ Execute SQL. Check its result in log tables, and show it to the user """
 
     if log_sql:
         tools_log.log_db(sql, stack_level_increase=1)
-    result = global_vars.dao.execute_sql(sql, commit)
+    result = global_vars.dao.execute_sql(sql, commit, aux_conn=aux_conn)
     global_vars.session_vars['last_error'] = global_vars.dao.last_error
     if not result:
         if log_error:
@@ -399,9 +422,34 @@ def execute_sql(sql, log_sql=False, log_error=False, commit=True, filepath=None,
     return True
 
 
-def cancel_pid(pid):
-    """ Cancel one process by pid """
-    return global_vars.dao.cancel_pid(pid)
+def copy_expert(sql, file, log_sql=False, commit=True, aux_conn=None, is_thread=False):
+    """ Execute COPY statement @sql using file-like object @file as STDIN or STDOUT """
+
+    if log_sql:
+        tools_log.log_db(sql, stack_level_increase=1)
+    result = global_vars.dao.copy_expert(sql, file, commit, aux_conn=aux_conn)
+    global_vars.session_vars['last_error'] = global_vars.dao.last_error
+    if not result:
+        if is_thread:
+            tools_log.log_warning(global_vars.session_vars['last_error'], parameter=sql)
+        else:
+            tools_qt.manage_exception_db(global_vars.session_vars['last_error'], sql)
+        return False
+
+    return True
+
+
+def cancel_pid(pid, timeout=2):
+    """ Cancel one process by pid. Opening the cancel connection may block up to @timeout seconds """
+    return global_vars.dao.cancel_pid(pid, timeout)
+
+
+def get_pool_stats():
+    """ Get statistics of the auxiliary connection pool used by threads """
+
+    if global_vars.dao is None:
+        return None
+    return global_vars.dao.get_pool_stats()
 
 
 def execute_returning(sql, log_sql=False, log_error=False, commit=True):
@@ -428,13 +476,47 @@ def set_search_path(schema_name):
     global_vars.dao.set_search_path = sql
 
 
+def load_functions_cache(schema_name=None):
+    """ Load names of all routines of selected schema with a single query, used by check_function """
+
+    if schema_name is None:
+        schema_name = global_vars.schema_name
+    if schema_name is None:
+        return False
+
+    schema_name = schema_name.replace('"', '')
+    sql = (f"SELECT lower(routine_name) "
+           f"FROM information_schema.routines "
+           f"WHERE lower(routine_schema) = '{schema_name}'")
+    rows = get_rows(sql, log_info=False)
+    if rows is None:
+        _functions_cache.pop(schema_name, None)
+        return False
+
+    _functions_cache[schema_name] = {row[0] for row in rows}
+    return True
+
+
+def reset_functions_cache(schema_name=None):
+    """ Discard routines cached for @schema_name (all schemas if not set) """
+
+    if schema_name is None:
+        _functions_cache.clear()
+    else:
+        _functions_cache.pop(schema_name.replace('"', ''), None)
+
+
 def check_function(function_name, schema_name=None, commit=True, aux_conn=None):
-    """ Check if @function_name exists in selected schema """
+    """ Check if @function_name exists in selected schema. Use cached routines if they have been loaded """
 
     if schema_name is None:
         schema_name = global_vars.schema_name
 
     schema_name = schema_name.replace('"', '')
+    functions = _functions_cache.get(schema_name)
+    if functions is not None:
+        return [function_name] if function_name in functions else None
+
     sql = (f"SELECT routine_name "
            f"FROM information_schema.routines "
            f"WHERE lower(routine_schema) = '{schema_name}' "
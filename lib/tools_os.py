@@ -69,9 +69,12 @@ def open_file(file_path):
         return False, None
 
 
-def get_encoding_type(file_path):
+def get_encoding_type(file_path, size=-1, offset=0):
+    """ Guess codec of file from @size bytes read from @offset (whole file by default) """
+
     with open(file_path, 'rb') as f:
-        rawdata = f.read()
+        f.seek(offset)
+        rawdata = f.read(size)
     return detect(rawdata)['encoding']
 
 
@@ -5,8 +5,225 @@ General Public License as published by the Free Software Foundation, either vers
 or (at your option) any later version.
 """
 # -*- coding: utf-8 -*-
+import threading
+import time
+
 import psycopg2
+import psycopg2.extensions
 import psycopg2.extras
+import psycopg2.pool
+
+
+class GwPgPool(object):
+    """ Bounded, thread-safe pool of auxiliary psycopg2 connections used by threads """
+
+    def __init__(self, conn_string, min_size=0, max_size=10, idle_timeout=300, health_check_interval=30,
+                 checkout_timeout=60):
+
+        self.conn_string = conn_string
+        self.min_size = max(0, int(min_size))
+        self.max_size = max(1, int(max_size), self.min_size)
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.checkout_timeout = checkout_timeout
+        self._idle = []             # List of tuples (connection, last used time) ready to be checked out
+        self._used = set()          # Connections currently checked out
+        self._search_path = {}      # Key: id(connection). Value: search_path sql applied to that connection
+        self._pending = 0           # Slots reserved by connections being opened outside the lock
+        self._lock = threading.Condition()
+        self._closed = False
+        self.stats = {'created': 0, 'reused': 0, 'discarded': 0, 'expired': 0, 'waits': 0, 'timeouts': 0}
+
+
+    def getconn(self, search_path=None, timeout=None):
+        """ Check out a healthy connection, waiting up to @timeout seconds if the pool is exhausted """
+
+        if timeout is None:
+            timeout = self.checkout_timeout
+        with self._lock:
+            if self._closed:
+                raise psycopg2.pool.PoolError("connection pool is closed")
+            self._expire_idle()
+            conn = None
+            reserved = False
+            while conn is None:
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    if not self._check_health(conn, last_used):
+                        self._discard(conn)
+                        conn = None
+                        continue
+                    self.stats['reused'] += 1
+                    self._used.add(conn)
+                elif self._size() < self.max_size:
+                    # Reserve the slot and open the connection outside the lock
+                    self._pending += 1
+                    reserved = True
+                    break
+                else:
+                    self.stats['waits'] += 1
+                    if not self._lock.wait(timeout) and not self._idle and self._size() >= self.max_size:
+                        self.stats['timeouts'] += 1
+                        raise psycopg2.pool.PoolError("connection pool exhausted")
+
+        if reserved:
+            conn = self._connect_reserved()
+            with self._lock:
+                self._used.add(conn)
+
+        try:
+            self._apply_search_path(conn, search_path)
+        except Exception:
+            self.putconn(conn, discard=True)
+            raise
+
+        return conn
+
+
+    def putconn(self, conn, discard=False):
+        """ Return @conn to the pool. Broken or discarded connections are closed """
+
+        with self._lock:
+            if conn not in self._used:
+                return
+            self._used.discard(conn)
+            if not discard and not self._closed and not conn.closed:
+                try:
+                    status = conn.get_transaction_status()
+                    if status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                        conn.rollback()
+                except Exception:
+                    discard = True
+            if discard or self._closed or conn.closed:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._lock.notify()
+
+
+    def closeall(self):
+        """ Close every connection of the pool """
+
+        with self._lock:
+            self._closed = True
+            for conn, last_used in self._idle:
+                self._discard(conn)
+            for conn in list(self._used):
+                self._discard(conn)
+            self._idle = []
+            self._used = set()
+            self._lock.notify_all()
+
+
+    def fill(self):
+        """ Open connections until reaching @min_size """
+
+        while True:
+            with self._lock:
+                if self._closed or self._size() >= self.min_size:
+                    return
+                self._pending += 1
+            conn = self._connect_reserved()
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+                self._lock.notify()
+
+
+    def get_stats(self):
+        """ Return a dictionary with pool statistics for diagnostics """
+
+        with self._lock:
+            stats = dict(self.stats)
+            stats['idle'] = len(self._idle)
+            stats['used'] = len(self._used)
+            stats['min_size'] = self.min_size
+            stats['max_size'] = self.max_size
+            return stats
+
+
+    # region private functions
+
+    def _size(self):
+
+        return len(self._idle) + len(self._used) + self._pending
+
+
+    def _connect_reserved(self):
+        """ Open a connection for a slot reserved in @_pending. Must be called without holding the lock """
+
+        try:
+            conn = psycopg2.connect(self.conn_string)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+                self._lock.notify()
+            raise
+        with self._lock:
+            self._pending -= 1
+            self.stats['created'] += 1
+            if self._closed:
+                conn.close()
+                raise psycopg2.pool.PoolError("connection pool is closed")
+        return conn
+
+
+    def _discard(self, conn):
+
+        self._search_path.pop(id(conn), None)
+        self.stats['discarded'] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+    def _expire_idle(self):
+        """ Close connections idle for more than @idle_timeout seconds, keeping at least @min_size """
+
+        if not self.idle_timeout:
+            return
+        now = time.monotonic()
+        keep = []
+        total = self._size()
+        for conn, last_used in self._idle:
+            if now - last_used > self.idle_timeout and total > self.min_size:
+                self._discard(conn)
+                self.stats['expired'] += 1
+                total -= 1
+            else:
+                keep.append((conn, last_used))
+        self._idle = keep
+
+
+    def _check_health(self, conn, last_used):
+        """ Check that @conn is still usable. Connections idle for a while are tested with a trivial query """
+
+        if conn.closed:
+            return False
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+
+    def _apply_search_path(self, conn, search_path):
+        """ Execute @search_path only once per physical connection (or when it changes) """
+
+        if not search_path or self._search_path.get(id(conn)) == search_path:
+            return
+        cursor = conn.cursor()
+        cursor.execute(search_path)
+        cursor.close()
+        conn.commit()
+        self._search_path[id(conn)] = search_path
+
+    # endregion
 
 
 class GwPgDao(object):
@@ -18,6 +235,10 @@ class GwPgDao(object):
         self.conn = None
         self.cursor = None
         self.pid = None
+        self.pool = None
+        self.pool_params = {}
+        self.cancel_conn = None
+        self.cancel_lock = threading.Lock()
 
 
     def init_db(self):
@@ -46,6 +267,11 @@ class GwPgDao(object):
                 self.conn.close()
             del self.cursor
             del self.conn
+            if self.pool:
+                self.pool.closeall()
+                self.pool = None
+            with self.cancel_lock:
+                self._close_cancel_conn()
         except Exception as e:
             self.last_error = e
             status = False
@@ -145,25 +371,51 @@ class GwPgDao(object):
             return query
 
 
-    def get_rows(self, sql, commit=False):
+    def get_rows(self, sql, commit=False, aux_conn=None):
         """ Get multiple rows from selected query """
 
         self.last_error = None
         rows = None
         try:
-            cursor = self.get_cursor()
+            cursor = self.get_cursor(aux_conn)
             cursor.execute(sql)
             rows = cursor.fetchall()
             if commit:
-                self.commit()
+                self.commit(aux_conn)
         except Exception as e:
             self.last_error = e
             if commit:
-                self.rollback()
+                self.rollback(aux_conn)
         finally:
             return rows
 
 
+    def get_rows_iter(self, sql, fetch_size=10000, aux_conn=None):
+        """ Yield rows from selected query using a server-side cursor that fetches @fetch_size rows at a time """
+
+        self.last_error = None
+        conn = aux_conn if aux_conn is not None else self.conn
+        cursor = conn.cursor(name=f"gw_cursor_{id(conn)}", cursor_factory=psycopg2.extras.DictCursor)
+        cursor.itersize = fetch_size
+        try:
+            cursor.execute(sql)
+            for row in cursor:
+                yield row
+            cursor.close()
+            self.commit(aux_conn)
+        except Exception as e:
+            self.last_error = e
+            self.rollback(aux_conn)
+            raise
+        finally:
+            # Generator closed before reading every row
+            if not cursor.closed:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+
+
     def get_row(self, sql, commit=False, aux_conn=None):
         """ Get single row from selected query """
 
@@ -187,21 +439,21 @@ class GwPgDao(object):
             return row
 
 
-    def execute_sql(self, sql, commit=True):
+    def execute_sql(self, sql, commit=True, aux_conn=None):
         """ Execute selected query """
 
         self.last_error = None
         status = True
         try:
-            cursor = self.get_cursor()
+            cursor = self.get_cursor(aux_conn)
             cursor.execute(sql)
             if commit:
-                self.commit()
+                self.commit(aux_conn)
         except Exception as e:
             self.last_error = e
             status = False
             if commit:
-                self.rollback()
+                self.rollback(aux_conn)
         finally:
             return status
 
@@ -224,6 +476,25 @@ class GwPgDao(object):
             return value
 
 
+    def copy_expert(self, sql, file, commit=True, aux_conn=None):
+        """ Execute COPY statement @sql reading from (or writing to) file-like object @file """
+
+        self.last_error = None
+        status = True
+        try:
+            cursor = self.get_cursor(aux_conn)
+            cursor.copy_expert(sql, file)
+            if commit:
+                self.commit(aux_conn)
+        except Exception as e:
+            self.last_error = e
+            status = False
+            if commit:
+                self.rollback(aux_conn)
+        finally:
+            return status
+
+
     def commit(self, aux_conn=None):
         """ Commit current database transaction """
 
@@ -259,34 +530,72 @@ class GwPgDao(object):
             return e
 
 
-    def cancel_pid(self, pid):
-        """ Cancel one process by pid """
+    def cancel_pid(self, pid, timeout=2):
+        """ Cancel one process by pid
+        Uses a dedicated connection kept open between calls. Opening it may block up to @timeout seconds
+        """
 
-        # Create an auxiliary connection with the intention of being able to cancel processes of the main connection
+        # Never wait for a pooled connection: the pool may be exhausted by the very processes being cancelled
         last_error = None
+        with self.cancel_lock:
+            try:
+                if self.cancel_conn is None or self.cancel_conn.closed:
+                    self.cancel_conn = psycopg2.connect(self.conn_string, connect_timeout=max(2, int(timeout)))
+                    self.cancel_conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                cursor = self.get_cursor(self.cancel_conn)
+                cursor.execute(f"SELECT pg_cancel_backend({pid})")
+                status = True
+                cursor.close()
+                del cursor
+            except Exception as e:
+                last_error = e
+                status = False
+                self._close_cancel_conn()
+
+        return {'status': status, 'last_error': last_error}
+
+
+    def get_listen_conn(self):
+        """ Open a dedicated autocommit connection used to LISTEN database channels """
+
         try:
-            aux_conn = psycopg2.connect(self.conn_string)
-            cursor = self.get_cursor(aux_conn)
-            cursor.execute(f"SELECT pg_cancel_backend({pid})")
-            status = True
-            cursor.close()
-            aux_conn.close()
-            del cursor
-            del aux_conn
+            conn = psycopg2.connect(self.conn_string)
+            conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            return conn
         except Exception as e:
-            last_error = e
-            status = False
+            self.last_error = e
+            return None
+
+
+    def set_pool_params(self, min_size=None, max_size=None, idle_timeout=None):
+        """ Set size limits and idle timeout (seconds) of the auxiliary connection pool """
+
+        params = {'min_size': min_size, 'max_size': max_size, 'idle_timeout': idle_timeout}
+        self.pool_params = {key: value for key, value in params.items() if value is not None}
 
-        return {'status': status, 'last_error': last_error}
+
+    def get_pool(self):
+        """ Get (or create) the auxiliary connection pool """
+
+        if self.pool is None:
+            self.pool = GwPgPool(self.conn_string, **self.pool_params)
+            self.pool.fill()
+        return self.pool
+
+
+    def get_pool_stats(self):
+        """ Return statistics of the auxiliary connection pool """
+
+        if self.pool is None:
+            return None
+        return self.pool.get_stats()
 
 
     def get_aux_conn(self):
+        """ Check out an auxiliary connection from the pool. search_path is applied once per physical connection """
 
         try:
-            aux_conn = psycopg2.connect(self.conn_string)
-            cursor = self.get_cursor(aux_conn)
-            if self.set_search_path:
-                cursor.execute(self.set_search_path)
+            aux_conn = self.get_pool().getconn(self.set_search_path)
             return aux_conn
         except Exception as e:
             last_error = e
@@ -295,13 +604,31 @@ class GwPgDao(object):
         return {'status': status, 'last_error': last_error}
 
 
-    def delete_aux_con(self, aux_conn):
+    def delete_aux_con(self, aux_conn, discard=False):
+        """ Return auxiliary connection to the pool. If @discard, connection is closed instead of being reused """
 
         try:
-            aux_conn.close()
-            del aux_conn
+            if self.pool is not None:
+                self.pool.putconn(aux_conn, discard)
+            else:
+                aux_conn.close()
             return
         except Exception as e:
             last_error = e
             status = False
         return {'status': status, 'last_error': last_error}
+
+
+    # region private functions
+
+    def _close_cancel_conn(self):
+        """ Close the connection used to cancel processes. Caller must hold @cancel_lock """
+
+        if self.cancel_conn is not None:
+            try:
+                self.cancel_conn.close()
+            except Exception:
+                pass
+            self.cancel_conn = None
+
+    # endregion
@@ -12,7 +12,9 @@ import console
 import os.path
 import shlex
 import sys
+import threading
 from random import randrange
+from types import MappingProxyType
 
 from qgis.PyQt.QtCore import Qt, QTimer, QSettings
 from qgis.PyQt.QtGui import QColor
@@ -30,6 +32,24 @@ from .. import global_vars
 # List of user parameters (optionals)
 user_parameters = {'log_sql': None, 'show_message_durations': None, 'aux_context': 'ui_message'}
 
+# Index of layers of the layer tree, built on demand and discarded when the tree changes
+# {'layers': {layer_id: (schema, table, layername)}, 'tables': {table: [layer_id]}, 'names': {layername: [layer_id]}}
+_layer_index = None
+
+# Slots connected to the signals of every indexed layer: {layer_id: slot}
+_layer_index_slots = {}
+
+# Parsed data sources of layers: {layer_id: (dataSourceUri, read-only layer source)}
+_layer_sources = {}
+
+# Index of business id -> feature ids (fid) of layers, built on demand and discarded when layer data changes
+# or when reset_feature_id_index is called (i.e. after database functions that may create or delete features)
+# {layer_id: {field_id: {str(value): [fid]}}}. Only used from Qt main thread
+_feature_id_index = {}
+# Layers (None for all of them) whose index was reset from other threads. Main thread discards them at the next lookup
+_feature_id_index_stale = set()
+_feature_id_index_lock = threading.Lock()
+
 
 def show_message(text, message_level=1, duration=10, context_name=None, parameter=None, title="", logger_file=True):
     """
@@ -284,41 +304,17 @@ def get_project_layers():
 def get_layer_source(layer):
     """ Get database connection paramaters of @layer """
 
-    # Initialize variables
-    layer_source = {'db': None, 'schema': None, 'table': None, 'service': None, 'host': None, 'port': None,
-                    'user': None, 'password': None, 'sslmode': None}
-
-    if layer is None:
-        return layer_source
-
-    if layer.providerType() != 'postgres':
-        return layer_source
+    if layer is None or layer.providerType() != 'postgres':
+        return dict(_parse_layer_source(None))
 
-    # Get dbname, host, port, user and password
+    # Get dbname, host, port, user and password. Parse them only if data source has changed since last call
     uri = layer.dataProvider().dataSourceUri()
+    cached = _layer_sources.get(layer.id())
+    if cached is None or cached[0] != uri:
+        cached = (uri, _parse_layer_source(uri))
+        _layer_sources[layer.id()] = cached
 
-    # split with quoted substrings preservation
-    splt = shlex.split(uri)
-
-    list_uri = []
-    for v in splt:
-        if '=' in v:
-            elem_uri = tuple(v.split('='))
-            if len(elem_uri) == 2:
-                list_uri.append(elem_uri)
-
-    splt_dct = dict(list_uri)
-    if 'service' in splt_dct:
-        splt_dct['service'] = splt_dct['service']
-    if 'dbname' in splt_dct:
-        splt_dct['db'] = splt_dct['dbname']
-    if 'table' in splt_dct:
-        splt_dct['schema'], splt_dct['table'] = splt_dct['table'].split('.')
-
-    for key in layer_source.keys():
-        layer_source[key] = splt_dct.get(key)
-
-    return layer_source
+    return dict(cached[1])
 
 
 def get_layer_source_table_name(layer):
@@ -376,14 +372,13 @@ def get_primary_key(layer=None):
 
 
 def get_layer_by_tablename(tablename, show_warning_=False, log_info=False, schema_name=None):
-    """ Iterate over all layers and get the one with selected @tablename """
+    """ Get the layer with selected @tablename using the project layer index """
 
     # Check if we have any layer loaded
-    layers = get_project_layers()
-    if len(layers) == 0:
+    index = _get_layer_index()
+    if len(index['layers']) == 0:
         return None
 
-    # Iterate over all layers
     layer = None
     if schema_name is None:
         if 'main_schema' in global_vars.project_vars:
@@ -391,12 +386,12 @@ def get_layer_by_tablename(tablename, show_warning_=False, log_info=False, schem
         else:
             tools_log.log_warning("Key not found", parameter='main_schema')
 
-    for cur_layer in layers:
-        uri_table = get_layer_source_table_name(cur_layer)
-        table_schema = get_layer_schema(cur_layer)
-        if (uri_table is not None and uri_table == tablename) and schema_name in ('', None, table_schema):
-            layer = cur_layer
-            break
+    for layer_id in index['tables'].get(tablename, []):
+        table_schema = index['layers'][layer_id][0]
+        if schema_name in ('', None, table_schema):
+            layer = QgsProject.instance().mapLayer(layer_id)
+            if layer is not None:
+                break
 
     if layer is None and show_warning_:
         show_warning("Layer not found", parameter=tablename)
@@ -407,6 +402,14 @@ def get_layer_by_tablename(tablename, show_warning_=False, log_info=False, schem
     return layer
 
 
+def reset_layer_index():
+    """ Discard the project layer index. It will be rebuilt on next layer lookup """
+
+    global _layer_index
+    _layer_index = None
+    _layer_sources.clear()
+
+
 def manage_snapping_layer(layername, snapping_type=0, tolerance=15.0):
     """ Manage snapping of @layername """
 
@@ -445,6 +448,61 @@ def select_features_by_ids(feature_type, expr, layers=None):
                 layer.removeSelection()
 
 
+def select_features_by_list(feature_type, list_ids, layers=None):
+    """ Select features of layers of group @feature_type whose '@feature_type_id' is in @list_ids """
+
+    if layers is None:
+        return
+
+    if feature_type not in layers:
+        return
+
+    field_id = f"{feature_type}_id"
+    for layer in layers[feature_type]:
+        select_layer_features(layer, field_id, list_ids)
+
+
+def select_layer_features(layer, field_id, list_ids):
+    """ Select features of @layer whose @field_id is in @list_ids. Return list of selected feature ids (fid) """
+
+    id_list = get_feature_ids(layer, field_id, list_ids)
+    if len(id_list) > 0:
+        layer.selectByIds(id_list)
+    else:
+        layer.removeSelection()
+
+    return id_list
+
+
+def get_feature_ids(layer, field_id, list_ids):
+    """ Get feature ids (fid) of @layer whose @field_id is in @list_ids, using an index of @field_id values """
+
+    if not list_ids:
+        return []
+
+    index = _get_feature_id_index(layer, field_id)
+    if index is None:
+        return []
+
+    id_list = []
+    for value in dict.fromkeys(str(value) for value in list_ids):
+        id_list.extend(index.get(value, ()))
+    return id_list
+
+
+def reset_feature_id_index(layer_id=None):
+    """ Discard index of business ids of layer @layer_id (all layers if None)
+    If called from another thread, the index is discarded by Qt main thread before its next lookup
+    """
+
+    if threading.current_thread() is not threading.main_thread():
+        with _feature_id_index_lock:
+            _feature_id_index_stale.add(layer_id)
+        return
+
+    _clear_feature_id_index(layer_id)
+
+
 def get_points_from_geometry(layer, feature):
     """ Get the start point and end point of the feature """
 
@@ -763,11 +821,19 @@ def get_plugin_settings_value(section, key, default_value=""):
 def get_layer_by_layername(layername, log_info=False):
     """ Get layer with selected @layername (the one specified in the TOC) """
 
-    layer = QgsProject.instance().mapLayersByName(layername)
-    if layer:
-        layer = layer[0]
-    elif not layer and log_info:
-        layer = None
+    layer = None
+    for layer_id in _get_layer_index()['names'].get(layername, []):
+        layer = QgsProject.instance().mapLayer(layer_id)
+        if layer is not None:
+            break
+
+    if layer is None:
+        # Layers not added to the layer tree are not indexed
+        layers = QgsProject.instance().mapLayersByName(layername)
+        if layers:
+            layer = layers[0]
+
+    if layer is None and log_info:
         tools_log.log_info("Layer not found", parameter=layername)
 
     return layer
@@ -1004,6 +1070,210 @@ def get_epsg():
 
 # region private functions
 
+def _parse_layer_source(uri):
+    """ Parse provider @uri into a read-only mapping of database connection parameters """
+
+    # Initialize variables
+    layer_source = {'db': None, 'schema': None, 'table': None, 'service': None, 'host': None, 'port': None,
+                    'user': None, 'password': None, 'sslmode': None}
+
+    if uri is None:
+        return MappingProxyType(layer_source)
+
+    # split with quoted substrings preservation
+    splt = shlex.split(uri)
+
+    list_uri = []
+    for v in splt:
+        if '=' in v:
+            elem_uri = tuple(v.split('='))
+            if len(elem_uri) == 2:
+                list_uri.append(elem_uri)
+
+    splt_dct = dict(list_uri)
+    if 'service' in splt_dct:
+        splt_dct['service'] = splt_dct['service']
+    if 'dbname' in splt_dct:
+        splt_dct['db'] = splt_dct['dbname']
+    if 'table' in splt_dct:
+        splt_dct['schema'], splt_dct['table'] = splt_dct['table'].split('.')
+
+    for key in layer_source.keys():
+        layer_source[key] = splt_dct.get(key)
+
+    return MappingProxyType(layer_source)
+
+
+def _get_layer_index():
+    """ Get the project layer index. Build it from the layer tree and connect its signals the first time """
+
+    global _layer_index
+
+    if _layer_index is not None:
+        return _layer_index
+
+    # Same layers and order as the TOC, so the first match is the one a scan of get_project_layers() would find
+    index = {'layers': {}, 'tables': {}, 'names': {}}
+    for layer in get_project_layers():
+        _add_layer_to_index(index, layer)
+
+    project = QgsProject.instance()
+    root = project.layerTreeRoot()
+    try:
+        project.layersWillBeRemoved.disconnect(_on_layers_removed)
+        project.cleared.disconnect(reset_layer_index)
+        root.addedChildren.disconnect(_on_layer_tree_changed)
+        root.removedChildren.disconnect(_on_layer_tree_changed)
+    except TypeError:
+        pass
+    project.layersWillBeRemoved.connect(_on_layers_removed)
+    project.cleared.connect(reset_layer_index)
+    root.addedChildren.connect(_on_layer_tree_changed)
+    root.removedChildren.connect(_on_layer_tree_changed)
+
+    _layer_index = index
+    return _layer_index
+
+
+def _add_layer_to_index(index, layer):
+    """ Add @layer to @index using its table name, schema and layer name """
+
+    if layer is None or layer.id() in index['layers']:
+        return
+
+    try:
+        uri_table = get_layer_source_table_name(layer)
+        table_schema = get_layer_schema(layer)
+    except AttributeError:
+        # Layer without data provider
+        uri_table = None
+        table_schema = None
+    layer_name = layer.name()
+    index['layers'][layer.id()] = (table_schema, uri_table, layer_name)
+    if uri_table is not None:
+        index['tables'].setdefault(uri_table, []).append(layer.id())
+    index['names'].setdefault(layer_name, []).append(layer.id())
+
+    # Connect layer signals only once, whatever the number of times the index is rebuilt
+    if layer.id() in _layer_index_slots:
+        return
+    slot = partial(_on_layer_changed, layer.id())
+    _layer_index_slots[layer.id()] = slot
+    try:
+        layer.dataSourceChanged.connect(slot)
+    except AttributeError:
+        pass
+    layer.nameChanged.connect(slot)
+    layer.willBeDeleted.connect(partial(_disconnect_layer_index_slot, layer))
+
+
+def _remove_layer_from_index(index, layer_id):
+    """ Remove layer @layer_id from @index """
+
+    entry = index['layers'].pop(layer_id, None)
+    _layer_sources.pop(layer_id, None)
+    if entry is None:
+        return
+
+    table_schema, uri_table, layer_name = entry
+    for key, value in (('tables', uri_table), ('names', layer_name)):
+        layer_ids = index[key].get(value, [])
+        if layer_id in layer_ids:
+            layer_ids.remove(layer_id)
+        if not layer_ids:
+            index[key].pop(value, None)
+
+
+def _disconnect_layer_index_slot(layer):
+    """ Disconnect the signals of @layer connected by _add_layer_to_index """
+
+    slot = _layer_index_slots.pop(layer.id(), None)
+    if slot is None:
+        return
+    try:
+        layer.dataSourceChanged.disconnect(slot)
+    except (AttributeError, TypeError):
+        pass
+    try:
+        layer.nameChanged.disconnect(slot)
+    except TypeError:
+        pass
+
+
+def _on_layer_tree_changed(*args):
+    """ Discard the index when layers are added, moved or removed in the layer tree """
+
+    global _layer_index
+    _layer_index = None
+
+
+def _on_layers_removed(layer_ids):
+
+    for layer_id in layer_ids:
+        _layer_sources.pop(layer_id, None)
+        if _layer_index is not None:
+            _remove_layer_from_index(_layer_index, layer_id)
+
+
+def _on_layer_changed(layer_id):
+    """ Discard the index when the name or data source of layer @layer_id changes, keeping the TOC order """
+
+    global _layer_index
+    _layer_index = None
+    _layer_sources.pop(layer_id, None)
+
+
+def _clear_feature_id_index(layer_id=None):
+
+    # Keep layer entries: their signals are already connected
+    for key, layer_indexes in _feature_id_index.items():
+        if layer_id in (None, key):
+            layer_indexes.clear()
+
+
+def _get_feature_id_index(layer, field_id):
+    """ Get index {str(@field_id value): [fid]} of @layer. Build it with a single attribute-only request """
+
+    if _feature_id_index_stale:
+        with _feature_id_index_lock:
+            stale = list(_feature_id_index_stale)
+            _feature_id_index_stale.clear()
+        for layer_id in stale:
+            _clear_feature_id_index(layer_id)
+
+    layer_indexes = _feature_id_index.get(layer.id())
+    if layer_indexes is None:
+        # Discard indexes of the layer whenever its data changes
+        layer_indexes = _feature_id_index[layer.id()] = {}
+        on_changed = partial(_on_layer_data_changed, layer.id())
+        layer.dataChanged.connect(on_changed)
+        layer.featureAdded.connect(on_changed)
+        layer.featureDeleted.connect(on_changed)
+        layer.attributeValueChanged.connect(on_changed)
+        layer.subsetStringChanged.connect(on_changed)
+        layer.willBeDeleted.connect(partial(_feature_id_index.pop, layer.id(), None))
+
+    if field_id in layer_indexes:
+        return layer_indexes[field_id]
+
+    field_index = layer.fields().indexFromName(field_id)
+    if field_index == -1:
+        return None
+
+    index = {}
+    request = QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry).setSubsetOfAttributes([field_index])
+    for feature in layer.getFeatures(request):
+        index.setdefault(str(feature[field_index]), []).append(feature.id())
+    layer_indexes[field_id] = index
+
+    return index
+
+
+def _on_layer_data_changed(layer_id, *args):
+
+    reset_feature_id_index(layer_id)
+
+
 def _get_vertex_from_point(feature):
     """
     Manage feature geometry when is Point
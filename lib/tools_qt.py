@@ -5,7 +5,10 @@ General Public License as published by the Free Software Foundation, either vers
 or (at your option) any later version.
 """
 # -*- coding: utf-8 -*-
+import codecs
+import csv
 import inspect
+import mmap
 import os
 import operator
 import sys
@@ -16,7 +19,7 @@ from functools import partial
 from encodings.aliases import aliases
 
 from qgis.PyQt.QtCore import QDate, QDateTime, QSortFilterProxyModel, QStringListModel, QTime, Qt, QRegExp, pyqtSignal,\
-    QPersistentModelIndex, QCoreApplication, QTranslator
+    QPersistentModelIndex, QCoreApplication, QTranslator, QAbstractTableModel, QModelIndex
 from qgis.PyQt.QtGui import QPixmap, QDoubleValidator, QTextCharFormat, QFont
 from qgis.PyQt.QtSql import QSqlTableModel
 from qgis.PyQt.QtWidgets import QAction, QLineEdit, QComboBox, QWidget, QDoubleSpinBox, QCheckBox, QLabel, QTextEdit, \
@@ -58,6 +61,197 @@ class GwHyperLinkLabel(QLabel):
         self.setStyleSheet("QLabel{color:purple; text-decoration: underline;}")
 
 
+class GwCsvTableModel(QAbstractTableModel):
+    """ Read-only model of a csv file. Line offsets are indexed on demand (fetchMore) and rows are only
+    parsed when they are shown, so big files open in constant time. Quoted values can't span several lines """
+
+    fetch_size = 200                    # Rows added each time the view asks for more rows
+    cache_size = 2000                   # Max parsed rows kept in memory
+
+    def __init__(self, path, encoding='utf8', delimiter=';', ignore_header=False, parent=None):
+
+        super().__init__(parent)
+        codecs.lookup(encoding)
+        self.path = path
+        self.encoding = encoding
+        self.delimiter = delimiter
+        self.ignore_header = ignore_header
+        stat = os.stat(path)
+        self.file_size = stat.st_size
+        self.file_mtime = stat.st_mtime
+        self.file = None
+        self.file_map = b''
+        self.map_encoding = encoding
+        self.offsets = []               # Start offset of every indexed line
+        self.scan_pos = 0               # Offset where next line starts
+        self.rows_loaded = 0
+        self.columns = 0
+        self.row_cache = {}
+        self._map_file()
+        self.fetchMore(QModelIndex())
+
+
+    def is_file(self, path):
+        """ Check if model is showing file @path and it hasn't changed since it was opened """
+
+        if path != self.path or not os.path.exists(path):
+            return False
+        stat = os.stat(path)
+        return stat.st_size == self.file_size and stat.st_mtime == self.file_mtime
+
+
+    def set_format(self, encoding, delimiter, ignore_header):
+        """ Parse rows again with new format. Indexed line offsets are kept if the file hasn't to be mapped again """
+
+        codecs.lookup(encoding)
+        self.beginResetModel()
+        remap = encoding != self.encoding and not (_is_ascii_compatible(encoding) and
+                                                   _is_ascii_compatible(self.encoding))
+        self.encoding = encoding
+        self.delimiter = delimiter
+        self.ignore_header = ignore_header
+        self.row_cache.clear()
+        self.rows_loaded = 0
+        self.columns = 0
+        if remap:
+            self.close()
+            self.offsets = []
+            self.scan_pos = 0
+            self._map_file()
+        elif isinstance(self.file_map, mmap.mmap):
+            # Text of files decoded at once is kept as utf-8 whatever their encoding is
+            self.map_encoding = encoding
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+
+    def close(self):
+        """ Release csv file """
+
+        if isinstance(self.file_map, mmap.mmap):
+            self.file_map.close()
+        self.file_map = b''
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+    def rowCount(self, parent=QModelIndex()):
+
+        if parent.isValid():
+            return 0
+        return self.rows_loaded
+
+
+    def columnCount(self, parent=QModelIndex()):
+
+        if parent.isValid():
+            return 0
+        return self.columns
+
+
+    def canFetchMore(self, parent=QModelIndex()):
+
+        if parent.isValid() or not self.file_map:
+            return False
+        return self.rows_loaded < self._indexed_rows() or self.scan_pos < len(self.file_map)
+
+
+    def fetchMore(self, parent=QModelIndex()):
+
+        if not self.canFetchMore(parent):
+            return
+
+        rows = self.rows_loaded + self.fetch_size
+        self._index_lines(rows + int(self.ignore_header))
+        rows = min(rows, self._indexed_rows())
+        if rows <= self.rows_loaded:
+            return
+
+        columns = max(len(self._get_row(row)) for row in range(self.rows_loaded, rows))
+        if columns > self.columns:
+            self.beginInsertColumns(QModelIndex(), self.columns, columns - 1)
+            self.columns = columns
+            self.endInsertColumns()
+
+        self.beginInsertRows(QModelIndex(), self.rows_loaded, rows - 1)
+        self.rows_loaded = rows
+        self.endInsertRows()
+
+
+    def data(self, index, role=Qt.DisplayRole):
+
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.ToolTipRole):
+            return None
+
+        values = self._get_row(index.row())
+        if index.column() >= len(values):
+            return None
+        return values[index.column()]
+
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+
+        if role != Qt.DisplayRole:
+            return None
+        return str(section + 1)
+
+
+    def _map_file(self):
+        """ Map csv file into memory. Line breaks of encodings not compatible with ascii (utf-16, utf-32...) can't be
+        found in the raw bytes: these files are decoded at once and their text is kept encoded as utf-8 """
+
+        if not self.file_size:
+            return
+
+        if _is_ascii_compatible(self.encoding):
+            self.file = open(self.path, 'rb')
+            self.file_map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.map_encoding = self.encoding
+        else:
+            with open(self.path, 'r', encoding=self.encoding, errors='replace', newline='') as csv_file:
+                self.file_map = csv_file.read().encode('utf-8')
+            self.map_encoding = 'utf-8'
+
+
+    def _indexed_rows(self):
+
+        return max(len(self.offsets) - int(self.ignore_header), 0)
+
+
+    def _index_lines(self, lines):
+        """ Index line offsets until @lines lines are indexed or end of file is reached """
+
+        map_size = len(self.file_map)
+        while len(self.offsets) < lines and self.scan_pos < map_size:
+            self.offsets.append(self.scan_pos)
+            end = self.file_map.find(b'\n', self.scan_pos)
+            self.scan_pos = map_size if end == -1 else end + 1
+
+
+    def _get_row(self, row):
+        """ Return list of values of @row """
+
+        values = self.row_cache.get(row)
+        if values is not None:
+            return values
+
+        line = row + int(self.ignore_header)
+        start = self.offsets[line]
+        end = self.offsets[line + 1] if line + 1 < len(self.offsets) else self.scan_pos
+        text = self.file_map[start:end].decode(self.map_encoding, errors='replace').rstrip('\r\n')
+        try:
+            values = next(csv.reader([text], delimiter=self.delimiter), [])
+        except csv.Error:
+            # Wrong encoding selected: show the line as it is
+            values = [text]
+
+        if len(self.row_cache) >= self.cache_size:
+            self.row_cache.clear()
+        self.row_cache[row] = values
+        return values
+
+
 def fill_combo_box(dialog, widget, rows, allow_nulls=True, clear_combo=True):
 
     if rows is None:
@@ -1391,4 +1585,13 @@ def _set_model_by_list(string_list, widget, proxy_model):
     widget.setCompleter(completer)
 
 
+def _is_ascii_compatible(encoding):
+    """ Check if line breaks and csv delimiters are encoded by @encoding as single ascii bytes """
+
+    try:
+        return '\n;, "'.encode(encoding) == b'\n;, "'
+    except (LookupError, UnicodeError):
+        return False
+
+
 # endregion
@@ -108,6 +108,12 @@ class Giswater(QObject):
         except Exception as e:
             print(f"Exception in unload when self._unset_child_layer_button(): {e}")
 
+        try:
+            # Write pending changes of configuration files
+            tools_gw.flush_config_parsers()
+        except Exception as e:
+            print(f"Exception in unload when tools_gw.flush_config_parsers(): {e}")
+
         try:
             # Remove file handler when reloading
             if hide_gw_button:
@@ -219,6 +225,12 @@ class Giswater(QObject):
         # Set init parameter 'exec_procedure_max_retries'
         global_vars.exec_procedure_max_retries = int(tools_gw.get_config_parser('system', 'exec_procedure_max_retries', 'user', 'init', False))
 
+        # Set init parameters of the auxiliary connection pool
+        for param in ('min_size', 'max_size', 'idle_timeout'):
+            value = tools_gw.get_config_parser('system', f'pool_{param}', 'user', 'init', False)
+            if value not in (None, 'None', ''):
+                global_vars.dao_pool_params[param] = int(value)
+
         # Create the GwSignalManager
         self._create_signal_manager()
 
@@ -0,0 +1,110 @@
+"""
+This file is part of Giswater 3
+The program is free software: you can redistribute it and/or modify it under the terms of the GNU
+General Public License as published by the Free Software Foundation, either version 3 of the License,
+or (at your option) any later version.
+"""
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import time
+import tracemalloc
+
+from ..core.admin.admin_btn import GwAdminButton
+from ..core.threads.epa_file_manager import GwEpaFileManager
+from ..lib import tools_log
+
+
+# dummy instance to replace GwGo2EpaButton
+class GwGo2EpaDummy(object):
+
+    def __getattr__(self, name):
+        return None
+
+
+class GwBenchmarkFileParsers:
+    """ Measure throughput and peak memory of the file parsers used by import tasks
+    Run it from the QGIS Python console once the plugin is loaded:
+        from giswater.test.benchmark_file_parsers import GwBenchmarkFileParsers
+        GwBenchmarkFileParsers().run()
+    """
+
+    def __init__(self, total_rows=500000):
+
+        self.total_rows = total_rows
+
+
+    def run(self):
+
+        self.benchmark_rpt_rows()
+        self.benchmark_inp_rows()
+
+
+    def benchmark_rpt_rows(self):
+        """ Tokenize a synthetic RPT file with @total_rows rows of the 'Node Results' section """
+
+        sources = {'Node Results': 'rpt_node', 'Link Results': 'rpt_arc'}
+        path = self._create_file(self._get_rpt_line, "rpt")
+        task = GwEpaFileManager("Benchmark RPT", GwGo2EpaDummy())
+        try:
+            with open(path, "r") as file:
+                result = self._measure(lambda: sum(1 for row in task._get_rpt_rows(file, sources)))
+        finally:
+            os.remove(path)
+        self._log_result("RPT rows (_get_rpt_rows)", *result)
+        return result
+
+
+    def benchmark_inp_rows(self):
+        """ Decode and tokenize a synthetic INP file with @total_rows rows of section [JUNCTIONS] """
+
+        path = self._create_file(self._get_inp_line, "inp", "[JUNCTIONS]\n;;Name  Elevation  MaxDepth\n")
+        admin = GwAdminButton.__new__(GwAdminButton)
+        admin.inp_sample_size = 1048576
+        try:
+            result = self._measure(lambda: sum(1 for row in admin._get_inp_rows(admin._read_inp_lines(path))))
+        finally:
+            os.remove(path)
+        self._log_result("INP rows (_get_inp_rows)", *result)
+        return result
+
+
+    # region private functions
+
+    def _create_file(self, get_line, suffix, header="  Node Results at 0:00:00 hrs:\n"):
+
+        fd, path = tempfile.mkstemp(suffix=f".{suffix}")
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            file.write(header)
+            for i in range(self.total_rows):
+                file.write(get_line(i))
+        return path
+
+
+    def _get_rpt_line(self, i):
+        return f"  N{i:<10}        {i % 500:>8.2f}    {(i * 7) % 300:>8.2f}    {(i * 3) % 90:>8.2f}    0.00\n"
+
+
+    def _get_inp_line(self, i):
+        return f"J{i:<16}\t{i % 500:.2f}\t{(i * 7) % 30:.2f}\t0\t0\t0\t;Junção {i}\n"
+
+
+    def _measure(self, function):
+        """ Return a tuple (rows, seconds, peak memory in bytes) of @function, which returns the rows processed """
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        rows = function()
+        seconds = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return rows, seconds, peak
+
+
+    def _log_result(self, name, rows, seconds, peak):
+
+        rows_sec = rows / seconds if seconds else 0
+        tools_log.log_info(f"Benchmark {name}: {rows} rows in {seconds:.2f} s ({rows_sec:.0f} rows/s), "
+                           f"peak memory {peak / 1024 / 1024:.1f} MB")
+
+    # endregion
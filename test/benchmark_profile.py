@@ -0,0 +1,73 @@
+"""
+This file is part of Giswater 3
+The program is free software: you can redistribute it and/or modify it under the terms of the GNU
+General Public License as published by the Free Software Foundation, either version 3 of the License,
+or (at your option) any later version.
+"""
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import time
+from functools import partial
+
+import numpy as np
+
+from ..core.threads.profile_image import GwProfileImageTask
+from ..core.toolbars.om.profile_button import GwProfileButton
+from ..lib import tools_log
+
+
+class GwBenchmarkProfile:
+    """ Measure the time needed to save the image of a synthetic profile, which no longer blocks the UI thread
+    Run it from the QGIS Python console once the plugin is loaded:
+        from giswater.test.benchmark_profile import GwBenchmarkProfile
+        GwBenchmarkProfile().run()
+    """
+
+    def __init__(self, total_nodes=2000, dpi=300):
+
+        self.total_nodes = total_nodes
+        self.dpi = dpi
+
+
+    def run(self):
+
+        # Only rendering methods of the button are used, so it doesn't need to be initialized
+        button = GwProfileButton.__new__(GwProfileButton)
+        items = self._get_items()
+        for lod in (False, True):
+            render_function = partial(button._render_profile, items=items, lod_width=10.4 if lod else None)
+            task = GwProfileImageTask("Benchmark profile", render_function, [], (10.4, 4.8), self.dpi)
+            fd, img_path = tempfile.mkstemp(suffix=".png")
+            os.close(fd)
+            try:
+                start = time.perf_counter()
+                task._save_image(img_path)
+                seconds = time.perf_counter() - start
+            finally:
+                os.remove(img_path)
+            tools_log.log_info(f"Benchmark profile image: {self.total_nodes} nodes, {self.dpi} dpi, lod={lod}: "
+                               f"{seconds:.2f} s")
+
+
+    # region private functions
+
+    def _get_items(self):
+        """ Get items (lines, markers, texts) like the ones recorded by GwProfileButton for @total_nodes nodes """
+
+        x = np.arange(self.total_nodes, dtype=float) * 25
+        top = 100 + np.sin(x / 500) * 5
+        bottom = top - 2
+        lines = {('-', 'black', 1.0, 2): [np.column_stack((x[i:i + 2], bottom[i:i + 2]))
+                                           for i in range(self.total_nodes - 1)],
+                 ('--', 'grey', 0.5, 1): [np.column_stack(((value, value), (80, top[i])))
+                                          for i, value in enumerate(x)]}
+        markers = {('o', 'black'): list(zip(x, bottom))}
+        texts = []
+        for i, value in enumerate(x):
+            texts.append(('text', (value, 85, f"N{i}"), {'fontsize': 6, 'rotation': 90}))
+            texts.append(('text', (value, 82, f"{top[i]:.2f}"), {'fontsize': 6, 'rotation': 90}))
+
+        return lines, markers, texts
+
+    # endregion
@@ -0,0 +1,138 @@
+"""
+This file is part of Giswater 3
+The program is free software: you can redistribute it and/or modify it under the terms of the GNU
+General Public License as published by the Free Software Foundation, either version 3 of the License,
+or (at your option) any later version.
+"""
+# -*- coding: utf-8 -*-
+import csv
+import io
+import unittest
+from unittest import mock
+
+from ..core.utils import tools_gw
+from ..core.threads import csv_import
+from ..core.threads.csv_import import GwCsvImportTask
+
+
+class GwTestCsvImport(unittest.TestCase):
+
+    def _get_task(self, delimiter=';', ignore_header=False, decimal_sep=','):
+
+        params = {'path': None, 'unicode': 'utf8', 'delimiter': delimiter, 'ignore_header': ignore_header,
+                  'decimal_sep': decimal_sep, 'fid': 234, 'label': 'test', 'function_name': 'gw_fct_import',
+                  'temp_tablename': 'temp_csv'}
+        with mock.patch.object(tools_gw, 'get_config_parser', return_value=None):
+            return GwCsvImportTask('Import csv', None, params)
+
+
+    def _get_rows(self, task, text):
+        return list(task._get_csv_rows(io.StringIO(text)))
+
+
+    def test_get_csv_rows(self):
+
+        task = self._get_task()
+        rows = self._get_rows(task, "a; b ;;d\n1;2;3;4\n")
+        self.assertEqual([values for values, position in rows], [['a', 'b', None, 'd'], ['1', '2', '3', '4']])
+
+
+    def test_get_csv_rows_ignore_header(self):
+
+        task = self._get_task(ignore_header=True)
+        rows = self._get_rows(task, "code;value\nA1;5\n")
+        self.assertEqual([values for values, position in rows], [['A1', '5']])
+
+
+    def test_get_csv_rows_quoted_values(self):
+
+        task = self._get_task(delimiter=',')
+        rows = self._get_rows(task, 'A1,"x, y","multi\nline"\n')
+        self.assertEqual(rows[0][0], ['A1', 'x, y', 'multiline'])
+
+
+    def test_get_csv_rows_position(self):
+
+        text = "a;1\nb;2\nc;3\n"
+        task = self._get_task()
+        rows = self._get_rows(task, text)
+        positions = [position for values, position in rows]
+        self.assertEqual(positions, sorted(positions))
+        self.assertEqual(positions[-1], len(text))
+
+
+    def test_get_csv_rows_empty_quoted_value(self):
+
+        task = self._get_task()
+        rows = self._get_rows(task, "a;'';\"\"\n")
+        self.assertEqual(rows[0][0], ['a', "''", None])
+
+
+    def test_check_decimal_comma(self):
+
+        task = self._get_task()
+        comma_cols = set()
+        text_cols = set()
+        task._check_decimal_comma(['1,5', '001,25', 'A1', '1.234,5', '12', None], comma_cols, text_cols)
+        task._check_decimal_comma(['-0,75', '002,5', 'B2', '-1.234.567,89', '7', '3,5'], comma_cols, text_cols)
+        self.assertEqual(sorted(comma_cols - text_cols), [0, 3, 5])
+        self.assertIn(1, text_cols)
+        self.assertIn(2, text_cols)
+        self.assertNotIn(4, comma_cols)
+
+
+    def test_check_decimal_comma_mixed_column(self):
+
+        task = self._get_task()
+        comma_cols = set()
+        text_cols = set()
+        task._check_decimal_comma(['1,5'], comma_cols, text_cols)
+        task._check_decimal_comma(['1,5,6'], comma_cols, text_cols)
+        self.assertEqual(comma_cols - text_cols, set())
+
+
+    def test_convert_decimal_comma(self):
+
+        task = self._get_task()
+        with mock.patch.object(csv_import.tools_db, 'execute_sql', return_value=True) as execute_sql:
+            self.assertTrue(task._convert_decimal_comma([0, 3]))
+        sql = execute_sql.call_args[0][0]
+        self.assertIn("csv1 = replace(replace(csv1, '.', ''), ',', '.')", sql)
+        self.assertIn("csv4 = replace(replace(csv4, '.', ''), ',', '.')", sql)
+        self.assertNotIn("csv2", sql)
+        self.assertFalse(execute_sql.call_args[1]['commit'])
+
+        with mock.patch.object(csv_import.tools_db, 'execute_sql') as execute_sql:
+            self.assertTrue(task._convert_decimal_comma([]))
+        execute_sql.assert_not_called()
+
+
+    def test_copy_csv_chunk(self):
+
+        task = self._get_task()
+        buffers = []
+
+        def copy_expert(sql, file, **kwargs):
+            buffers.append((sql, file.read(), kwargs))
+            return True
+
+        with mock.patch.object(csv_import.tools_db, 'copy_expert', side_effect=copy_expert):
+            self.assertTrue(task._copy_csv_chunk([['A1', None, 'x,"y"'], ['B2']]))
+
+        sql, data, kwargs = buffers[0]
+        self.assertEqual(sql, "COPY temp_csv (fid, csv1, csv2, csv3) FROM STDIN WITH (FORMAT csv)")
+        self.assertEqual(list(csv.reader(io.StringIO(data))),
+                         [['234', 'A1', '', 'x,"y"'], ['234', 'B2', '', '']])
+        self.assertFalse(kwargs['commit'])
+
+
+    def test_copy_csv_chunk_empty_rows(self):
+
+        task = self._get_task()
+        with mock.patch.object(csv_import.tools_db, 'copy_expert') as copy_expert:
+            self.assertTrue(task._copy_csv_chunk([[], []]))
+        copy_expert.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
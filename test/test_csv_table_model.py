@@ -0,0 +1,190 @@
+"""
+This file is part of Giswater 3
+The program is free software: you can redistribute it and/or modify it under the terms of the GNU
+General Public License as published by the Free Software Foundation, either version 3 of the License,
+or (at your option) any later version.
+"""
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+
+from ..lib.tools_qt import GwCsvTableModel
+
+
+class GwTestCsvTableModel(unittest.TestCase):
+
+    def setUp(self):
+
+        self.paths = []
+        self.models = []
+
+
+    def tearDown(self):
+
+        for model in self.models:
+            model.close()
+        for path in self.paths:
+            os.remove(path)
+
+
+    def _create_file(self, text, encoding='utf8', newline=None):
+
+        fd, path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(fd, 'w', encoding=encoding, newline=newline) as csv_file:
+            csv_file.write(text)
+        self.paths.append(path)
+        return path
+
+
+    def _get_model(self, path, encoding='utf8', delimiter=';', ignore_header=False):
+
+        model = GwCsvTableModel(path, encoding, delimiter, ignore_header)
+        self.models.append(model)
+        return model
+
+
+    def _get_rows(self, model):
+
+        while model.canFetchMore():
+            model.fetchMore()
+        return [model._get_row(row) for row in range(model.rowCount())]
+
+
+    def test_read_rows(self):
+
+        path = self._create_file("code;value\nA1;1,5\nB2;2\n")
+        model = self._get_model(path)
+        self.assertEqual(self._get_rows(model), [['code', 'value'], ['A1', '1,5'], ['B2', '2']])
+        self.assertEqual(model.columnCount(), 2)
+
+
+    def test_ignore_header(self):
+
+        path = self._create_file("code;value\nA1;1,5\n")
+        model = self._get_model(path, ignore_header=True)
+        self.assertEqual(self._get_rows(model), [['A1', '1,5']])
+
+
+    def test_crlf_and_last_line_without_break(self):
+
+        path = self._create_file("A1;1\r\nB2;2", newline='')
+        model = self._get_model(path)
+        self.assertEqual(self._get_rows(model), [['A1', '1'], ['B2', '2']])
+
+
+    def test_quoted_and_empty_values(self):
+
+        path = self._create_file("A1;\"x;y\";;''\n")
+        model = self._get_model(path)
+        self.assertEqual(self._get_rows(model), [['A1', 'x;y', '', "''"]])
+        self.assertEqual(model.columnCount(), 4)
+
+
+    def test_columns_grow_with_longer_rows(self):
+
+        path = self._create_file("A1\nB2;2;3\n")
+        model = self._get_model(path)
+        self._get_rows(model)
+        self.assertEqual(model.columnCount(), 3)
+
+
+    def test_empty_file(self):
+
+        path = self._create_file("")
+        model = self._get_model(path)
+        self.assertEqual(model.rowCount(), 0)
+        self.assertFalse(model.canFetchMore())
+
+
+    def test_fetch_more_by_pages(self):
+
+        path = self._create_file("".join(f"N{i};{i}\n" for i in range(25)))
+        model = GwCsvTableModel.__new__(GwCsvTableModel)
+        model.fetch_size = 10
+        model.__init__(path)
+        self.models.append(model)
+        self.assertEqual(model.rowCount(), 10)
+        model.fetchMore()
+        self.assertEqual(model.rowCount(), 20)
+        model.fetchMore()
+        self.assertEqual(model.rowCount(), 25)
+        self.assertFalse(model.canFetchMore())
+        self.assertEqual(model._get_row(24), ['N24', '24'])
+
+
+    def test_row_cache_is_bounded(self):
+
+        path = self._create_file("".join(f"N{i};{i}\n" for i in range(50)))
+        model = GwCsvTableModel.__new__(GwCsvTableModel)
+        model.cache_size = 10
+        model.__init__(path)
+        self.models.append(model)
+        self.assertEqual(self._get_rows(model)[-1], ['N49', '49'])
+        self.assertLessEqual(len(model.row_cache), 10)
+
+
+    def test_latin1(self):
+
+        path = self._create_file("Façade;àé\n", encoding='latin1')
+        model = self._get_model(path, encoding='latin1')
+        self.assertEqual(self._get_rows(model), [['Façade', 'àé']])
+
+
+    def test_utf8_sig(self):
+
+        path = self._create_file("code;value\nA1;1\n", encoding='utf-8-sig')
+        model = self._get_model(path, encoding='utf-8-sig')
+        self.assertEqual(self._get_rows(model)[0], ['code', 'value'])
+
+
+    def test_utf16(self):
+
+        for encoding in ('utf-16', 'utf-16-be', 'utf-32'):
+            path = self._create_file("code;value\nÀ1;1,5\n", encoding=encoding)
+            model = self._get_model(path, encoding=encoding)
+            self.assertEqual(self._get_rows(model), [['code', 'value'], ['À1', '1,5']], encoding)
+
+
+    def test_wrong_encoding_does_not_raise(self):
+
+        path = self._create_file("code;value\nA1;1\n", encoding='utf-16')
+        model = self._get_model(path, encoding='utf8')
+        self.assertTrue(self._get_rows(model))
+
+
+    def test_set_format(self):
+
+        path = self._create_file("code;value\nÀ1;1,5\n", encoding='utf-16')
+        model = self._get_model(path, encoding='utf8')
+        self._get_rows(model)
+
+        model.set_format('utf-16', ';', True)
+        self.assertEqual(self._get_rows(model), [['À1', '1,5']])
+
+        model.set_format('utf-16', ',', False)
+        self.assertEqual(self._get_rows(model), [['code;value'], ['À1;1', '5']])
+
+        # Wrong encoding: raw bytes are mapped again and shown as they are
+        model.set_format('latin1', ';', False)
+        self.assertEqual(model.map_encoding, 'latin1')
+        self.assertTrue(self._get_rows(model))
+
+        model.set_format('utf-16', ';', False)
+        self.assertEqual(self._get_rows(model), [['code', 'value'], ['À1', '1,5']])
+
+
+    def test_is_file(self):
+
+        path = self._create_file("A1;1\n")
+        model = self._get_model(path)
+        self.assertTrue(model.is_file(path))
+        self.assertFalse(model.is_file(path + "_other"))
+
+        with open(path, 'a') as csv_file:
+            csv_file.write("B2;2\n")
+        self.assertFalse(model.is_file(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+"""
+This file is part of Giswater 3
+The program is free software: you can redistribute it and/or modify it under the terms of the GNU
+General Public License as published by the Free Software Foundation, either version 3 of the License,
+or (at your option) any later version.
+"""
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+
+from ..core.utils import tools_gw
+from ..core.admin.admin_btn import GwAdminButton
+
+
+class GwTestInpImport(unittest.TestCase):
+
+    def setUp(self):
+
+        self.admin = GwAdminButton.__new__(GwAdminButton)
+        self.admin.inp_sample_size = 1048576
+        self.paths = []
+
+
+    def tearDown(self):
+
+        for path in self.paths:
+            os.remove(path)
+
+
+    def _create_file(self, data):
+
+        fd, path = tempfile.mkstemp(suffix=".inp")
+        with os.fdopen(fd, 'wb') as inp_file:
+            inp_file.write(data)
+        self.paths.append(path)
+        return path
+
+
+    def _get_rows(self, text):
+
+        lines = [(line, position) for position, line in enumerate(text.splitlines(keepends=True))]
+        return [(target, values) for target, values, position in self.admin._get_inp_rows(lines)]
+
+
+    def test_get_inp_rows(self):
+
+        rows = self._get_rows("[JUNCTIONS]\n;;Name  Elevation\nJ1\t10.5  0   ''\n\n  \nJ2 20 ;comment\n")
+        self.assertEqual(rows, [('[JUNCTIONS]', ['[JUNCTIONS]']),
+                                ('[JUNCTIONS]', [';;Name  Elevation']),
+                                ('[JUNCTIONS]', ['J1', '10.5', '0', None]),
+                                ('[JUNCTIONS]', ['J2', '20', ';comment'])])
+
+
+    def test_get_inp_rows_ignored_values(self):
+
+        rows = self._get_rows("[PIPES]\nP1 ; ** -- N1\n")
+        self.assertEqual(rows[1], ('[PIPES]', ['P1', 'N1']))
+
+
+    def test_get_inp_rows_single_value_sections(self):
+
+        rows = self._get_rows("[CONTROLS]\nLINK P1 OPEN IF NODE N1 ABOVE 5\n"
+                              "[EVAPORATION]\nMONTHLY\t0.1 0.2\n")
+        self.assertEqual(rows[1], ('[CONTROLS]', ['LINK P1 OPEN IF NODE N1 ABOVE 5']))
+        self.assertEqual(rows[3], ('[EVAPORATION]', ['MONTHLY', '0.1 0.2']))
+
+
+    def test_get_inp_rows_position(self):
+
+        lines = [("[TITLE]\n", 8), ("\n", 9), ("Test\n", 14)]
+        rows = list(self.admin._get_inp_rows(lines))
+        self.assertEqual([position for target, values, position in rows], [8, 14])
+
+
+    def test_read_inp_lines_utf8(self):
+
+        data = "﻿[TITLE]\nJunção\r\n".encode('utf-8')
+        path = self._create_file(data)
+        lines = list(self.admin._read_inp_lines(path))
+        self.assertEqual([line for line, position in lines], ["[TITLE]\n", "Junção\r\n"])
+        self.assertEqual(lines[-1][1], len(data))
+
+
+    def test_get_inp_encoding_sample(self):
+
+        # Sample ends in the middle of a character and invalid bytes after the sample are not read
+        self.admin.inp_sample_size = 4
+        path = self._create_file("Junção".encode('utf-8') + b"\xe7\xe3")
+        self.assertEqual(self.admin._get_inp_encoding(path), 'utf-8-sig')
+
+
+    def test_read_inp_lines_utf16(self):
+
+        path = self._create_file("[TITLE]\nJunção\n".encode('utf-16'))
+        self.admin._get_inp_encoding = lambda file_path, offset=0: 'utf-16'
+        self.assertEqual([line for line, position in self.admin._read_inp_lines(path)], ["[TITLE]\n", "Junção\n"])
+
+
+    def test_read_inp_lines_not_utf8_after_sample(self):
+
+        self.admin.inp_sample_size = 16
+        path = self._create_file(b"[TITLE]\n" + b"x" * 32 + b"\nJun\xe7\xe3o\n")
+        self.admin._get_inp_encoding = lambda file_path, offset=0: 'utf-8-sig' if offset == 0 else 'latin-1'
+        lines = [line for line, position in self.admin._read_inp_lines(path)]
+        self.assertEqual(lines[-1], "Junção\n")
+
+
+if __name__ == '__main__':
+    unittest.main()